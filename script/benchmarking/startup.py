@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+"""
+Benchmark the startup time of the srcomp command line tool.
+
+Each command is timed both "cold" (with a fresh bytecode cache, as after an
+install or upgrade) and "warm" (the usual case), along with a per-module
+breakdown of import times from `python -X importtime`.
+
+Timings are recorded as the overhead above the startup of a bare interpreter,
+which makes the stored baseline less sensitive to the machine it's run on.
+Any command whose warm overhead exceeds the baseline by more than the allowed
+tolerance is reported as a regression and the script exits non-zero.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+MY_DIR = Path(__file__).parent
+DEFAULT_BASELINE = MY_DIR / 'startup-baseline.json'
+
+SRCOMP = [sys.executable, '-m', 'sr.comp.cli']
+
+DEFAULT_COMMANDS = [
+    'list-commands',
+    '--help',
+    'for-each-match --help',
+    'show-schedule --help',
+    'validate --help',
+]
+
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+class Result(NamedTuple):
+    cold_ms: float
+    warm_ms: float
+    imports: list[ImportTime]
+
+
+def run(args: list[str], env: dict[str, str] | None = None) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        args,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        env=env,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def time_cold(args: list[str], repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as pycache:
+            env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache)
+            timings.append(run(args, env))
+    return statistics.median(timings)
+
+
+def time_warm(args: list[str], repeats: int) -> float:
+    # Ensure the bytecode cache is populated
+    run(args)
+    return statistics.median(run(args) for _ in range(repeats))
+
+
+def parse_import_times(stderr: str) -> list[ImportTime]:
+    """
+    Parse the output of `python -X importtime`, which looks like:
+
+        import time: self [us] | cumulative | imported package
+        import time:       123 |        456 |   some.module
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            # The header line
+            continue
+
+        module = name.lstrip()
+        imports.append(ImportTime(
+            module=module,
+            self_us=int(self_us),
+            cumulative_us=int(cumulative_us),
+            depth=(len(name) - len(module) - 1) // 2,
+        ))
+    return imports
+
+
+def import_times(args: list[str]) -> list[ImportTime]:
+    result = subprocess.run(
+        [args[0], '-X', 'importtime', *args[1:]],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return parse_import_times(result.stderr)
+
+
+def benchmark(command: str, repeats: int) -> Result:
+    args = [*SRCOMP, *command.split()]
+    return Result(
+        cold_ms=time_cold(args, repeats),
+        warm_ms=time_warm(args, repeats),
+        imports=import_times(args),
+    )
+
+
+def print_imports(imports: list[ImportTime], ignore: set[str], top: int) -> None:
+    # Only report the outermost imports which the interpreter doesn't already
+    # make on its own, so that the cost is attributed to what we import directly.
+    ours = [x for x in imports if x.module not in ignore and x.depth == 0]
+    ours.sort(key=lambda x: x.cumulative_us, reverse=True)
+    for item in ours[:top]:
+        print(
+            f"    {item.cumulative_us / 1000:7.1f}ms cumulative "
+            f"{item.self_us / 1000:7.1f}ms self  {item.module}",
+        )
+
+
+def main(args: argparse.Namespace) -> None:
+    bare_interpreter = [sys.executable, '-c', 'pass']
+    interpreter_ms = time_warm(bare_interpreter, args.repeats)
+    interpreter_imports = {x.module for x in import_times(bare_interpreter)}
+    print(f"Bare interpreter: {interpreter_ms:.1f}ms")
+
+    overheads = {}
+    for command in args.commands:
+        result = benchmark(command, args.repeats)
+        # Small overheads can come out negative due to noise
+        overheads[command] = round(max(0, result.warm_ms - interpreter_ms), 1)
+        print(
+            f"srcomp {command}: cold {result.cold_ms:.1f}ms, "
+            f"warm {result.warm_ms:.1f}ms "
+            f"(+{overheads[command]:.1f}ms over the interpreter)",
+        )
+        print_imports(result.imports, interpreter_imports, args.top_imports)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(overheads, indent=4, sort_keys=True) + '\n')
+        print(f"Saved baseline to {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print(f"No baseline found at {args.baseline}; use --save-baseline to create one")
+        return
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = []
+    for command, overhead in overheads.items():
+        expected = baseline.get(command)
+        if expected is None:
+            continue
+
+        limit = expected * (1 + args.tolerance) + args.slack_ms
+        if overhead > limit:
+            regressions.append(
+                f"srcomp {command}: +{overhead:.1f}ms vs baseline +{expected:.1f}ms",
+            )
+
+    if regressions:
+        print("Startup regressions found:")
+        for regression in regressions:
+            print(f"  {regression}")
+        exit(1)
+
+    print("No regressions against the baseline")
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        'commands',
+        nargs='*',
+        default=DEFAULT_COMMANDS,
+        help=(
+            "The srcomp commands to time, each as a single argument, for "
+            "example 'show-schedule --help'. (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        '--repeats',
+        type=int,
+        default=20,
+        help="Number of runs to take the median of (default: %(default)s)",
+    )
+    parser.add_argument(
+        '--top-imports',
+        type=int,
+        default=5,
+        help="Number of the slowest imports to show (default: %(default)s)",
+    )
+    parser.add_argument(
+        '--baseline',
+        type=Path,
+        default=DEFAULT_BASELINE,
+        help="Path to the baseline file (default: %(default)s)",
+    )
+    parser.add_argument(
+        '--save-baseline',
+        action='store_true',
+        help="Record the timings as the new baseline rather than comparing",
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.25,
+        help=(
+            "Fraction by which the overhead may exceed the baseline before "
+            "being considered a regression (default: %(default)s)"
+        ),
+    )
+    parser.add_argument(
+        '--slack-ms',
+        type=float,
+        default=10,
+        help=(
+            "Additional absolute allowance, to avoid noise on small "
+            "overheads (default: %(default)s)"
+        ),
+    )
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    main(parse_args())
@@ -26,6 +26,7 @@ setup(
         'invoke >= 1.7, <3',
         'sr.comp >=1.14, <2',
         'reportlab >=3.1.44, <5',
+        'PyYAML >=5.1, <7',
         'requests >=2.5.1, <3',
         # Work around https://sourceforge.net/p/ruamel-yaml/tickets/534/, where
         # number-zero (0) keys don't round trip under YAML 1.1, by avoiding
@@ -121,28 +121,29 @@ def parse_time(compstate_path: Path, when_str: str) -> datetime.datetime:
         return parse_datetime(when_str)
 
 
-def add_delay(schedule: dict[str, Any], delay_seconds: int, when: datetime.datetime) -> None:
-    delays = schedule.get('delays')
-    if not delays:
-        delays = schedule['delays'] = []
-    new_delay = {
+def new_delay(delay_seconds: int, when: datetime.datetime) -> dict[str, Any]:
+    return {
         'delay': delay_seconds,
         'time': when,
     }
-    delays.append(new_delay)
 
 
 def command(settings: argparse.Namespace) -> tuple[datetime.timedelta, datetime.datetime]:
     from sr.comp.cli import yaml_round_trip as yaml
 
-    with yaml.edit(settings.compstate / 'schedule.yaml') as schedule:
-        how_long = parse_duration(settings.how_long)
-        how_long_seconds = how_long.seconds
+    how_long = parse_duration(settings.how_long)
+    how_long_seconds = how_long.seconds
 
-        when = parse_time(settings.compstate, settings.when)
-        when = when.replace(microsecond=0)
+    when = parse_time(settings.compstate, settings.when)
+    when = when.replace(microsecond=0)
 
-        add_delay(schedule, how_long_seconds, when)
+    # Delays are added during matches, so this patches the file directly
+    # where it can rather than re-writing the whole schedule.
+    yaml.append(
+        settings.compstate / 'schedule.yaml',
+        'delays',
+        [new_delay(how_long_seconds, when)],
+    )
 
     return how_long, when
 
@@ -6,12 +6,10 @@ from sr.comp.types import TLA
 
 
 def command(settings: argparse.Namespace) -> None:
-    import os.path
-
-    from sr.comp.comp import SRComp
+    from sr.comp.cli.compstate_loader import load
     from sr.comp.winners import Award
 
-    comp = SRComp(os.path.realpath(settings.compstate))
+    comp = load(settings.compstate)
 
     def format_team(tla: TLA) -> str:
         team = comp.teams[tla]
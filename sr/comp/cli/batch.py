@@ -0,0 +1,128 @@
+"""
+Run many read-only commands against a single load of a compstate.
+
+The script file should contain one command per line, written as it would be
+on the command line but without the leading ``srcomp`` or the compstate path,
+for example::
+
+    # End of day report
+    show-league-table
+    show-schedule --all
+    knocked-out-teams
+
+Blank lines and lines starting with ``#`` are ignored. Use ``-`` to read the
+script from stdin.
+
+By default the output of each command is written to stdout, preceded by a
+header line naming the command. Alternatively each command's output can be
+written to a separate file within an output directory.
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from collections.abc import Iterable
+from pathlib import Path
+from typing import NamedTuple
+
+
+class Invocation(NamedTuple):
+    line_number: int
+    args: list[str]
+
+
+def parse_script(lines: Iterable[str]) -> list[Invocation]:
+    import shlex
+
+    from .in_process import SUPPORTED_COMMANDS
+
+    invocations = []
+    for line_number, line in enumerate(lines, start=1):
+        args = shlex.split(line, comments=True)
+        if not args:
+            continue
+
+        if args[0] not in SUPPORTED_COMMANDS:
+            raise ValueError(
+                f"Line {line_number}: {args[0]!r} is not a command which can "
+                f"be run in batch (supported: {', '.join(sorted(SUPPORTED_COMMANDS))})",
+            )
+
+        invocations.append(Invocation(line_number, args))
+
+    return invocations
+
+
+def output_filename(invocation: Invocation) -> str:
+    slug = re.sub(r'[^A-Za-z0-9]+', '-', ' '.join(invocation.args)).strip('-')
+    return f'{invocation.line_number:03d}-{slug}.txt'
+
+
+def command(settings: argparse.Namespace) -> None:
+    from . import compstate_loader
+    from .in_process import run_captured, with_compstate
+
+    with settings.script as f:
+        try:
+            invocations = parse_script(f)
+        except ValueError as e:
+            exit(str(e))
+
+    if settings.output_dir is not None:
+        settings.output_dir.mkdir(parents=True, exist_ok=True)
+
+    worst_exit_code = 0
+    with compstate_loader.caching():
+        for invocation in invocations:
+            stdout, stderr, exit_code = run_captured(
+                with_compstate(invocation.args, settings.compstate),
+            )
+
+            description = ' '.join(invocation.args)
+            if settings.output_dir is None:
+                print(f"==> {description} <==")
+                print(stdout, end='')
+                sys.stdout.flush()
+            else:
+                (settings.output_dir / output_filename(invocation)).write_text(stdout)
+
+            if stderr:
+                for line in stderr.splitlines():
+                    print(f"{description}: {line}", file=sys.stderr)
+
+            if exit_code != 0:
+                print(f"{description}: exited with status {exit_code}", file=sys.stderr)
+                worst_exit_code = max(worst_exit_code, exit_code)
+
+    exit(worst_exit_code)
+
+
+def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
+    help_msg, *_ = __doc__.strip().splitlines()
+    parser = subparsers.add_parser(
+        'batch',
+        help=help_msg,
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        'compstate',
+        type=Path,
+        help="competition state repository",
+    )
+    parser.add_argument(
+        'script',
+        type=argparse.FileType('r'),
+        help="file listing the commands to run, one per line",
+    )
+    parser.add_argument(
+        '--output-dir',
+        type=Path,
+        help=(
+            "write the output of each command to a separate file in this "
+            "directory, named after its line number and the command"
+        ),
+    )
+    parser.set_defaults(func=command)
@@ -3,87 +3,153 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import importlib
+import os
 import sys
+from collections.abc import Collection
 
-from . import (
-    add_delay,
-    awards,
-    delay,
-    deploy,
-    fetch,
-    for_each_match,
-    import_schedule,
-    knocked_out_teams,
-    list_midi_ports,
-    match_order_teams,
-    modernise_static_knockout,
-    print_schedule,
-    schedule_league,
-    scorer,
-    shift_matches,
-    show_league_table,
-    show_schedule,
-    summary,
-    top_match_points,
-    update_layout,
-    validate,
-    yaml_round_trip,
-    youtube_chapters,
-)
+from . import profiling, timings
+
+# Mapping of command names to the modules which implement them. Each module
+# must provide an ``add_subparser`` function which adds the command's parser.
+#
+# Modules are only imported when their command is needed, so that the CLI
+# starts quickly. Commands should therefore avoid doing expensive work (such as
+# importing `sr.comp`) at import time or while building their parsers.
+COMMANDS = {
+    'add-delay': 'add_delay',
+    'awards': 'awards',
+    'batch': 'batch',
+    'completion-cache': 'completion_cache',
+    'daemon': 'daemon',
+    'delay': 'delay',
+    'deploy': 'deploy',
+    'fetch': 'fetch',
+    'for-each-match': 'for_each_match',
+    'import-schedule': 'import_schedule',
+    'knocked-out-teams': 'knocked_out_teams',
+    'list-midi-ports': 'list_midi_ports',
+    'match-order-teams': 'match_order_teams',
+    'modernise-static-knockout': 'modernise_static_knockout',
+    'print-schedule': 'print_schedule',
+    'schedule-league': 'schedule_league',
+    'score': 'scorer',
+    'shell': 'shell',
+    'shift-matches': 'shift_matches',
+    'show-league-table': 'show_league_table',
+    'show-schedule': 'show_schedule',
+    'snapshot': 'snapshot',
+    'summary': 'summary',
+    'top-match-points': 'top_match_points',
+    'update-layout': 'update_layout',
+    'validate': 'validate',
+    'round-trip': 'yaml_round_trip',
+    'youtube-chapters': 'youtube_chapters',
+}
+
+LIST_COMMANDS = 'list-commands'
+
+# Environment variable giving the socket of an `srcomp daemon` to use.
+DAEMON_ENV = 'SRCOMP_DAEMON'
+
+
+def command_names() -> list[str]:
+    return [LIST_COMMANDS, *COMMANDS.keys()]
 
 
 def add_list_commands(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
     def command(settings: argparse.Namespace) -> None:
-        commands = subparsers.choices.keys()
-        print(" ".join(commands))
+        print(" ".join(command_names()))
 
     help_text = "Lists the available commands; useful for adding " \
                 "auto-completion of command names."
 
-    parser = subparsers.add_parser('list-commands', help=help_text, description=help_text)
+    parser = subparsers.add_parser(LIST_COMMANDS, help=help_text, description=help_text)
     parser.set_defaults(func=command)
 
 
-def argument_parser() -> argparse.ArgumentParser:
-    """A parser for CLI tool command line arguments, from argparse."""
+def argument_parser(commands: Collection[str] | None = None) -> argparse.ArgumentParser:
+    """
+    A parser for CLI tool command line arguments, from argparse.
+
+    By default the parser includes all the commands, which requires importing
+    all of their modules. Passing the names of specific commands limits the
+    parser (and the imports) to just those commands.
+    """
     parser = argparse.ArgumentParser(description="srcomp command-line interface")
+    profiling.add_arguments(parser)
+    timings.add_arguments(parser)
+
     subparsers = parser.add_subparsers(title="commands")
     add_list_commands(subparsers)
 
-    add_delay.add_subparser(subparsers)
-    awards.add_subparser(subparsers)
-    delay.add_subparser(subparsers)
-    deploy.add_subparser(subparsers)
-    fetch.add_subparser(subparsers)
-    for_each_match.add_subparser(subparsers)
-    import_schedule.add_subparser(subparsers)
-    knocked_out_teams.add_subparser(subparsers)
-    list_midi_ports.add_subparser(subparsers)
-    match_order_teams.add_subparser(subparsers)
-    modernise_static_knockout.add_subparser(subparsers)
-    print_schedule.add_subparser(subparsers)
-    schedule_league.add_subparser(subparsers)
-    scorer.add_subparser(subparsers)
-    shift_matches.add_subparser(subparsers)
-    show_league_table.add_subparser(subparsers)
-    show_schedule.add_subparser(subparsers)
-    summary.add_subparser(subparsers)
-    top_match_points.add_subparser(subparsers)
-    update_layout.add_subparser(subparsers)
-    validate.add_subparser(subparsers)
-    yaml_round_trip.add_subparser(subparsers)
-    youtube_chapters.add_subparser(subparsers)
+    for name, module_name in COMMANDS.items():
+        if commands is not None and name not in commands:
+            continue
+
+        module = importlib.import_module(f'{__package__}.{module_name}')
+        module.add_subparser(subparsers)
 
     return parser
 
 
+def find_command(args: list[str]) -> str | None:
+    """
+    Find the name of the command being run, if it's a known command.
+    """
+    names = command_names()
+    return next((x for x in args if x in names), None)
+
+
+def save_disk_caches() -> None:
+    # Only if compstates have been loaded, as importing the loader is slow
+    compstate_loader = sys.modules.get(f'{__package__}.compstate_loader')
+    if compstate_loader is not None:
+        compstate_loader.save_disk_caches()
+
+
+def run(args: list[str]) -> None:
+    """Run the given command line within this process."""
+    command = find_command(args)
+    parser = argument_parser(None if command is None else [command])
+    settings = parser.parse_args(args)
+    if 'func' not in settings:
+        parser.print_help()
+        return
+
+    with contextlib.ExitStack() as stack:
+        if settings.timings is not None:
+            stack.enter_context(timings.recording())
+
+        if settings.profile is not None:
+            stack.enter_context(profiling.profiled(
+                settings.profile,
+                memory=settings.profile_memory,
+                top=settings.profile_top,
+            ))
+
+        stack.callback(save_disk_caches)
+
+        settings.func(settings)
+
+
 def main(args: list[str] | None = None) -> None:
     """Run as the CLI tool."""
     if args is None:
         args = sys.argv[1:]
-    parser = argument_parser()
-    settings = parser.parse_args(args)
-    if 'func' in settings:
-        settings.func(settings)
-    else:
-        parser.print_help()
+
+    daemon_socket = os.environ.get(DAEMON_ENV)
+    if daemon_socket:
+        from . import daemon
+        from .in_process import SUPPORTED_COMMANDS
+
+        # Watching runs indefinitely, so gains nothing from the daemon. Global
+        # options (which come before the command) such as --profile apply to
+        # the process running the command, so need it to be run here.
+        if args and args[0] in SUPPORTED_COMMANDS and '--watch' not in args:
+            exit_code = daemon.run_remote(daemon_socket, args)
+            if exit_code is not None:
+                exit(exit_code)
+
+    run(args)
@@ -0,0 +1,262 @@
+"""
+Read-only access to a competition's state via its HTTP API (the "comp-api"
+served by srcomp-http), for use on machines without a current clone of the
+compstate.
+
+Responses are cached on disk along with their ETags, so that data which hasn't
+changed since it was last fetched is revalidated (via ``If-None-Match``) rather
+than downloaded again. The cache lives alongside the compstate cache (see
+`compstate_loader`) and is disabled along with it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from types import TracebackType
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+    from sr.comp.match_period import Match, MatchPeriod, MatchSlot
+
+TIMEOUT_SECONDS = 5
+
+# The most requests made at once, and so the number of pooled connections
+MAX_CONNECTIONS = 4
+
+
+class CompAPIError(RuntimeError):
+    pass
+
+
+def cache_dir() -> Path | None:
+    from .compstate_loader import disk_cache_dir
+
+    path = disk_cache_dir()
+    return None if path is None else path / 'comp-api'
+
+
+class CompAPI:
+    """
+    A client for the comp-api at the given URL (typically ending in
+    ``/comp-api``). Connections are pooled and reused across requests.
+
+    Sessions aren't thread-safe, so each thread gets its own, while the
+    connection pool (held by the adapter) is shared between them.
+    """
+
+    def __init__(self, base_url: str, cache_path: Path | None = None) -> None:
+        import requests.adapters
+
+        self.base_url = base_url.rstrip('/')
+        self._cache_path = cache_path
+
+        self._adapter = requests.adapters.HTTPAdapter(pool_maxsize=MAX_CONNECTIONS)
+        self._local = threading.local()
+
+    def __enter__(self) -> CompAPI:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._adapter.close()
+
+    def _session(self) -> requests.Session:
+        session: requests.Session | None = getattr(self._local, 'session', None)
+        if session is None:
+            import requests
+
+            session = self._local.session = requests.Session()
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+        return session
+
+    def _cache_file(self, url: str) -> Path | None:
+        if self._cache_path is None:
+            return None
+        return self._cache_path / f'{hashlib.sha256(url.encode()).hexdigest()}.json'
+
+    def _read_cache(self, url: str) -> dict[str, str] | None:
+        cache_file = self._cache_file(url)
+        if cache_file is None:
+            return None
+
+        try:
+            entry = json.loads(cache_file.read_text())
+        except (OSError, ValueError):
+            return None
+
+        if not isinstance(entry, dict) or entry.get('url') != url:
+            return None
+        return entry
+
+    def _write_cache(self, url: str, etag: str, body: str) -> None:
+        cache_file = self._cache_file(url)
+        if cache_file is None:
+            return
+
+        # The cache is only an optimisation, so failing to write it isn't an error
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                'w',
+                dir=cache_file.parent,
+                delete=False,
+            ) as f:
+                try:
+                    json.dump({'url': url, 'etag': etag, 'body': body}, f)
+                except BaseException:
+                    os.unlink(f.name)
+                    raise
+            os.replace(f.name, cache_file)
+        except OSError:
+            pass
+
+    def get(self, path: str) -> Any:
+        """
+        Fetch the given endpoint (e.g. ``arenas``), returning its JSON data.
+
+        Raises `CompAPIError` if the data can't be fetched.
+        """
+        import requests
+
+        from .timings import phase
+
+        url = f'{self.base_url}/{path}'
+        cached = self._read_cache(url)
+        headers = {} if cached is None else {'If-None-Match': cached['etag']}
+
+        try:
+            with phase('network'):
+                response = self._session().get(url, headers=headers, timeout=TIMEOUT_SECONDS)
+
+            if response.status_code == 304 and cached is not None:
+                return json.loads(cached['body'])
+
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise CompAPIError(f"Failed to fetch {url}: {e}") from e
+
+        etag = response.headers.get('ETag')
+        if etag:
+            self._write_cache(url, etag, response.text)
+        return data
+
+    def get_all(self, paths: Sequence[str]) -> list[Any]:
+        """Fetch the given endpoints concurrently, returning their JSON data."""
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(min(MAX_CONNECTIONS, len(paths))) as executor:
+            return list(executor.map(self.get, paths))
+
+
+@contextlib.contextmanager
+def connect(base_url: str) -> Iterator[CompAPI]:
+    """
+    Connect to the comp-api at the given URL, using the on-disk cache. Errors
+    fetching data from it are reported to the user.
+    """
+    with CompAPI(base_url, cache_dir()) as api:
+        try:
+            yield api
+        except CompAPIError as e:
+            exit(str(e))
+
+
+def parse_time(value: str) -> datetime.datetime:
+    return datetime.datetime.fromisoformat(value)
+
+
+def parse_match(info: dict[str, Any]) -> Match:
+    from sr.comp.match_period import Match, MatchType
+    from sr.comp.types import ArenaName, MatchNumber, TLA
+
+    return Match(
+        MatchNumber(info['num']),
+        info['display_name'],
+        ArenaName(info['arena']),
+        [None if x is None else TLA(x) for x in info['teams']],
+        parse_time(info['times']['slot']['start']),
+        parse_time(info['times']['slot']['end']),
+        MatchType(info['type']),
+        use_resolved_ranking=info.get('use_resolved_ranking', False),
+    )
+
+
+def parse_matches(infos: list[dict[str, Any]]) -> list[MatchSlot]:
+    """Group the matches (as returned by the ``matches`` endpoint) into slots."""
+    from sr.comp.match_period import MatchSlot
+    from sr.comp.types import ArenaName
+
+    slots: dict[int, dict[ArenaName, Match]] = {}
+    for info in infos:
+        match = parse_match(info)
+        slots.setdefault(match.num, {})[match.arena] = match
+    return [MatchSlot(x) for x in slots.values()]
+
+
+def parse_match_slot_lengths(config: dict[str, Any]) -> dict[str, datetime.timedelta]:
+    return {
+        name: datetime.timedelta(seconds=seconds)
+        for name, seconds in config['match_slots'].items()
+    }
+
+
+def parse_periods(infos: list[dict[str, Any]], matches: list[MatchSlot]) -> list[MatchPeriod]:
+    from sr.comp.match_period import MatchPeriod, MatchType
+
+    def period_matches(numbers: dict[str, int] | None) -> list[MatchSlot]:
+        if numbers is None:
+            return []
+        return [
+            slot
+            for slot in matches
+            if numbers['first_num'] <= next(iter(slot.values())).num <= numbers['last_num']
+        ]
+
+    return [
+        MatchPeriod(
+            parse_time(info['start_time']),
+            parse_time(info['end_time']),
+            parse_time(info['max_end_time']),
+            info['description'],
+            period_matches(info['matches']),
+            MatchType(info.get('type', MatchType.league.value)),
+        )
+        for info in infos
+    ]
+
+
+def add_source_arguments(parser: argparse.ArgumentParser, compstate_help: str) -> None:
+    """
+    Add the arguments for a command to read either a compstate or the state
+    from a comp-api. Exactly one of ``compstate`` or ``from_api`` will be set.
+    """
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('compstate', nargs='?', help=compstate_help)
+    source.add_argument(
+        '--from-api',
+        metavar='URL',
+        help=(
+            "read the state from a running comp-api instead of a compstate "
+            "(for example http://compbox.srobo/comp-api)"
+        ),
+    )
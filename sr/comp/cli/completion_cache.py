@@ -0,0 +1,191 @@
+"""
+Generate the data used by the srcomp bash completion.
+
+The cache lists the commands and their options along with, when given a
+compstate, the TLAs, arena names, match numbers and other values which can be
+completed. The completion script only reads this file, so completing never
+needs to run srcomp itself.
+
+Re-run this after upgrading srcomp or when the set of teams, arenas or matches
+in the compstate changes.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shlex
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sr.comp.comp import SRComp
+    from sr.comp.raw_compstate import RawCompstate
+
+CACHE_ENV = 'SRCOMP_COMPLETION_CACHE'
+
+# Arguments whose values come from the compstate, keyed by command name and
+# argument destination, mapping to the kind of value.
+COMPSTATE_VALUES = {
+    ('for-each-match', 'arena'): 'arenas',
+    ('print-schedule', 'locations'): 'locations',
+    ('print-schedule', 'periods'): 'periods',
+    ('print-schedule', 'shepherds'): 'shepherds',
+}
+
+# Kinds of value offered when completing positional arguments (other than
+# file names).
+POSITIONAL_VALUES = ('tlas', 'arenas', 'matches')
+
+
+def default_cache_path() -> Path:
+    path = os.environ.get(CACHE_ENV)
+    if path:
+        return Path(path)
+
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_dir) / 'srcomp' / 'completion.bash'
+
+
+def compstate_values(comp: SRComp, raw_compstate: RawCompstate) -> dict[str, list[str]]:
+    return {
+        'tlas': list(comp.teams.keys()),
+        'arenas': list(comp.arenas.keys()),
+        'matches': [str(x) for x in range(len(comp.schedule.matches))],
+        'locations': list(comp.venue.locations.keys()),
+        'periods': [str(x) for x in range(len(comp.schedule.match_periods))],
+        'shepherds': [str(x) for x in range(len(raw_compstate.load_shepherds()))],
+    }
+
+
+def subparser_actions(
+    parser: argparse.ArgumentParser,
+) -> Iterable[tuple[str, list[argparse.Action]]]:
+    (subparsers,) = parser._subparsers._group_actions  # type: ignore[union-attr]
+    for name, subparser in subparsers.choices.items():  # type: ignore[union-attr]
+        yield name, subparser._actions
+
+
+def bash_words(words: Iterable[object]) -> str:
+    return shlex.quote(' '.join(str(x) for x in words))
+
+
+def bash_array(name: str, items: Mapping[str, str]) -> list[str]:
+    return [
+        f'declare -gA {name}=(',
+        *(f'\t[{shlex.quote(key)}]={value}' for key, value in items.items()),
+        ')',
+    ]
+
+
+def generate(values: Mapping[str, list[str]]) -> str:
+    from .command_line import argument_parser
+
+    parser = argument_parser()
+
+    global_options = [
+        option
+        for action in parser._actions
+        for option in action.option_strings
+    ]
+    global_options_with_values = [
+        option
+        for action in parser._actions
+        if action.nargs != 0
+        for option in action.option_strings
+    ]
+
+    commands = []
+    options = {}
+    # Keyed by the command name and the option, or just the option for global
+    # options.
+    option_values = {
+        option: bash_words(action.choices)
+        for action in parser._actions
+        if action.choices is not None and action.option_strings
+        for option in action.option_strings
+    }
+    multi_value_options = {}
+    for name, actions in subparser_actions(parser):
+        commands.append(name)
+        options[name] = bash_words(x for action in actions for x in action.option_strings)
+
+        for action in actions:
+            if action.choices is not None:
+                choices: Iterable[object] = action.choices
+            elif (name, action.dest) in COMPSTATE_VALUES:
+                choices = values.get(COMPSTATE_VALUES[name, action.dest], [])
+            else:
+                continue
+
+            for option in action.option_strings:
+                key = f'{name} {option}'
+                option_values[key] = bash_words(choices)
+                if action.nargs in ('+', '*'):
+                    multi_value_options[key] = '1'
+
+    positional_values = [
+        value
+        for kind in POSITIONAL_VALUES
+        for value in values.get(kind, [])
+    ]
+
+    lines = [
+        "# Generated by 'srcomp completion-cache'; do not edit.",
+        f'_SRCOMP_COMMANDS={bash_words(commands)}',
+        f'_SRCOMP_GLOBAL_OPTIONS={bash_words(global_options)}',
+        f'_SRCOMP_GLOBAL_OPTIONS_WITH_VALUES={bash_words(global_options_with_values)}',
+        f'_SRCOMP_POSITIONAL_VALUES={bash_words(positional_values)}',
+        *bash_array('_SRCOMP_OPTIONS', options),
+        *bash_array('_SRCOMP_OPTION_VALUES', option_values),
+        *bash_array('_SRCOMP_MULTI_VALUE_OPTIONS', multi_value_options),
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def command(settings: argparse.Namespace) -> None:
+    values = {}
+    if settings.compstate is not None:
+        from sr.comp.raw_compstate import RawCompstate
+
+        from .compstate_loader import load
+
+        values = compstate_values(
+            load(settings.compstate),
+            RawCompstate(settings.compstate, local_only=True),
+        )
+
+    output: Path = settings.output or default_cache_path()
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(generate(values))
+    print(f"Wrote completion data to {output}")
+
+
+def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
+    help_msg, *_ = __doc__.strip().splitlines()
+    parser = subparsers.add_parser(
+        'completion-cache',
+        help=help_msg,
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        'compstate',
+        nargs='?',
+        type=Path,
+        help=(
+            "competition state repository to take TLAs, arenas, match numbers "
+            "etc. from (if omitted, only commands and options are cached)"
+        ),
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        type=Path,
+        help=(
+            f"where to write the cache (default: ${CACHE_ENV} if set, otherwise "
+            "srcomp/completion.bash within $XDG_CACHE_HOME or ~/.cache)"
+        ),
+    )
+    parser.set_defaults(func=command)
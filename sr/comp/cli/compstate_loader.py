@@ -0,0 +1,446 @@
+"""
+Shared loading of compstates for commands which only read them.
+
+Commands which only need some parts of a compstate (for example just the teams
+and the league matches) can use `load_lazily`, so that the other parts (notably
+the scores) are only loaded if they are actually used.
+
+By default the parsed contents of the compstate's YAML files are cached on disk,
+keyed by the git revision of the compstate along with the stats of any files
+which differ from it, so that an unchanged compstate loads without parsing any
+YAML. The cache location can be changed via the ``SRCOMP_CACHE_DIR`` environment
+variable; setting it to an empty value disables the cache.
+
+Long-running processes (such as ``srcomp daemon``) can instead enable caching
+in memory, in which case loaded compstates are retained and reused until the
+files within them (or the git revision) change. When a compstate does change,
+only the YAML files which changed are re-parsed and only the parts of the
+compstate which depend on them are reloaded.
+"""
+
+from __future__ import annotations
+
+import atexit
+import contextlib
+import hashlib
+import os
+import pickle
+import subprocess
+import sys
+import tempfile
+from collections.abc import Callable, Iterator, Mapping
+from pathlib import Path
+from typing import Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sr.comp.comp import SRComp
+
+    from .lazy_compstate import LazySRComp
+
+Signature = tuple[str, frozenset[tuple[str, int, int]]]
+
+CACHE_DIR_ENV = 'SRCOMP_CACHE_DIR'
+DISK_CACHE_VERSION = 1
+
+_cache: dict[Path, tuple[Signature, LazySRComp]] | None = None
+
+# The functions replaced by the active `yaml_hook`s, outermost first
+_replaced_yaml_loads: list[Callable[[Path], Any]] = []
+
+# Disk caches with newly parsed files which have yet to be written out, by path
+_unsaved_disk_caches: dict[Path, DiskCache] = {}
+
+
+class InvalidCompstateError(ValueError):
+    pass
+
+
+class ParsedYamlCache:
+    """A cache of parsed YAML files, which re-parses only those which change."""
+
+    def __init__(self, load: Callable[[Path], Any]) -> None:
+        self._load = load
+        self._entries: dict[Path, tuple[tuple[int, int], bytes]] = {}
+
+    def load(self, path: Path) -> Any:
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+
+        entry = self._entries.get(path)
+        if entry is None or entry[0] != stamp:
+            entry = (stamp, pickle.dumps(self._load(path)))
+            self._entries[path] = entry
+
+        # Unpickling gives each caller its own copy of the data (which they may
+        # modify) and is much faster than a deep copy.
+        return pickle.loads(entry[1])
+
+
+@contextlib.contextmanager
+def yaml_hook(load: Callable[[Path], Any]) -> Iterator[None]:
+    """
+    Replace the function which `sr.comp` uses to load YAML files within the
+    enclosed code.
+    """
+    from sr.comp import yaml_loader
+
+    original = yaml_loader.load
+    _replaced_yaml_loads.append(original)
+    yaml_loader.load = load  # type: ignore[assignment]
+    try:
+        yield
+    finally:
+        yaml_loader.load = original
+        _replaced_yaml_loads.pop()
+
+
+def unhooked_yaml_load(path: Path) -> Any:
+    """
+    Load a YAML file as `sr.comp` would without any `yaml_hook`s in place.
+    """
+    from sr.comp import yaml_loader
+
+    load = _replaced_yaml_loads[0] if _replaced_yaml_loads else yaml_loader.load
+    return load(path)
+
+
+def signature(root: Path) -> Signature:
+    """
+    Compute a value which changes whenever the given compstate does.
+
+    This covers the stats of all the files in the compstate along with the
+    current git revision (which ``SRComp`` exposes as its ``state``).
+    """
+    revision = subprocess.check_output(
+        ('git', 'rev-parse', 'HEAD'),
+        text=True,
+        cwd=root,
+    ).strip()
+
+    stats = set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        if '.git' in dirnames:
+            dirnames.remove('.git')
+        for filename in filenames:
+            path = os.path.join(dirpath, filename)
+            stat = os.stat(path)
+            stats.add((path, stat.st_mtime_ns, stat.st_size))
+
+    return revision, frozenset(stats)
+
+
+def validate_with_changes(root: Path, contents: Mapping[Path, str]) -> int:
+    """
+    Load and validate the given compstate as it would be if the given files had
+    the given contents, without writing them. Validation errors are reported
+    to the user and their number returned.
+    """
+    from sr.comp import yaml_loader
+    from sr.comp.comp import SRComp
+    from sr.comp.validation import validate
+
+    pending = {path.resolve(): text for path, text in contents.items()}
+
+    def load(path: Path) -> Any:
+        text = pending.get(Path(path).resolve())
+        if text is None:
+            return unhooked_yaml_load(path)
+        # Parsed as `sr.comp.yaml_loader.load` would
+        return yaml_loader.yaml.load(text, Loader=yaml_loader.YAML_Loader)
+
+    with yaml_hook(load):
+        comp = SRComp(root)
+    return validate(comp)
+
+
+def changed_paths(root: Path, before: Signature, after: Signature) -> set[str]:
+    """
+    Determine the paths (relative to the root of the compstate) of the files
+    which differ between two signatures of it.
+    """
+    return {
+        Path(path).relative_to(root).as_posix()
+        for path, _, _ in before[1].symmetric_difference(after[1])
+    }
+
+
+def disk_cache_dir() -> Path | None:
+    path = os.environ.get(CACHE_DIR_ENV)
+    if path is not None:
+        return Path(path) if path else None
+
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache'
+    return Path(cache_dir) / 'srcomp' / 'compstates'
+
+
+def disk_cache_key(root: Path) -> tuple[object, ...] | None:
+    """
+    Compute the key for the on-disk cache of the given compstate: its current
+    git revision along with the stats of any files (including untracked files)
+    which differ from that revision.
+
+    Returns ``None`` if the key cannot be determined.
+    """
+    # A single call to git provides both the revision and the changed files
+    try:
+        status = subprocess.check_output(
+            (
+                'git',
+                'status',
+                '--porcelain=v2',
+                '--branch',
+                '-z',
+                '--untracked-files=all',
+            ),
+            cwd=root,
+            stderr=subprocess.DEVNULL,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    revision = None
+    changed: list[tuple[str, int | None, int | None]] = []
+    entries = iter(status.split(b'\0'))
+    for entry in entries:
+        if entry.startswith(b'# branch.oid '):
+            revision = entry.split()[-1]
+            continue
+
+        if entry.startswith(b'1 '):
+            path = entry.split(b' ', 8)[-1]
+        elif entry.startswith(b'2 '):
+            path = entry.split(b' ', 9)[-1]
+            # Renames and copies are followed by the original path
+            next(entries, None)
+        elif entry.startswith(b'u '):
+            path = entry.split(b' ', 10)[-1]
+        elif entry.startswith(b'? '):
+            path = entry[2:]
+        else:
+            continue
+
+        name = os.fsdecode(path)
+        try:
+            stat = os.stat(root / name)
+        except FileNotFoundError:
+            changed.append((name, None, None))
+        else:
+            changed.append((name, stat.st_mtime_ns, stat.st_size))
+
+    if revision is None or revision == b'(initial)':
+        return None
+
+    return (
+        DISK_CACHE_VERSION,
+        sys.version_info[:2],
+        revision,
+        tuple(sorted(changed, key=lambda x: x[0])),
+    )
+
+
+def _read_disk_cache(cache_path: Path, key: object) -> dict[str, bytes] | None:
+    try:
+        with cache_path.open('rb') as f:
+            data = pickle.load(f)
+
+        if data.get('key') != key:
+            return None
+
+        return data['files']  # type: ignore[no-any-return]
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Corrupt or from an incompatible version; it'll get replaced.
+        return None
+
+
+def _write_disk_cache(cache_path: Path, key: object, files: dict[str, bytes]) -> None:
+    # The cache is only an optimisation, so failing to write it isn't an error
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            'wb',
+            dir=cache_path.parent,
+            delete=False,
+        ) as f:
+            try:
+                pickle.dump({'key': key, 'files': files}, f, pickle.HIGHEST_PROTOCOL)
+            except BaseException:
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, cache_path)
+    except OSError:
+        pass
+
+
+class DiskCache:
+    """
+    The on-disk cache of the parsed YAML files within a compstate.
+
+    Files which aren't in the cache yet are parsed as normal and then added to
+    it, so a cache which was populated by a command which only needed some of
+    the compstate is extended by later commands which need more.
+
+    Additions are written out by `save_disk_caches`, so that a command which
+    loads several parts of a compstate only writes the cache once.
+    """
+
+    def __init__(self, root: Path, path: Path, key: object) -> None:
+        self.root = root
+        self.path = path
+        self.key = key
+        self._files = _read_disk_cache(path, key) or {}
+
+    @classmethod
+    def for_compstate(cls, root: Path) -> DiskCache | None:
+        """
+        Open the cache for the given compstate, or return ``None`` if the cache
+        is disabled or the compstate's state cannot be determined.
+        """
+        cache_dir = disk_cache_dir()
+        if cache_dir is None:
+            return None
+
+        key = disk_cache_key(root)
+        if key is None:
+            return None
+
+        # One file per compstate, which keeps the size of the cache bounded
+        name = hashlib.sha256(os.fsencode(root)).hexdigest()[:32] + '.pickle'
+        return cls(root, cache_dir / name, key)
+
+    def _relative_name(self, path: Path) -> str | None:
+        try:
+            return str(Path(path).relative_to(self.root))
+        except ValueError:
+            return None
+
+    @contextlib.contextmanager
+    def serving(self) -> Iterator[None]:
+        """
+        Serve the parsed contents of the compstate's YAML files from the cache
+        within the enclosed code, adding any which weren't already cached.
+        """
+        from sr.comp import yaml_loader
+
+        original_load = yaml_loader.load
+        parsed = {}
+
+        def load(path: Path) -> Any:
+            name = self._relative_name(path)
+            entry = None if name is None else self._files.get(name)
+            if entry is not None:
+                return pickle.loads(entry)
+
+            data = original_load(path)
+            if name is not None:
+                parsed[name] = pickle.dumps(data, pickle.HIGHEST_PROTOCOL)
+            return data
+
+        with yaml_hook(load):
+            yield
+
+        if parsed:
+            self._files.update(parsed)
+            if not _unsaved_disk_caches:
+                # In case the command doesn't run via `command_line.run`
+                atexit.register(save_disk_caches)
+            previous = _unsaved_disk_caches.get(self.path)
+            if previous is not None and previous.key == self.key:
+                self._files = {**previous._files, **self._files}
+            _unsaved_disk_caches[self.path] = self
+
+    def save(self) -> None:
+        _write_disk_cache(self.path, self.key, self._files)
+
+
+def save_disk_caches() -> None:
+    """Write out any additions to the on-disk caches of compstates."""
+    while _unsaved_disk_caches:
+        _, disk_cache = _unsaved_disk_caches.popitem()
+        disk_cache.save()
+    atexit.unregister(save_disk_caches)
+
+
+def load_lazily(path: str | Path) -> LazySRComp:
+    """
+    Load the compstate at the given path, deferring the loading of each part of
+    it until that part is used. This allows commands to avoid loading the parts
+    (notably the scores) which they don't need.
+
+    As with `load`, an existing instance is reused if caching is enabled and the
+    compstate is unchanged. Callers must not modify the returned instance.
+    """
+    from .lazy_compstate import LazySRComp
+
+    root = Path(path).resolve()
+
+    if _cache is None:
+        disk_cache = DiskCache.for_compstate(root)
+        if disk_cache is None:
+            return LazySRComp(root, parallel=True)
+        return LazySRComp(root, disk_cache.serving, parallel=True)
+
+    current = signature(root)
+    cached = _cache.get(root)
+    if cached is None:
+        # Parsing in parallel isn't used here since the in-memory cache already
+        # avoids re-parsing files which haven't changed.
+        comp = LazySRComp(root)
+    else:
+        cached_signature, comp = cached
+        if cached_signature == current:
+            return comp
+
+        # Only reload the parts of the compstate which have changed
+        comp = comp.reloaded(
+            changed_paths(root, cached_signature, current),
+            revision_changed=cached_signature[0] != current[0],
+        )
+
+    _cache[root] = (current, comp)
+    return comp
+
+
+def load(path: str | Path) -> SRComp:
+    """
+    Load the compstate at the given path, reusing an existing instance if
+    caching is enabled and the compstate is unchanged.
+
+    Callers must not modify the returned instance.
+    """
+    comp = load_lazily(path)
+    comp.load_all()
+    return comp
+
+
+def caching_enabled() -> bool:
+    return _cache is not None
+
+
+def is_stale(path: str | Path) -> bool:
+    """
+    Whether the given compstate has changed since it was cached (or isn't
+    cached at all).
+    """
+    root = Path(path).resolve()
+    cached = None if _cache is None else _cache.get(root)
+    return cached is None or cached[0] != signature(root)
+
+
+@contextlib.contextmanager
+def caching() -> Iterator[None]:
+    """
+    Enable caching of loaded compstates, and of the YAML files within them,
+    within the enclosed code.
+    """
+    global _cache
+
+    from sr.comp import yaml_loader
+
+    previous, _cache = _cache, {}
+    try:
+        with yaml_hook(ParsedYamlCache(yaml_loader.load).load):
+            yield
+    finally:
+        _cache = previous
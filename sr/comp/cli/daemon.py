@@ -0,0 +1,215 @@
+"""
+Run a long-lived process which keeps compstates loaded in memory, so that
+commands which only read the compstate can respond quickly.
+
+The daemon listens on a Unix socket. To have commands use it, set the
+``SRCOMP_DAEMON`` environment variable to the path of the socket; supported
+commands will then be run by the daemon, falling back to running locally if it
+cannot be reached.
+
+The daemon reloads a compstate whenever any of the files within it (or its git
+revision) change. Commands are run one at a time, within the daemon, from the
+working directory of the client.
+
+Global options (such as ``--profile`` and ``--timings``) concern the process
+running the command, so commands given any are always run locally.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import TypedDict
+
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+class Request(TypedDict):
+    args: list[str]
+    cwd: str
+
+
+class Response(TypedDict):
+    stdout: str
+    stderr: str
+    exit_code: int
+
+
+def default_socket_path() -> Path:
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return Path(runtime_dir) / f'srcomp-daemon-{os.getuid()}.sock'
+
+
+def run_remote(socket_path: str, args: list[str]) -> int | None:
+    """
+    Run the given command line via the daemon, returning its exit code.
+
+    Returns ``None`` if the daemon could not be used, in which case the caller
+    should run the command itself.
+    """
+    import socket
+
+    request: Request = {'args': args, 'cwd': os.getcwd()}
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            sock.sendall(json.dumps(request).encode() + b'\n')
+            with sock.makefile('rb') as f:
+                line = f.readline()
+    except OSError as e:
+        print(
+            f"Warning: unable to reach srcomp daemon at {socket_path} ({e}), "
+            "running locally.",
+            file=sys.stderr,
+        )
+        return None
+
+    if not line:
+        print(
+            "Warning: srcomp daemon did not respond, running locally.",
+            file=sys.stderr,
+        )
+        return None
+
+    response: Response = json.loads(line)
+    sys.stdout.write(response['stdout'])
+    sys.stdout.flush()
+    sys.stderr.write(response['stderr'])
+    return response['exit_code']
+
+
+def handle(line: bytes) -> Response:
+    from .command_line import find_command
+    from .in_process import run_captured, SUPPORTED_COMMANDS
+
+    try:
+        request: Request = json.loads(line)
+        args, cwd = request['args'], request['cwd']
+    except (ValueError, KeyError, TypeError) as e:
+        return {'stdout': '', 'stderr': f"Invalid request: {e}\n", 'exit_code': 2}
+
+    command = find_command(args)
+    if command not in SUPPORTED_COMMANDS:
+        return {
+            'stdout': '',
+            'stderr': "Command not supported by the srcomp daemon\n",
+            'exit_code': 2,
+        }
+
+    if args[0] != command:
+        return {
+            'stdout': '',
+            'stderr': "Global options are not supported by the srcomp daemon\n",
+            'exit_code': 2,
+        }
+
+    stdout, stderr, exit_code = run_captured(args, cwd)
+    return {'stdout': stdout, 'stderr': stderr, 'exit_code': exit_code}
+
+
+def remove_stale_socket(socket_path: Path) -> None:
+    import socket
+
+    if not socket_path.exists():
+        return
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            socket_path.unlink()
+            return
+
+    exit(f"A daemon is already listening on {socket_path}")
+
+
+def serve(compstate: Path, socket_path: Path, poll_interval: float) -> None:
+    import socketserver
+
+    from . import compstate_loader
+    from .command_line import argument_parser, DAEMON_ENV
+    from .in_process import SUPPORTED_COMMANDS
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self) -> None:
+            response = handle(self.rfile.readline())
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+
+    class Server(socketserver.UnixStreamServer):
+        def handle_timeout(self) -> None:
+            # Reload proactively, so that the next request doesn't wait for it
+            if compstate_loader.is_stale(compstate):
+                print("Compstate changed, reloading")
+                try:
+                    compstate_loader.load(compstate)
+                except Exception as e:
+                    print(f"Failed to load compstate: {e}", file=sys.stderr)
+
+    remove_stale_socket(socket_path)
+
+    with compstate_loader.caching():
+        # Warm up: import the modules for all the commands we'll run as well
+        # as loading the compstate.
+        argument_parser(SUPPORTED_COMMANDS)
+        compstate_loader.load(compstate)
+
+        with Server(str(socket_path), Handler) as server:
+            server.timeout = poll_interval
+            print(f"Listening on {socket_path}")
+            print(f"Use by setting {DAEMON_ENV}={socket_path}")
+            sys.stdout.flush()
+
+            try:
+                while True:
+                    server.handle_request()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                socket_path.unlink(missing_ok=True)
+
+
+def command(settings: argparse.Namespace) -> None:
+    socket_path = settings.socket or default_socket_path()
+    serve(settings.compstate, socket_path, settings.poll_interval)
+
+
+def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
+    help_msg = (
+        "Keep a compstate loaded in memory, serving read-only commands quickly "
+        "to clients which set SRCOMP_DAEMON."
+    )
+    parser = subparsers.add_parser(
+        'daemon',
+        help=help_msg,
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        'compstate',
+        type=Path,
+        help="competition state repository to keep loaded",
+    )
+    parser.add_argument(
+        '--socket',
+        type=Path,
+        help=(
+            "path of the Unix socket to listen on (default: "
+            "srcomp-daemon-<uid>.sock within $XDG_RUNTIME_DIR or the "
+            "temporary directory)"
+        ),
+    )
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help=(
+            "how often, in seconds, to check the compstate for changes when "
+            "idle (default: %(default)s)"
+        ),
+    )
+    parser.set_defaults(func=command)
@@ -5,6 +5,7 @@ from pathlib import Path
 
 from sr.comp.cli import add_delay, deploy
 from sr.comp.cli.interaction_utils import CLIInteractions
+from sr.comp.cli.timings import phase
 
 
 def command(args: argparse.Namespace) -> None:
@@ -17,7 +18,7 @@ def command(args: argparse.Namespace) -> None:
     deploy.require_no_changes(compstate, interactions)
 
     if not args.no_pull:
-        with interactions.make_fatal():
+        with interactions.make_fatal(), phase('git'):
             compstate.pull_fast_forward()
 
     how_long, when = add_delay.command(args)
@@ -30,7 +31,7 @@ def command(args: argparse.Namespace) -> None:
 
     deploy.require_valid(compstate, interactions)
 
-    with interactions.make_fatal(kind=RuntimeError):
+    with interactions.make_fatal(kind=RuntimeError), phase('git'):
         compstate.stage('schedule.yaml')
         msg = f"Adding {args.how_long} delay at {when}"
         compstate.commit(msg)
@@ -23,19 +23,32 @@ In any case, the user is able to continue with the deployment interactively.
 from __future__ import annotations
 
 import argparse
+import enum
 import io
 import sys
 import warnings
 from contextlib import contextmanager
-from typing import cast, Iterable, Iterator, TextIO, TYPE_CHECKING, TypeVar
+from typing import (
+    cast,
+    Iterable,
+    Iterator,
+    Sequence,
+    TextIO,
+    TYPE_CHECKING,
+    TypeVar,
+)
 
 from .interaction_utils import (
+    BufferedInteractions,
     CLIInteractions,
     FatalCommandError,
     UserInteractions,
 )
+from .timings import phase
 
 if TYPE_CHECKING:
+    import requests
+
     from sr.comp.raw_compstate import RawCompstate
 
 T = TypeVar('T')
@@ -43,6 +56,20 @@ T = TypeVar('T')
 API_TIMEOUT_SECONDS = 3
 DEPLOY_USER = 'srcomp'
 
+# When giving up on unresponsive hosts, once some hosts have responded the
+# others are waited for up to this many times as long as the slowest of those
+# did (but at least the given minimum).
+API_LATENCY_FACTOR = 5
+
+
+class HostState(enum.Enum):
+    UNAVAILABLE = "state unavailable"
+    CURRENT = "already has the requested revision"
+    BEHIND = "older state, will be updated"
+    AHEAD = "more recent state"
+    SIBLING = "sibling state"
+    UNKNOWN = "unknown state"
+
 
 class UnableToGetStateError(RuntimeError):
     pass
@@ -109,7 +136,7 @@ def deploy_to(
     from invoke.exceptions import UnexpectedExit
 
     # Make connection early to check if host is up.
-    with Connection(host, user=DEPLOY_USER) as connection:
+    with phase('deploy'), Connection(host, user=DEPLOY_USER) as connection:
         # Push the repo
         url = ref_compstate(host)
         # Make a new branch for this revision so that it's visible to
@@ -120,7 +147,7 @@ def deploy_to(
         # revision exists in the target, since this push will simply no-op
         # if it's already present
         revspec = '{0}:refs/heads/deploy-{0}'.format(revision)
-        with interactions.make_fatal(kind=RuntimeError):
+        with interactions.make_fatal(kind=RuntimeError), phase('git'):
             compstate.push(
                 url,
                 revspec,
@@ -145,13 +172,18 @@ def deploy_to(
 
 
 def get_deployments(compstate: RawCompstate, interactions: UserInteractions[T]) -> list[str]:
-    with interactions.make_fatal("Failed to get deployments from state ({0})."):
+    with phase('load'), interactions.make_fatal("Failed to get deployments from state ({0})."):
         return compstate.deployments
 
 
-def get_current_state(host: str, interactions: UserInteractions[T]) -> str:
+def get_current_state(
+    host: str,
+    interactions: UserInteractions[T],
+    session: requests.Session | None = None,
+) -> str:
     """
-    Determine the currently-deployed state on the given host via its HTTP API.
+    Determine the currently-deployed state on the given host via its HTTP API,
+    using the given ``session`` if any.
 
     In the case of errors, a suitable error will be emitted via the given
     ``interactions`` and ``UnableToGetStateError`` will be raised.
@@ -161,7 +193,8 @@ def get_current_state(host: str, interactions: UserInteractions[T]) -> str:
     url = f'http://{host}/comp-api/state'
 
     try:
-        response = requests.get(url, timeout=API_TIMEOUT_SECONDS)
+        with phase('network'):
+            response = (session or requests).get(url, timeout=API_TIMEOUT_SECONDS)
         response.raise_for_status()
         raw_state = response.json()
     except requests.RequestException as e:
@@ -177,87 +210,236 @@ def get_current_state(host: str, interactions: UserInteractions[T]) -> str:
         raise UnableToGetStateError from e
 
 
-def check_host_state(
+def adaptive_timeout(latencies: Sequence[float], minimum: float) -> float | None:
+    """
+    How long to wait for the states of hosts, given how long those which have
+    responded so far took, or ``None`` to wait for them all.
+    """
+    if not latencies:
+        return None
+    return max(minimum, API_LATENCY_FACTOR * max(latencies))
+
+
+def get_current_states(
+    hosts: Sequence[str],
+    interactions: UserInteractions[T],
+    min_timeout: float | None = None,
+) -> dict[str, str | None]:
+    """
+    Determine the currently-deployed states on the given hosts concurrently,
+    sharing a pool of connections. Hosts whose state can't be determined map to
+    ``None``, with suitable errors emitted via the given ``interactions``.
+
+    By default every host is waited for, up to the usual request timeout. If
+    ``min_timeout`` is given then hosts are instead waited for according to
+    `adaptive_timeout`, so that unreachable hosts hold things up for less time
+    when the others respond quickly.
+    """
+    import time
+    from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+    import requests
+
+    if not hosts:
+        return {}
+
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=len(hosts))
+    session.mount('http://', adapter)
+
+    latencies: list[float] = []
+
+    def probe(host: str) -> tuple[str | None, BufferedInteractions[T]]:
+        buffered = BufferedInteractions(interactions)
+        start = time.perf_counter()
+        try:
+            state = get_current_state(host, buffered, session)
+        except UnableToGetStateError:
+            return None, buffered
+        latencies.append(time.perf_counter() - start)
+        return state, buffered
+
+    start = time.perf_counter()
+    timeout: float | None = None
+    executor = ThreadPoolExecutor(len(hosts))
+    futures = {executor.submit(probe, host): host for host in hosts}
+    pending = set(futures)
+    try:
+        while pending:
+            if min_timeout is not None:
+                timeout = adaptive_timeout(latencies, min_timeout)
+            if timeout is None:
+                remaining = None
+            else:
+                remaining = timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    break
+            _, pending = wait(pending, remaining, return_when=FIRST_COMPLETED)
+    finally:
+        # Hosts which have been given up on aren't waited for here, though
+        # their requests still finish within the request timeout (which bounds
+        # how long exiting the interpreter can be held up by them). The
+        # session is only closed once nothing is using it.
+        executor.shutdown(wait=False)
+        if not pending:
+            session.close()
+
+    states: dict[str, str | None] = {}
+    for future, host in futures.items():
+        if future in pending:
+            interactions.show_info(
+                f"Timed out getting state for {host} after {timeout:.1f} seconds.",
+            )
+            states[host] = None
+            continue
+
+        states[host], buffered = future.result()
+        buffered.flush()
+
+    return states
+
+
+def classify_host_state(
     compstate: RawCompstate,
+    state: str | None,
+    revision: str,
+) -> HostState:
+    """Compare a host's state to the revision we want to deploy."""
+    if state is None:
+        return HostState.UNAVAILABLE
+    if state == revision:
+        return HostState.CURRENT
+    if compstate.has_ancestor(state):
+        return HostState.BEHIND
+    if compstate.has_descendant(state):
+        return HostState.AHEAD
+    if compstate.has_commit(state):
+        return HostState.SIBLING
+    return HostState.UNKNOWN
+
+
+def should_skip(
     host: str,
+    state: str | None,
+    host_state: HostState,
     revision: str,
-    verbose: bool,
     interactions: UserInteractions[T],
 ) -> bool:
     """
-    Compares the host state to the revision we want to deploy. If the
-    host's state isn't in the history of the deploy revision then various
-    options are presented to the user.
-
-    Returns whether or not to skip deploying to the host.
+    Determine whether to skip deploying to a host given its state, asking the
+    user where the host's history means that deploying to it may be unwise.
     """
-    SKIP = True
-    UPDATE = False
-    if verbose:
-        interactions.show_info(
-            f"Checking host state for {host} (timeout {API_TIMEOUT_SECONDS} seconds).",
-        )
-
-    try:
-        state = get_current_state(host, interactions)
-    except UnableToGetStateError:
-        if interactions.query_bool(
+    if host_state == HostState.UNAVAILABLE:
+        return not interactions.query_bool(
             f"Failed to get state for {host}, cannot advise about history. Deploy anyway?",
             True,
-        ):
-            return UPDATE
-        else:
-            return SKIP
+        )
 
-    if state == revision:
+    if host_state == HostState.CURRENT:
         interactions.show_info(f"Host {host} already has requested revision ({revision[:8]})")
-        return SKIP
+        return True
 
     # Ideal case:
-    if compstate.has_ancestor(state):
-        return UPDATE
-
-    # Check for unknown commit
-    if not compstate.has_commit(state):
-        if interactions.query_bool(
-            f"Host {host} has unknown state '{state}'. Try to fetch it?",
-            default=True,
-        ):
-            compstate.fetch('origin', quiet=True)
-            compstate.fetch(ref_compstate(host), ('HEAD', state), quiet=True)
-
-    # Old revision:
-    if compstate.has_descendant(state):
-        if interactions.query_bool(
-            f"Host {host} has more recent state '{state}'. Deploy anyway?",
-            default=True,
-        ):
-            return UPDATE
-        else:
-            return SKIP
+    if host_state == HostState.BEHIND:
+        return False
 
-    # Some other revision:
-    if compstate.has_commit(state):
-        if interactions.query_bool(
-            f"Host {host} has sibling state '{state}'. Deploy anyway?",
-            default=True,
-        ):
-            return UPDATE
-        else:
-            return SKIP
+    if host_state == HostState.AHEAD:
+        question = f"Host {host} has more recent state '{state}'. Deploy anyway?"
+    elif host_state == HostState.SIBLING:
+        question = f"Host {host} has sibling state '{state}'. Deploy anyway?"
+    else:
+        question = f"Host {host} has unknown state '{state}'. Deploy anyway?"
+
+    return not interactions.query_bool(question, default=True)
+
+
+def query_fetch_state(
+    compstate: RawCompstate,
+    host: str,
+    state: str,
+    fetch_origin: bool,
+    interactions: UserInteractions[T],
+) -> bool:
+    """
+    Offer to fetch a host's state which isn't known locally, along with
+    (optionally) the latest from origin.
 
-    # An unknown state
-    if interactions.query_bool(
-        f"Host {host} has unknown state '{state}'. Deploy anyway?",
+    Returns whether or not the state was fetched.
+    """
+    if not interactions.query_bool(
+        f"Host {host} has unknown state '{state}'. Try to fetch it?",
         default=True,
     ):
-        return UPDATE
-    else:
-        return SKIP
+        return False
+
+    if fetch_origin:
+        compstate.fetch('origin', quiet=True)
+    compstate.fetch(ref_compstate(host), ('HEAD', state), quiet=True)
+    return True
+
+
+def check_host_states(
+    compstate: RawCompstate,
+    hosts: Sequence[str],
+    revision: str,
+    verbose: bool,
+    interactions: UserInteractions[T],
+    min_timeout: float | None = None,
+) -> dict[str, bool]:
+    """
+    Compares the states of the hosts (which are all fetched at once, see
+    `get_current_states`) to the revision we want to deploy. A summary of the
+    states is shown and then, for each host whose state isn't in the history
+    of the deploy revision, various options are presented to the user.
+
+    Returns whether or not to skip deploying to each host.
+    """
+    if not hosts:
+        return {}
+
+    if verbose:
+        if min_timeout is None:
+            timeout = f"timeout {API_TIMEOUT_SECONDS} seconds"
+        else:
+            timeout = (
+                f"timeout {API_TIMEOUT_SECONDS} seconds, or at least {min_timeout} "
+                "seconds once others have responded"
+            )
+        interactions.show_info(f"Checking host states for {', '.join(hosts)} ({timeout}).")
+
+    states = get_current_states(hosts, interactions, min_timeout)
+
+    # Check for unknown commits
+    fetched_origin = False
+    for host, state in states.items():
+        if state is None or state == revision or compstate.has_commit(state):
+            continue
+
+        if query_fetch_state(compstate, host, state, not fetched_origin, interactions):
+            fetched_origin = True
+
+    host_states = {
+        host: classify_host_state(compstate, state, revision)
+        for host, state in states.items()
+    }
+
+    interactions.show_strong("Host states:")
+    for host, state in states.items():
+        interactions.show_info(
+            f"  {host}: {(state or '-')[:8]} ({host_states[host].value})",
+        )
+
+    return {
+        host: should_skip(host, state, host_states[host], revision, interactions)
+        for host, state in states.items()
+    }
 
 
 def require_no_changes(compstate: RawCompstate, interactions: UserInteractions[T]) -> None:
-    if compstate.has_changes:
+    with phase('git'):
+        has_changes = compstate.has_changes
+
+    if has_changes:
         interactions.show_error(
             "Cannot deploy state with local changes. "
             "Commit or remove them and re-run.",
@@ -271,34 +453,133 @@ def require_no_changes(compstate: RawCompstate, interactions: UserInteractions[T
 def require_valid(compstate: RawCompstate, interactions: UserInteractions[T]) -> None:
     from sr.comp.validation import validate
 
-    with interactions.make_fatal("State cannot be loaded: {0}"):
+    with interactions.make_fatal("State cannot be loaded: {0}"), phase('load'):
         comp = compstate.load()
 
-    num_errors = validate(comp)
+    with phase('validate'):
+        num_errors = validate(comp)
     if num_errors:
         query_warn("State has validation errors (see above)", interactions)
 
 
+def deploy_failed(
+    host: str,
+    retcode: int,
+    interactions: UserInteractions[T],
+) -> FatalCommandError:
+    # TODO: work out if it makes sense to try to rollback here?
+    message = f"Failed to deploy to '{host}' (exit status: {retcode})."
+    interactions.show_error(message)
+    return FatalCommandError(message, exit_code=retcode)
+
+
+def deploy_concurrently(
+    compstate: RawCompstate,
+    hosts: Sequence[str],
+    revision: str,
+    verbose: bool,
+    jobs: int,
+    interactions: UserInteractions[T],
+) -> None:
+    """
+    Deploy to the given hosts using a pool of up to ``jobs`` threads.
+
+    The output for each host is shown together once its deployment finishes.
+    If any deployment fails (including by raising an unexpected error) then
+    those which haven't started are skipped and, once the others have
+    finished, the failure of the first host (in the order given) is raised, as
+    when deploying to each in turn.
+    """
+    import threading
+    from concurrent.futures import as_completed, ThreadPoolExecutor
+
+    failed = threading.Event()
+
+    def deploy(host: str) -> tuple[int, BufferedInteractions[T]] | None:
+        if failed.is_set():
+            return None
+
+        buffered = BufferedInteractions(interactions)
+        try:
+            retcode = deploy_to(compstate, host, revision, verbose, buffered)
+        except FatalCommandError as e:
+            retcode = e.exit_code
+        except Exception as e:
+            # Raising would lose the output of the hosts still deploying
+            buffered.show_error(f"Error deploying to {host}: {e!r}")
+            retcode = 1
+
+        if retcode != 0:
+            failed.set()
+        return retcode, buffered
+
+    interactions.show_info(f"Deploying to {len(hosts)} hosts, up to {jobs} at once.")
+
+    failures: dict[str, FatalCommandError] = {}
+    skipped: list[str] = []
+    with ThreadPoolExecutor(jobs) as executor:
+        futures = {executor.submit(deploy, host): host for host in hosts}
+        for future in as_completed(futures):
+            host = futures[future]
+            result = future.result()
+            if result is None:
+                skipped.append(host)
+                continue
+
+            retcode, buffered = result
+            buffered.flush()
+            if retcode != 0:
+                failures[host] = deploy_failed(host, retcode, interactions)
+
+    if failures:
+        for host in hosts:
+            if host in skipped:
+                interactions.show_strong(f"Skipped {host} due to failures.")
+
+        raise next(failures[host] for host in hosts if host in failures)
+
+
 def run_deployments(
     args: argparse.Namespace,
     compstate: RawCompstate,
     hosts: Iterable[str],
     interactions: UserInteractions[T],
 ) -> None:
-    revision = compstate.rev_parse('HEAD')
-    for host in hosts:
-        if not args.skip_host_check:
-            skip_host = check_host_state(compstate, host, revision, args.verbose, interactions)
-            if skip_host:
+    with phase('git'):
+        revision = compstate.rev_parse('HEAD')
+
+    hosts = list(hosts)
+    if not args.skip_host_check:
+        # Checking the hosts may need input from the user, so is done up front
+        skips = check_host_states(
+            compstate,
+            hosts,
+            revision,
+            args.verbose,
+            interactions,
+            args.host_check_timeout,
+        )
+        for host in hosts:
+            if skips[host]:
                 interactions.show_strong(f"Skipping {host}.")
-                continue
+        hosts = [host for host in hosts if not skips[host]]
+
+    if args.jobs > 1:
+        if hosts:
+            deploy_concurrently(
+                compstate,
+                hosts,
+                revision,
+                args.verbose,
+                args.jobs,
+                interactions,
+            )
 
-        retcode = deploy_to(compstate, host, revision, args.verbose, interactions)
-        if retcode != 0:
-            # TODO: work out if it makes sense to try to rollback here?
-            message = f"Failed to deploy to '{host}' (exit status: {retcode})."
-            interactions.show_error(message)
-            raise FatalCommandError(message, exit_code=retcode)
+    else:
+        for host in hosts:
+            retcode = deploy_to(compstate, host, revision, args.verbose, interactions)
+            if retcode != 0:
+                raise deploy_failed(host, retcode, interactions)
 
     interactions.show_strong_ok("Done")
 
@@ -330,6 +611,23 @@ def add_options(parser: argparse.ArgumentParser) -> None:
         action='store_true',
         help="skips checking the current state of the hosts",
     )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        metavar='N',
+        help="deploy to up to N hosts at once (default: %(default)s)",
+    )
+    parser.add_argument(
+        '--host-check-timeout',
+        type=float,
+        metavar='SECONDS',
+        help=(
+            "give up on hosts which haven't reported their state after at "
+            "least SECONDS, once others have (default: wait for every host, up "
+            f"to {API_TIMEOUT_SECONDS} seconds)"
+        ),
+    )
 
 
 def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
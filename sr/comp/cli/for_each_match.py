@@ -77,9 +77,9 @@ def replace_placeholders(match: Match, command: list[str]) -> list[str]:
 def command(args: argparse.Namespace) -> None:
     import subprocess
 
-    from sr.comp.comp import SRComp
+    from sr.comp.cli.compstate_loader import load_lazily
 
-    compstate = SRComp(args.compstate)
+    compstate = load_lazily(args.compstate)
     interactions = CLIInteractions()
 
     if args.arena:
@@ -92,9 +92,14 @@ def command(args: argparse.Namespace) -> None:
     for part in args.command:
         PlaceholderExpander.validate(part)
 
+    # Only load the knockouts (which need the scores) if they're requested
+    schedule = compstate.league_schedule
+    if max(args.matches) >= len(schedule.matches):
+        schedule = compstate.schedule
+
     try:
         for match_number in sorted(args.matches):
-            for arena, match in compstate.schedule.matches[match_number].items():
+            for arena, match in schedule.matches[match_number].items():
                 if args.arena not in (arena, None):
                     continue
 
@@ -106,9 +111,14 @@ def command(args: argparse.Namespace) -> None:
         exit(1)
 
 
-def add_options(parser: argparse.ArgumentParser) -> None:
+def parse_ranges(ranges: str) -> set[int]:
+    # Wrapper to defer the (relatively slow) import until arguments are parsed
     from sr.comp.matches import parse_ranges
 
+    return parse_ranges(ranges)
+
+
+def add_options(parser: argparse.ArgumentParser) -> None:
     parser.add_argument(
         '--arena',
         default=None,
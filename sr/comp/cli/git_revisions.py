@@ -0,0 +1,278 @@
+"""
+Loading of compstates at arbitrary git revisions, directly from git's object
+store rather than from a checkout.
+
+Objects are read through a single long-running ``git cat-file --batch`` process
+and the files of each revision are built from hard links into a store of blobs,
+so files which are unchanged between revisions are only read (and their YAML
+only parsed) once. The working tree of the repository is never touched.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import pickle
+import shutil
+import subprocess
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import Any, IO, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sr.comp.raw_compstate import RawCompstate
+
+    from .lazy_compstate import LazySRComp
+
+# From git's tree objects
+MODE_TREE = '40000'
+MODE_EXECUTABLE = '100755'
+MODE_SYMLINK = '120000'
+MODE_SUBMODULE = '160000'
+
+# (mode, object name) of each file in a tree, by path relative to its root
+TreeEntries = dict[str, tuple[str, str]]
+
+
+class CatFile:
+    """A long-running ``git cat-file --batch`` process for a repository."""
+
+    def __init__(self, repo: Path) -> None:
+        self._process = subprocess.Popen(
+            ('git', 'cat-file', '--batch'),
+            cwd=repo,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+        assert self._process.stdin is not None
+        assert self._process.stdout is not None
+        self._stdin: IO[bytes] = self._process.stdin
+        self._stdout: IO[bytes] = self._process.stdout
+
+    def read(self, name: str) -> tuple[str, str, bytes]:
+        """
+        Read the object with the given name (anything which ``git rev-parse``
+        understands), returning its full object name, type and contents.
+        """
+        if '\n' in name:
+            raise ValueError(f"Invalid object name {name!r}")
+
+        self._stdin.write(name.encode() + b'\n')
+        self._stdin.flush()
+
+        header = self._stdout.readline().decode().split()
+        if len(header) != 3:
+            raise KeyError(name)
+
+        object_name, object_type, size = header
+        contents = self._stdout.read(int(size))
+        self._stdout.read(1)  # trailing newline
+        return object_name, object_type, contents
+
+    def close(self) -> None:
+        self._stdin.close()
+        self._process.wait()
+        self._stdout.close()
+
+
+def parse_tree(contents: bytes, hash_size: int) -> Iterator[tuple[str, str, str]]:
+    """Parse the raw contents of a tree object into (mode, name, object name)."""
+    position = 0
+    while position < len(contents):
+        space = contents.index(b' ', position)
+        nul = contents.index(b'\0', space)
+        end = nul + 1 + hash_size
+        yield (
+            contents[position:space].decode(),
+            os.fsdecode(contents[space + 1:nul]),
+            contents[nul + 1:end].hex(),
+        )
+        position = end
+
+
+class RevisionLoader:
+    """
+    Loads a compstate repository's state at any of its revisions.
+
+    Each revision is built (once) as a directory of hard links to the blobs it
+    contains, along with a minimal git directory whose ``HEAD`` is that revision
+    and which shares the repository's objects. This can be used anywhere that
+    a compstate on disk can, including with `RawCompstate`.
+
+    Parsed YAML files are cached by the name of their blob, so unchanged files
+    are only parsed once regardless of how many revisions include them.
+
+    Should be closed (or used as a context manager) once finished with, which
+    removes the built revisions.
+    """
+
+    def __init__(self, repo: str | Path) -> None:
+        self.repo = Path(repo).resolve()
+        self._objects = self.repo / subprocess.check_output(
+            ('git', 'rev-parse', '--git-path', 'objects'),
+            text=True,
+            cwd=self.repo,
+        ).strip()
+
+        self._tempdir = tempfile.TemporaryDirectory(prefix='srcomp-revisions-')
+        self._blobs = Path(self._tempdir.name) / 'blobs'
+        self._blobs.mkdir()
+        self._cat_file = CatFile(self.repo)
+
+        self._trees: dict[str, TreeEntries] = {}
+        self._revisions: dict[str, Path] = {}
+        # Object names of the (YAML) files within the built revisions
+        self._blob_names: dict[Path, str] = {}
+        self._parsed: dict[str, bytes] = {}
+
+    def __enter__(self) -> RevisionLoader:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._cat_file.close()
+        self._tempdir.cleanup()
+
+    def resolve(self, revision: str) -> str:
+        """Resolve the given revision to the full name of its commit."""
+        name, _, _ = self._cat_file.read(f'{revision}^{{commit}}')
+        return name
+
+    def _tree_entries(self, tree: str) -> TreeEntries:
+        try:
+            return self._trees[tree]
+        except KeyError:
+            pass
+
+        _, _, contents = self._cat_file.read(tree)
+
+        entries: TreeEntries = {}
+        for mode, name, object_name in parse_tree(contents, len(tree) // 2):
+            if mode == MODE_TREE:
+                for path, entry in self._tree_entries(object_name).items():
+                    entries[f'{name}/{path}'] = entry
+            elif mode != MODE_SUBMODULE:
+                entries[name] = (mode, object_name)
+
+        # Unchanged directories (such as those of scores from earlier in the
+        # competition) share a tree between revisions, so only need reading once.
+        self._trees[tree] = entries
+        return entries
+
+    def _blob_path(self, mode: str, object_name: str) -> Path:
+        path = self._blobs / (f'{object_name}.x' if mode == MODE_EXECUTABLE else object_name)
+        if not path.exists():
+            _, _, contents = self._cat_file.read(object_name)
+            path.write_bytes(contents)
+            path.chmod(0o555 if mode == MODE_EXECUTABLE else 0o444)
+        return path
+
+    def checkout(self, revision: str) -> Path:
+        """
+        Build the compstate at the given revision, returning the path to it.
+        The returned directory must not be modified.
+        """
+        commit = self.resolve(revision)
+        try:
+            return self._revisions[commit]
+        except KeyError:
+            pass
+
+        _, _, contents = self._cat_file.read(commit)
+        tree = contents.split(b'\n', 1)[0].split()[1].decode()
+
+        root = Path(self._tempdir.name) / 'revisions' / commit
+        for path, (mode, object_name) in self._tree_entries(tree).items():
+            target = root / path
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if mode == MODE_SYMLINK:
+                _, _, link = self._cat_file.read(object_name)
+                target.symlink_to(os.fsdecode(link))
+                continue
+
+            os.link(self._blob_path(mode, object_name), target)
+            if target.suffix == '.yaml':
+                self._blob_names[target] = object_name
+
+        # Just enough of a repository for the revision to be reported as HEAD
+        git_dir = root / '.git'
+        (git_dir / 'refs').mkdir(parents=True)
+        (git_dir / 'objects' / 'info').mkdir(parents=True)
+        (git_dir / 'objects' / 'info' / 'alternates').write_text(
+            f'{self._objects.resolve()}\n',
+        )
+        (git_dir / 'HEAD').write_text(f'{commit}\n')
+
+        self._revisions[commit] = root
+        return root
+
+    def _load_yaml(self, path: Path) -> Any:
+        from .compstate_loader import unhooked_yaml_load
+
+        object_name = self._blob_names.get(Path(path))
+        if object_name is None:
+            return unhooked_yaml_load(path)
+
+        parsed = self._parsed.get(object_name)
+        if parsed is None:
+            parsed = pickle.dumps(unhooked_yaml_load(path))
+            self._parsed[object_name] = parsed
+
+        # Each caller gets its own copy of the data, which they may modify
+        return pickle.loads(parsed)
+
+    @contextlib.contextmanager
+    def _loading(self) -> Iterator[None]:
+        from .compstate_loader import yaml_hook
+
+        with yaml_hook(self._load_yaml):
+            yield
+
+    def load_lazily(self, revision: str) -> LazySRComp:
+        """
+        Load the compstate at the given revision, deferring the loading of each
+        part of it until that part is used.
+        """
+        from .lazy_compstate import LazySRComp
+
+        root = self.checkout(revision)
+        comp = LazySRComp(root, self._loading)
+        comp.state = root.name
+        return comp
+
+    def load(self, revision: str) -> LazySRComp:
+        """Load the compstate at the given revision."""
+        comp = self.load_lazily(revision)
+        comp.load_all()
+        return comp
+
+    def discard(self, revision: str) -> None:
+        """
+        Remove the built files of the given revision, for callers which look at
+        very many revisions. Parsed files remain cached.
+        """
+        root = self._revisions.pop(self.resolve(revision), None)
+        if root is None:
+            return
+
+        for path in [x for x in self._blob_names if root in x.parents]:
+            del self._blob_names[path]
+        shutil.rmtree(root)
+
+    def raw_compstate(self, revision: str) -> RawCompstate:
+        """
+        Get a `RawCompstate` for the compstate at the given revision. Its git
+        operations which would change the repository are not supported.
+        """
+        from sr.comp.raw_compstate import RawCompstate
+
+        return RawCompstate(self.checkout(revision), local_only=True)
@@ -24,6 +24,12 @@ result hash characters may be used to start line comments.
 Example schedules for 48, 52 or 56 teams are available  at:
 https://github.com/PeterJCLaw/srobo-schedules/tree/master/seed_schedules
 
+Alternatively a directory of schedule files (such as a checkout of the above)
+may be given, in which case the schedule which best fits the number of teams
+and arenas in the compstate (allowing for any ignored ids) will be chosen
+automatically. An index of the schedules is cached so that choosing is fast on
+later runs.
+
 Teams which are marked as having dropped out before the first match being
 scheduled will not be considered for inclusion in the schedule.
 """
@@ -34,8 +40,8 @@ import argparse
 from pathlib import Path
 from typing import Iterable
 
-from sr.comp.cli.import_schedule import loading, teams_mapping
-from sr.comp.cli.import_schedule.types import Configuration, RawMatch
+from sr.comp.cli.import_schedule import library, loading, teams_mapping
+from sr.comp.cli.import_schedule.types import Configuration, ID, RawMatch
 from sr.comp.types import MatchNumber
 
 
@@ -48,7 +54,6 @@ def get_first_match_number(existing_match_numbers: Iterable[MatchNumber]) -> Mat
 
 def get_configuration(
     compensate_path: Path,
-    team_order_strategy: teams_mapping.Strategy,
     existing_match_numbers: Iterable[MatchNumber],
 ) -> Configuration:
     first_match_number = get_first_match_number(existing_match_numbers)
@@ -65,31 +70,97 @@ def get_configuration(
         print("and try again.")
         exit(1)
 
+    return Configuration(arena_ids, team_ids, teams_per_game, first_match_number)
+
+
+def order_teams(
+    config: Configuration,
+    compensate_path: Path,
+    team_order_strategy: teams_mapping.Strategy,
+    schedule_lines: list[str],
+    ids_to_ignore: list[ID] | None,
+    time_budget: float,
+) -> Configuration:
+    schedule = None
+    if team_order_strategy == teams_mapping.Strategy.OPTIMISE:
+        _, schedule = loading.load_ids_schedule(
+            schedule_lines,
+            num_arenas=config.num_arenas,
+            teams_per_game=config.teams_per_game,
+        )
+        if ids_to_ignore:
+            schedule = [
+                [x for x in match_ids if x not in ids_to_ignore]
+                for match_ids in schedule
+            ]
+
     # Semi-randomise
     team_ids = teams_mapping.order_teams(
         compensate_path,
-        team_ids,
+        list(config.team_ids),
         team_order_strategy,
+        schedule=schedule,
+        time_budget=time_budget,
     )
 
-    return Configuration(arena_ids, team_ids, teams_per_game, first_match_number)
+    return config._replace(team_ids=team_ids)
+
+
+def choose_schedule(
+    directory: Path,
+    config: Configuration,
+    ignore_ids: list[ID] | None,
+) -> Path:
+    schedules = library.ScheduleLibrary(
+        directory,
+        library.cache_dir(),
+    ).schedules(config.teams_per_game)
+    best = library.best_fit(
+        schedules,
+        num_teams=config.num_teams,
+        num_arenas=config.num_arenas,
+        teams_per_game=config.teams_per_game,
+        ignore_ids=ignore_ids or (),
+    )
+
+    if best is None:
+        print(
+            f"No schedule in {directory} is suitable for {config.num_teams} teams "
+            f"in {config.num_arenas} arenas.",
+        )
+        exit(1)
+
+    print(
+        f"Using schedule {best.path.name} ({best.num_ids} ids, "
+        f"{best.num_matches} matches).",
+    )
+    return best.path
 
 
 def command(args: argparse.Namespace) -> None:
     from sr.comp.cli.import_schedule import core
 
-    with open(args.schedule) as sfp:
-        schedule_lines = loading.tidy(sfp.readlines())
-
     league_yaml = loading.league_yaml_path(args.compstate)
     matches: dict[MatchNumber, RawMatch] = {}
     if args.extend:
         matches = loading.load_league_yaml(league_yaml)
 
-    config = get_configuration(
+    config = get_configuration(args.compstate, matches.keys())
+
+    schedule_path: Path = args.schedule
+    if schedule_path.is_dir():
+        schedule_path = choose_schedule(schedule_path, config, args.ignore_ids)
+
+    with open(schedule_path) as sfp:
+        schedule_lines = loading.tidy(sfp.readlines())
+
+    config = order_teams(
+        config,
         args.compstate,
         args.team_order_strategy,
-        matches.keys(),
+        schedule_lines,
+        args.ignore_ids,
+        args.optimise_seconds,
     )
 
     new_matches, bad_matches = core.build_schedule(
@@ -105,12 +176,12 @@ def command(args: argparse.Namespace) -> None:
             f"{bad_match.num_teams} teams.",
         )
 
-    # Note: make sure to update in-place and then save back using the same
-    # mapping as was loaded to preserve any comments in the YAML.
-    matches.update(new_matches)
-
     # Save the matches to the file
-    loading.dump_league_yaml(matches, league_yaml)
+    if args.extend:
+        # Appends to the existing file, preserving any comments in it
+        loading.extend_league_yaml(new_matches, league_yaml)
+    else:
+        loading.dump_league_yaml(new_matches, league_yaml)
 
 
 def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
@@ -147,8 +218,26 @@ def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser
         choices=teams_mapping.Strategy,
         default=teams_mapping.Strategy.AUTO,
         type=teams_mapping.Strategy,
-        help="How to map schedule ids to TLAs",
+        help=(
+            "How to map schedule ids to TLAs. The 'optimise' strategy searches for "
+            "a mapping which keeps the first appearances of teams close to the "
+            "layout order while spreading the teams each shepherd needs to "
+            "collect across the match slots."
+        ),
+    )
+    parser.add_argument(
+        '--optimise-seconds',
+        type=float,
+        default=teams_mapping.DEFAULT_OPTIMISE_SECONDS,
+        help=(
+            "Time budget for the 'optimise' team order strategy "
+            "(default: %(default)s)"
+        ),
     )
     parser.add_argument('compstate', type=Path, help="competition state repository")
-    parser.add_argument('schedule', type=Path, help="schedule to import")
+    parser.add_argument(
+        'schedule',
+        type=Path,
+        help="schedule to import, or a directory of schedules to choose from",
+    )
     parser.set_defaults(func=command)
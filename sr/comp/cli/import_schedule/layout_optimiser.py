@@ -0,0 +1,174 @@
+"""
+Search for a mapping of schedule ids to teams which suits the venue layout.
+
+Two costs are balanced against each other:
+
+ * scrutineers visit teams in the order of their first appearances in the
+   matches, so consecutive first appearances should be near each other in the
+   layout, and
+ * shepherds need to collect the teams for each match, so the teams in any one
+   match slot should be spread across the shepherds as evenly as possible.
+
+The search starts from the plain layout ordering and uses a simple local search
+in two phases, each taking half of the time budget: first swapping the order of
+pairs of layout groups and then swapping pairs of individual teams. Any move
+which does not make things worse is kept.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from collections.abc import Callable, Collection, Mapping, Sequence
+from typing import NamedTuple, TypeVar
+
+from sr.comp.types import TLA
+
+from .types import ID
+
+T = TypeVar('T')
+
+WALKING_WEIGHT = 1
+SHEPHERDING_WEIGHT = 2
+
+# Stop early if this many consecutive moves fail to find an improvement.
+MAX_STALE_MOVES = 20000
+
+
+class Cost(NamedTuple):
+    walking: int
+    """
+    Total distance (in layout groups) between consecutive first appearances.
+    """
+
+    shepherding: int
+    """
+    Total number of teams, summed across match slots, which a shepherd needs to
+    collect beyond their fair share of that slot.
+    """
+
+    @property
+    def total(self) -> int:
+        return WALKING_WEIGHT * self.walking + SHEPHERDING_WEIGHT * self.shepherding
+
+
+class LayoutCostModel:
+    def __init__(
+        self,
+        groups: Sequence[Sequence[TLA]],
+        shepherds: Mapping[TLA, int],
+        schedule: Sequence[Collection[ID]],
+        ids: Sequence[ID],
+    ) -> None:
+        """
+        :param groups: The teams in each layout group, in layout order.
+        :param shepherds: A mapping of teams to the shepherd which collects
+            them. Teams without a shepherd are ignored for the shepherding cost.
+        :param schedule: The ids in each match slot.
+        :param ids: The ids in the order in which they first appear.
+        """
+        self.group_of = {
+            tla: group_num
+            for group_num, teams in enumerate(groups)
+            for tla in teams
+        }
+        self.shepherds = shepherds
+        self.num_shepherds = len(set(shepherds.values()))
+        positions = {id_: idx for idx, id_ in enumerate(ids)}
+        self.slot_positions = [
+            [positions[id_] for id_ in match_ids if id_ in positions]
+            for match_ids in schedule
+        ]
+
+    def cost(self, ordered_teams: Sequence[TLA]) -> Cost:
+        group_of = self.group_of
+        walking = sum(
+            abs(group_of[a] - group_of[b])
+            for a, b in zip(ordered_teams, ordered_teams[1:])
+        )
+
+        shepherding = 0
+        if self.num_shepherds:
+            for positions in self.slot_positions:
+                counts: dict[int, int] = {}
+                for position in positions:
+                    if position >= len(ordered_teams):
+                        continue
+                    shepherd = self.shepherds.get(ordered_teams[position])
+                    if shepherd is not None:
+                        counts[shepherd] = counts.get(shepherd, 0) + 1
+
+                fair_share = -(-sum(counts.values()) // self.num_shepherds)
+                shepherding += sum(max(0, x - fair_share) for x in counts.values())
+
+        return Cost(walking, shepherding)
+
+
+def _swap_two(rng: random.Random, items: list[T]) -> list[T]:
+    new_items = list(items)
+    i, j = rng.sample(range(len(new_items)), 2)
+    new_items[i], new_items[j] = new_items[j], new_items[i]
+    return new_items
+
+
+def _local_search(
+    rng: random.Random,
+    cost: Callable[[list[T]], Cost],
+    start: list[T],
+    deadline: float,
+) -> tuple[list[T], Cost]:
+    current, current_cost = start, cost(start)
+    best, best_cost = current, current_cost
+
+    if len(start) < 2:
+        return best, best_cost
+
+    stale_moves = 0
+    while time.monotonic() < deadline and stale_moves < MAX_STALE_MOVES:
+        candidate = _swap_two(rng, current)
+        candidate_cost = cost(candidate)
+
+        # Accept sideways moves too, to help escape plateaus
+        if candidate_cost.total <= current_cost.total:
+            current, current_cost = candidate, candidate_cost
+
+        if current_cost.total < best_cost.total:
+            best, best_cost = current, current_cost
+            stale_moves = 0
+        else:
+            stale_moves += 1
+
+    return best, best_cost
+
+
+def optimise(
+    groups: Sequence[Sequence[TLA]],
+    model: LayoutCostModel,
+    time_budget: float,
+    seed: str,
+) -> tuple[list[TLA], Cost]:
+    """
+    Search for the ordering of the teams which minimises the cost, within the
+    given time budget (in seconds).
+
+    Returns the best ordering found and its cost.
+    """
+    rng = random.Random(seed)
+    start_time = time.monotonic()
+
+    def flatten(group_order: Sequence[int]) -> list[TLA]:
+        return [tla for idx in group_order for tla in groups[idx]]
+
+    best_group_order, _ = _local_search(
+        rng,
+        lambda x: model.cost(flatten(x)),
+        list(range(len(groups))),
+        deadline=start_time + time_budget / 2,
+    )
+
+    return _local_search(
+        rng,
+        model.cost,
+        flatten(best_group_order),
+        deadline=start_time + time_budget,
+    )
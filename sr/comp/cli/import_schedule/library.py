@@ -0,0 +1,275 @@
+"""
+Support for choosing a schedule from a directory of seed schedules.
+
+Each schedule file in the directory is summarised into an index, so that only
+new or changed files need to be parsed on subsequent runs. The index lives
+alongside the compstate cache (see `compstate_loader`) and is disabled along
+with it.
+"""
+
+from __future__ import annotations
+
+import collections
+import hashlib
+import itertools
+import json
+from pathlib import Path
+from typing import Any, Collection, Iterable, NamedTuple
+
+from . import loading
+from .types import ID
+
+INDEX_VERSION = 2
+
+# The number of spare ids which `core.get_id_subsets` is able to cope with.
+MAX_SPARE_IDS = 3
+
+
+class ScheduleMetrics(NamedTuple):
+    min_gap: int
+    """
+    The fewest number of matches between consecutive appearances of any id.
+    """
+
+    max_repeated_matchups: int
+    """The most times that any pair of ids face each other in a game."""
+
+    appearances_spread: int
+    """The difference between the most and fewest appearances of any id."""
+
+
+class ScheduleInfo(NamedTuple):
+    path: Path
+    ids: frozenset[ID]
+    num_matches: int
+    max_ids_per_match: int
+    ids_per_match: frozenset[int]
+    metrics: dict[int, ScheduleMetrics]
+    """Quality metrics, keyed by the number of teams per game."""
+
+    @property
+    def num_ids(self) -> int:
+        return len(self.ids)
+
+    def supports(self, num_arenas: int, teams_per_game: int) -> bool:
+        if self.max_ids_per_match > num_arenas * teams_per_game:
+            return False
+        return all(x % teams_per_game == 0 for x in self.ids_per_match)
+
+
+def load_schedule(path: Path) -> list[list[ID]]:
+    with path.open() as f:
+        lines = loading.tidy(f.readlines())
+    return [
+        loading.parse_match_ids(match_num, line)
+        for match_num, line in enumerate(lines)
+    ]
+
+
+def compute_metrics(schedule: list[list[ID]], teams_per_game: int) -> ScheduleMetrics:
+    appearances: collections.defaultdict[ID, list[int]] = collections.defaultdict(list)
+    matchups: collections.Counter[tuple[ID, ID]] = collections.Counter()
+
+    for match_num, match_ids in enumerate(schedule):
+        for id_ in match_ids:
+            appearances[id_].append(match_num)
+
+        for start in range(0, len(match_ids), teams_per_game):
+            game = sorted(match_ids[start:start + teams_per_game])
+            matchups.update(itertools.combinations(game, 2))
+
+    gaps = [
+        later - earlier - 1
+        for match_nums in appearances.values()
+        for earlier, later in zip(match_nums, match_nums[1:])
+    ]
+    counts = [len(x) for x in appearances.values()]
+
+    return ScheduleMetrics(
+        min_gap=min(gaps, default=len(schedule)),
+        max_repeated_matchups=max(matchups.values(), default=0),
+        appearances_spread=max(counts, default=0) - min(counts, default=0),
+    )
+
+
+def summarise(schedule: list[list[ID]]) -> dict[str, Any]:
+    """Summarise a schedule for the index."""
+    return {
+        'ids': sorted(set(itertools.chain.from_iterable(schedule))),
+        'num_matches': len(schedule),
+        'ids_per_match': sorted({len(x) for x in schedule}),
+    }
+
+
+def cache_dir() -> Path | None:
+    from ..compstate_loader import disk_cache_dir
+
+    path = disk_cache_dir()
+    return None if path is None else path / 'schedule-index'
+
+
+class ScheduleLibrary:
+    """
+    A directory of seed schedules, along with a persistent index of their
+    properties stored in the given cache directory (if any).
+    """
+
+    def __init__(self, directory: Path, cache_path: Path | None = None) -> None:
+        self.directory = directory
+        self.index_path: Path | None = None
+        if cache_path is not None:
+            key = hashlib.sha256(str(directory.resolve()).encode()).hexdigest()
+            self.index_path = cache_path / f'{key}.json'
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._dirty = False
+
+    def _read_index(self) -> None:
+        if self.index_path is None:
+            return
+
+        try:
+            raw = json.loads(self.index_path.read_text())
+        except (OSError, ValueError):
+            return
+
+        if raw.get('version') == INDEX_VERSION:
+            self._entries = raw['schedules']
+
+    def _write_index(self) -> None:
+        if not self._dirty or self.index_path is None:
+            return
+
+        data = {'version': INDEX_VERSION, 'schedules': self._entries}
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            self.index_path.write_text(json.dumps(data, indent=2, sort_keys=True) + '\n')
+        except OSError as e:
+            # The index is only a cache, so failing to save it isn't fatal.
+            print(f"Warning: unable to save schedule index ({e}).")
+
+        self._dirty = False
+
+    def _schedule_paths(self) -> Iterable[Path]:
+        for path in sorted(self.directory.iterdir()):
+            if path.is_file() and not path.name.startswith('.'):
+                yield path
+
+    def _entry(self, path: Path) -> dict[str, Any]:
+        stat = path.stat()
+        stamp = [stat.st_mtime_ns, stat.st_size]
+
+        entry = self._entries.get(path.name)
+        if entry is not None and entry['stamp'] == stamp:
+            return entry
+
+        try:
+            summary = summarise(load_schedule(path))
+        except ValueError as e:
+            entry = {'stamp': stamp, 'error': str(e)}
+        else:
+            entry = {'stamp': stamp, **summary, 'metrics': {}}
+
+        self._entries[path.name] = entry
+        self._dirty = True
+        return entry
+
+    def _metrics(
+        self,
+        path: Path,
+        entry: dict[str, Any],
+        teams_per_game: int,
+    ) -> ScheduleMetrics:
+        key = str(teams_per_game)
+        raw_metrics = entry['metrics'].get(key)
+        if raw_metrics is None:
+            metrics = compute_metrics(load_schedule(path), teams_per_game)
+            entry['metrics'][key] = metrics._asdict()
+            self._dirty = True
+            return metrics
+
+        return ScheduleMetrics(**raw_metrics)
+
+    def schedules(self, teams_per_game: int) -> list[ScheduleInfo]:
+        """
+        Summarise all the valid schedules in the library, updating the index
+        for any which have changed since it was last saved.
+        """
+        self._read_index()
+
+        infos = []
+        known_names = set()
+        for path in self._schedule_paths():
+            known_names.add(path.name)
+            entry = self._entry(path)
+            if 'error' in entry:
+                continue
+
+            infos.append(ScheduleInfo(
+                path=path,
+                ids=frozenset(ID(x) for x in entry['ids']),
+                num_matches=entry['num_matches'],
+                max_ids_per_match=max(entry['ids_per_match'], default=0),
+                ids_per_match=frozenset(entry['ids_per_match']),
+                metrics={teams_per_game: self._metrics(path, entry, teams_per_game)},
+            ))
+
+        for name in self._entries.keys() - known_names:
+            del self._entries[name]
+            self._dirty = True
+
+        self._write_index()
+        return infos
+
+
+def num_spare_ids(info: ScheduleInfo, num_teams: int, ignore_ids: Collection[ID]) -> int:
+    return len(info.ids - set(ignore_ids)) - num_teams
+
+
+def rank_key(
+    info: ScheduleInfo,
+    num_teams: int,
+    teams_per_game: int,
+    ignore_ids: Collection[ID] = (),
+) -> tuple[Any, ...]:
+    metrics = info.metrics[teams_per_game]
+    return (
+        # Fewer spare places means fewer empty places in matches
+        num_spare_ids(info, num_teams, ignore_ids),
+        # Teams should get as long a break as possible between matches
+        -metrics.min_gap,
+        # Teams should face as many different opponents as possible
+        metrics.max_repeated_matchups,
+        # Teams should all have the same number of matches
+        metrics.appearances_spread,
+        info.path.name,
+    )
+
+
+def best_fit(
+    schedules: Iterable[ScheduleInfo],
+    num_teams: int,
+    num_arenas: int,
+    teams_per_game: int,
+    ignore_ids: Collection[ID] = (),
+) -> ScheduleInfo | None:
+    """
+    Select the schedule which best fits the given competition, if any do.
+
+    Any ids which are to be ignored must be present in the schedule and don't
+    count towards the places available for teams.
+    """
+    candidates = [
+        info
+        for info in schedules
+        if info.supports(num_arenas, teams_per_game)
+        if info.ids.issuperset(ignore_ids)
+        if 0 <= num_spare_ids(info, num_teams, ignore_ids) <= MAX_SPARE_IDS
+    ]
+
+    if not candidates:
+        return None
+
+    return min(
+        candidates,
+        key=lambda x: rank_key(x, num_teams, teams_per_game, ignore_ids),
+    )
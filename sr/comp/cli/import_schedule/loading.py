@@ -41,13 +41,22 @@ def dump_league_yaml(
     yaml.dump({'matches': matches}, dest=file_path)
 
 
+def extend_league_yaml(
+    matches: dict[MatchNumber, RawMatch],
+    file_path: Path,
+) -> None:
+    from sr.comp.cli import yaml_round_trip as yaml
+
+    yaml.append(file_path, 'matches', matches)
+
+
 def load_league_yaml(league_yaml: Path) -> dict[MatchNumber, RawMatch]:
     from sr.comp.cli import yaml_round_trip as yaml
 
-    with open(league_yaml) as lfp:
-        data = yaml.load(lfp)
-        matches: dict[MatchNumber, RawMatch] = data['matches']
-        return matches
+    # Changes are written back using `extend_league_yaml`, so this only reads
+    data = yaml.fast_load(league_yaml)
+    matches: dict[MatchNumber, RawMatch] = data['matches']
+    return matches
 
 
 def load_teams_areans(
@@ -69,6 +78,19 @@ def load_teams_areans(
     return team_ids, arena_ids, num_corners
 
 
+def parse_match_ids(match_num: int, match: str) -> list[ID]:
+    match_ids = parse_ids(match, sep='|')
+
+    uniq_match_ids = set(match_ids)
+    if len(match_ids) != len(uniq_match_ids):
+        raise ValueError(
+            f"Match {match_num} contains the same id more than once. "
+            f"(got ids {match_ids!r})",
+        )
+
+    return match_ids
+
+
 def load_ids_schedule(
     schedule_lines: Iterable[str],
     num_arenas: int,
@@ -87,14 +109,7 @@ def load_ids_schedule(
     schedule: list[list[ID]] = []
 
     for match_num, match in enumerate(schedule_lines):
-        match_ids = parse_ids(match, sep='|')
-
-        uniq_match_ids = set(match_ids)
-        if len(match_ids) != len(uniq_match_ids):
-            raise ValueError(
-                f"Match {match_num} contains the same id more than once. "
-                f"(got ids {match_ids!r})",
-            )
+        match_ids = parse_match_ids(match_num, match)
 
         if len(match_ids) > max_teams_per_slot:
             raise ValueError(
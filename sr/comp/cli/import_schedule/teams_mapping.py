@@ -3,13 +3,19 @@ from __future__ import annotations
 import collections
 import enum
 from pathlib import Path
+from typing import Sequence
 
 from sr.comp.types import TLA
 
+from .types import ID
+
+DEFAULT_OPTIMISE_SECONDS = 5.0
+
 
 class Strategy(enum.Enum):
     AUTO = 'auto'
     LAYOUT = 'layout'
+    OPTIMISE = 'optimise'
     RANDOM = 'random'
 
     def __str__(self) -> str:
@@ -28,24 +34,20 @@ def order_teams_randomly(team_ids: list[TLA]) -> list[TLA]:
     return team_ids
 
 
-def order_teams_by_location(layout_yaml: Path, team_ids: list[TLA]) -> list[TLA]:
+def load_layout_groups(layout_yaml: Path, team_ids: list[TLA]) -> list[list[TLA]]:
     """
-    Order teams by location, such that the order of appearances in the matches
-    is equivalent to the ordering in the layout.
-
-    This is useful as it should mean that the scrutineers can move around the
-    venue easily visiting teams in the order which they first appear in matches.
+    Load the groups of teams from the layout, checking that they match the
+    given teams.
     """
     from sr.comp.cli import yaml_round_trip as yaml
     from sr.comp.validation import join_and
 
     with open(layout_yaml) as lf:
-        layout_raw = yaml.load(lf)
+        layout_raw = yaml.fast_load(lf)
         layout = layout_raw['teams']
 
-    ordered_teams = []
-    for group in layout:
-        ordered_teams += group['teams']
+    groups = [list(group['teams']) for group in layout]
+    ordered_teams = [tla for group in groups for tla in group]
 
     layout_teams = set(ordered_teams)
 
@@ -61,8 +63,84 @@ def order_teams_by_location(layout_yaml: Path, team_ids: list[TLA]) -> list[TLA]
     extra = layout_teams - all_teams
     if extra:
         print(f"WARNING: Extra teams in layout will be ignored: {join_and(extra)}.")
-        for tla in extra:
-            ordered_teams.remove(tla)
+        for group in groups:
+            group[:] = [x for x in group if x not in extra]
+
+    return groups
+
+
+def load_shepherds(shepherding_yaml: Path, layout_yaml: Path) -> dict[TLA, int]:
+    """
+    Load a mapping of teams to the (index of the) shepherd who collects them.
+    """
+    from sr.comp.cli import yaml_round_trip as yaml
+
+    with open(layout_yaml) as lf:
+        regions = {x['name']: x['teams'] for x in yaml.fast_load(lf)['teams']}
+
+    with open(shepherding_yaml) as sf:
+        shepherds = yaml.fast_load(sf)['shepherds']
+
+    return {
+        tla: shepherd_num
+        for shepherd_num, shepherd in enumerate(shepherds)
+        for region in shepherd.get('regions', ())
+        for tla in regions.get(region, ())
+    }
+
+
+def order_teams_by_location(layout_yaml: Path, team_ids: list[TLA]) -> list[TLA]:
+    """
+    Order teams by location, such that the order of appearances in the matches
+    is equivalent to the ordering in the layout.
+
+    This is useful as it should mean that the scrutineers can move around the
+    venue easily visiting teams in the order which they first appear in matches.
+    """
+    groups = load_layout_groups(layout_yaml, team_ids)
+    return [tla for group in groups for tla in group]
+
+
+def order_teams_optimised(
+    compstate_path: Path,
+    team_ids: list[TLA],
+    schedule: Sequence[Sequence[ID]],
+    time_budget: float,
+) -> list[TLA]:
+    """
+    Order teams by searching for an ordering which keeps the scrutineers'
+    walking order close to the layout while also spreading the load on the
+    shepherds in each match slot.
+    """
+    from . import layout_optimiser
+
+    layout_yaml = compstate_path / 'layout.yaml'
+    shepherding_yaml = compstate_path / 'shepherding.yaml'
+
+    groups = load_layout_groups(layout_yaml, team_ids)
+
+    shepherds = {}
+    if shepherding_yaml.exists():
+        shepherds = load_shepherds(shepherding_yaml, layout_yaml)
+
+    ids: list[ID] = []
+    for match_ids in schedule:
+        ids += [x for x in match_ids if x not in ids]
+
+    model = layout_optimiser.LayoutCostModel(groups, shepherds, schedule, ids)
+    initial_cost = model.cost([tla for group in groups for tla in group])
+
+    ordered_teams, cost = layout_optimiser.optimise(
+        groups,
+        model,
+        time_budget,
+        seed="".join(sorted(team_ids)),
+    )
+
+    print(
+        f"Optimised team order: walking cost {initial_cost.walking} -> {cost.walking}, "
+        f"shepherding cost {initial_cost.shepherding} -> {cost.shepherding}.",
+    )
 
     return ordered_teams
 
@@ -71,15 +149,30 @@ def order_teams(
     compstate_path: Path,
     team_ids: list[TLA],
     strategy: Strategy,
+    schedule: Sequence[Sequence[ID]] | None = None,
+    time_budget: float = DEFAULT_OPTIMISE_SECONDS,
 ) -> list[TLA]:
     """
     Order teams either randomly or, if there's a layout available, by location.
+
+    The optimising strategy additionally needs the schedule of ids which the
+    teams are going to be mapped onto.
     """
     layout_yaml = compstate_path / 'layout.yaml'
 
     if strategy == Strategy.RANDOM:
         return order_teams_randomly(team_ids)
 
+    elif strategy == Strategy.OPTIMISE:
+        if not layout_yaml.exists():
+            raise ValueError(
+                "Unable to optimise team order when there is no layout file",
+            )
+        if schedule is None:
+            raise ValueError("Unable to optimise team order without a schedule")
+
+        return order_teams_optimised(compstate_path, team_ids, schedule, time_budget)
+
     elif strategy == Strategy.LAYOUT:
         if not layout_yaml.exists():
             raise ValueError(
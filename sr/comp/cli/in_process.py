@@ -0,0 +1,83 @@
+"""
+Support for running commands within an existing process, typically one which
+already has compstates loaded (see ``compstate_loader.caching``).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import os
+import sys
+import traceback
+from typing import NamedTuple
+
+# Commands which only read the compstate and don't otherwise interact with the
+# user or the system, so are safe to run in-process against a shared, already
+# loaded compstate. Each takes the compstate as its first positional argument.
+SUPPORTED_COMMANDS = frozenset((
+    'awards',
+    'knocked-out-teams',
+    'match-order-teams',
+    'show-league-table',
+    'show-schedule',
+    'summary',
+    'top-match-points',
+    'validate',
+    'youtube-chapters',
+))
+
+
+def with_compstate(args: list[str], compstate: str | os.PathLike[str]) -> list[str]:
+    """
+    Insert the compstate into a command line for one of the supported commands,
+    which has been given without it.
+    """
+    name, *rest = args
+    return [name, os.fspath(compstate), *rest]
+
+
+class Captured(NamedTuple):
+    stdout: str
+    stderr: str
+    exit_code: int
+
+
+def exit_code_of(exception: SystemExit) -> int:
+    code = exception.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    # Mirror the interpreter's handling of other values
+    print(code, file=sys.stderr)
+    return 1
+
+
+def run_captured(args: list[str], cwd: str | None = None) -> Captured:
+    """
+    Run the given command line within this process, optionally from the given
+    working directory, capturing its output and exit code.
+    """
+    from .command_line import run
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exit_code = 0
+
+    previous_cwd = os.getcwd()
+    try:
+        if cwd is not None:
+            os.chdir(cwd)
+
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                run(args)
+            except SystemExit as e:
+                exit_code = exit_code_of(e)
+            except Exception:
+                traceback.print_exc()
+                exit_code = 1
+    finally:
+        os.chdir(previous_cwd)
+
+    return Captured(stdout.getvalue(), stderr.getvalue(), exit_code)
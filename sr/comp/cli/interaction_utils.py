@@ -149,3 +149,41 @@ class CLIInteractions(UserInteractions[str]):
 
     def get_input(self, message: str) -> str:
         return input(message)
+
+
+class BufferedInteractions(UserInteractions[T]):
+    """
+    Interactions which hold on to the messages shown via them until `flush`ed
+    to the given interactions, so that the output of work done concurrently
+    can be shown together. Input is not supported.
+    """
+
+    def __init__(self, target: UserInteractions[T]) -> None:
+        self.target = target
+        self.messages: list[T] = []
+
+    def format_buffer(self, buffer: io.StringIO) -> T:
+        return self.target.format_buffer(buffer)
+
+    def format_info(self, message: str) -> T:
+        return self.target.format_info(message)
+
+    def format_strong(self, message: str) -> T:
+        return self.target.format_strong(message)
+
+    def format_strong_ok(self, message: str) -> T:
+        return self.target.format_strong_ok(message)
+
+    def format_error(self, message: str) -> T:
+        return self.target.format_error(message)
+
+    def message(self, message: T) -> None:
+        self.messages.append(message)
+
+    def get_input(self, message: T) -> str:
+        raise RuntimeError("Input is not available when output is buffered")
+
+    def flush(self) -> None:
+        for message in self.messages:
+            self.target.message(message)
+        self.messages.clear()
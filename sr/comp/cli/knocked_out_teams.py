@@ -14,7 +14,6 @@ from collections.abc import (
 from pathlib import Path
 from typing import Protocol
 
-from sr.comp.comp import SRComp
 from sr.comp.knockout_scheduler import KnockoutRound, UNKNOWABLE_TEAM
 from sr.comp.match_period import Match
 from sr.comp.teams import Team
@@ -167,7 +166,9 @@ def teams_and_rounds(
 
 
 def command(settings: argparse.Namespace) -> None:
-    comp = SRComp(settings.compstate)
+    from sr.comp.cli.compstate_loader import load
+
+    comp = load(settings.compstate)
 
     def has_scores(match: Match) -> bool:
         return comp.scores.get_scores(match) is not None
@@ -211,6 +212,8 @@ def command(settings: argparse.Namespace) -> None:
 
 
 def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
+    from sr.comp.cli import watching
+
     help_msg = "Show the teams knocked out of each knockout round."
     parser = subparsers.add_parser(
         'knocked-out-teams',
@@ -228,4 +231,5 @@ def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser
         action='store_true',
         default=False,
     )
-    parser.set_defaults(func=command)
+    watching.add_arguments(parser)
+    parser.set_defaults(func=watching.watchable(command))
@@ -0,0 +1,249 @@
+"""
+A compstate whose parts are only loaded as they are first used.
+
+Loading the scores (and everything which depends on them: the knockouts and the
+awards) dominates the time taken to load a compstate during an event, so
+commands which only need the teams, arenas or league matches can avoid doing so
+entirely.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import datetime
+from collections.abc import Callable, Collection
+from pathlib import Path
+from subprocess import check_output
+from typing import Any, ContextManager
+
+from sr.comp import yaml_loader
+from sr.comp.arenas import (
+    Arena,
+    Corner,
+    CornerNumber,
+    load_arenas,
+    load_corners,
+)
+from sr.comp.comp import load_ranker, load_scorer, SRComp
+from sr.comp.matches import MatchSchedule
+from sr.comp.scores import Scores
+from sr.comp.teams import load_teams, Team
+from sr.comp.types import ArenaName, TLA
+from sr.comp.venue import Venue
+from sr.comp.winners import compute_awards, Winners
+
+from . import parallel_yaml
+
+# The files (or directories) within the compstate from which each part is
+# loaded, along with the other parts it's derived from. Parts are listed after
+# those they depend on. The ``state`` depends only on the git revision.
+SOURCES: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    'teams': (('teams.yaml',), ()),
+    'arenas': (('arenas.yaml',), ()),
+    'corners': (('arenas.yaml',), ()),
+    'num_teams_per_arena': ((), ('corners',)),
+    'scores': (
+        ('scoring', 'league', 'knockout', 'tiebreaker', 'external'),
+        ('teams', 'num_teams_per_arena'),
+    ),
+    'league_schedule': (
+        ('schedule.yaml', 'league.yaml'),
+        ('teams', 'num_teams_per_arena'),
+    ),
+    'schedule': (
+        ('schedule.yaml', 'league.yaml', 'knockout.yaml'),
+        ('scores', 'arenas', 'num_teams_per_arena', 'teams'),
+    ),
+    'timezone': ((), ('schedule',)),
+    'awards': (('awards.yaml',), ('scores', 'schedule', 'teams')),
+    'venue': (('layout.yaml', 'shepherding.yaml'), ('teams', 'schedule')),
+}
+
+
+def affected_parts(changed_paths: Collection[str], revision_changed: bool) -> set[str]:
+    """
+    Determine which parts of a compstate are affected by changes to the given
+    paths (relative to the root of the compstate).
+    """
+    def is_changed(source: str) -> bool:
+        return any(
+            path == source or path.startswith(source + '/')
+            for path in changed_paths
+        )
+
+    affected = {'state'} if revision_changed else set()
+    for part, (files, parts) in SOURCES.items():
+        if any(is_changed(x) for x in files) or affected.intersection(parts):
+            affected.add(part)
+    return affected
+
+
+class LazySRComp(SRComp):
+    """
+    An `SRComp` which loads each part of the compstate on first access.
+
+    The given ``loading`` context manager is entered around the loading of each
+    part, allowing the YAML files to be served from a cache. If ``parallel`` is
+    set and any score file isn't served from there, all the score files are
+    parsed in parallel (see `parallel_yaml`).
+    """
+
+    league_schedule: MatchSchedule
+    """
+    The schedule of just the league matches, which unlike the full `schedule`
+    doesn't need the scores. Matches are numbered as they are in the full
+    schedule.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        loading: Callable[[], ContextManager[None]] = contextlib.nullcontext,
+        parallel: bool = False,
+    ) -> None:
+        # Deliberately doesn't call the parent constructor, which loads everything
+        self.root = Path(root)
+        self._loading = loading
+        self._parallel = parallel
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for parts which haven't been loaded yet
+        loader = getattr(type(self), f'_load_{name}', None)
+        if loader is None:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}",
+            )
+
+        value = loader(self)
+        setattr(self, name, value)
+        return value
+
+    def reloaded(self, changed_paths: Collection[str], revision_changed: bool) -> LazySRComp:
+        """
+        Create a new instance reflecting the given changes to the compstate,
+        which reuses the parts of this one which weren't affected by them.
+        """
+        affected = affected_parts(changed_paths, revision_changed)
+
+        comp = LazySRComp(self.root, self._loading, self._parallel)
+        for name, value in vars(self).items():
+            if name in SOURCES or name == 'state':
+                if name not in affected:
+                    setattr(comp, name, value)
+        return comp
+
+    def _load_state(self) -> str:
+        return check_output(
+            ('git', 'rev-parse', 'HEAD'),
+            text=True,
+            cwd=str(self.root),
+        ).strip()
+
+    def _load_teams(self) -> dict[TLA, Team]:
+        with self._loading():
+            return load_teams(self.root / 'teams.yaml')
+
+    def _load_arenas(self) -> dict[ArenaName, Arena]:
+        with self._loading():
+            return load_arenas(self.root / 'arenas.yaml')
+
+    def _load_corners(self) -> dict[CornerNumber, Corner]:
+        with self._loading():
+            return load_corners(self.root / 'arenas.yaml')
+
+    def _load_num_teams_per_arena(self) -> int:
+        return len(self.corners)
+
+    def _load_scores(self) -> Scores:
+        tlas = self.teams.keys()
+        num_teams_per_arena = self.num_teams_per_arena
+
+        preloading: ContextManager[None] = contextlib.nullcontext()
+        if self._parallel:
+            preloading = parallel_yaml.preloading(parallel_yaml.score_files(self.root))
+
+        # The preloader is entered first so that it sits beneath any cache
+        # provided by `_loading`, meaning only files which aren't cached get
+        # parsed.
+        with preloading, self._loading():
+            return Scores.load(
+                self.root,
+                tlas,
+                load_scorer(self.root),
+                load_ranker(self.root),
+                num_teams_per_arena,
+            )
+
+    def _load_league_schedule(self) -> MatchSchedule:
+        all_teams = self.teams
+        num_teams_per_arena = self.num_teams_per_arena
+
+        with self._loading():
+            config = yaml_loader.load(self.root / 'schedule.yaml')
+            league = yaml_loader.load(self.root / 'league.yaml')['matches']
+            return MatchSchedule(config, league, all_teams, num_teams_per_arena)
+
+    def _load_schedule(self) -> MatchSchedule:
+        all_scores = self.scores
+        all_arenas = self.arenas
+        num_teams_per_arena = self.num_teams_per_arena
+        all_teams = self.teams
+
+        with self._loading():
+            return MatchSchedule.create(
+                self.root / 'schedule.yaml',
+                self.root / 'league.yaml',
+                self.root / 'knockout.yaml',
+                all_scores,
+                all_arenas,
+                num_teams_per_arena,
+                all_teams,
+            )
+
+    def _load_timezone(self) -> datetime.tzinfo:
+        return self.schedule.timezone
+
+    def _load_awards(self) -> Winners:
+        all_scores = self.scores
+        final_match = self.schedule.final_match
+        all_teams = self.teams
+
+        with self._loading():
+            return compute_awards(
+                all_scores,
+                final_match,
+                all_teams,
+                self.root / 'awards.yaml',
+            )
+
+    def _load_venue(self) -> Venue:
+        tlas = self.teams.keys()
+        staging_times = self.schedule.staging_times
+
+        with self._loading():
+            result = Venue(
+                tlas,
+                self.root / 'layout.yaml',
+                self.root / 'shepherding.yaml',
+            )
+
+        result.check_staging_times(staging_times)
+        return result
+
+    def load_all(self) -> None:
+        """
+        Load every part of the compstate, in the same order as `SRComp` does, so
+        that any problems with it are raised now rather than on later access.
+        """
+        for name in (
+            'state',
+            'teams',
+            'arenas',
+            'corners',
+            'scores',
+            'schedule',
+            'timezone',
+            'awards',
+            'venue',
+        ):
+            getattr(self, name)
@@ -4,9 +4,9 @@ import argparse
 
 
 def command(args: argparse.Namespace) -> None:
-    from sr.comp.comp import SRComp
+    from sr.comp.cli.compstate_loader import load
 
-    comp = SRComp(args.compstate)
+    comp = load(args.compstate)
     matches = comp.schedule.matches
 
     remaining_teams = dict(comp.teams)
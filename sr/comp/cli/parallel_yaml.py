@@ -0,0 +1,136 @@
+"""
+Parsing of many YAML files in parallel, across several processes.
+
+Parsing YAML is CPU bound, so during an event (when there are hundreds of score
+files) loading a compstate is limited by how fast a single core can parse them.
+Instead the score files can be parsed by a pool of processes once the first of
+them is needed, with the results handed to `sr.comp` as it asks for each file.
+
+This is only done for one-off loads (see `compstate_loader.load_lazily`); the
+in-memory cache used by long-running processes already avoids re-parsing files
+which haven't changed.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+from collections.abc import Callable, Collection, Iterator
+from pathlib import Path
+from typing import Any
+
+# Below this many files the cost of starting the worker processes outweighs the
+# time saved by parsing in parallel.
+PARALLEL_THRESHOLD = 64
+
+
+def available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def score_files(root: Path) -> list[Path]:
+    """The score files which `sr.comp` reads when loading the given compstate."""
+    from sr.comp.scores import results_finder
+
+    paths = [
+        path
+        for kind in ('league', 'knockout', 'tiebreaker')
+        for path in results_finder(root / kind)
+    ]
+    paths.extend((root / 'external').glob('*.yaml'))
+    return paths
+
+
+def _parse(path: Path) -> tuple[bool, Any]:
+    # The worker processes may be forked from one with hooks in place, which
+    # are intended only for the parent process.
+    from .compstate_loader import unhooked_yaml_load
+
+    try:
+        return True, unhooked_yaml_load(path)
+    except Exception:
+        # Files which fail to parse here are parsed again in the main process,
+        # so that any errors are raised from the usual place.
+        return False, None
+
+
+def parse_all(paths: Collection[Path], workers: int) -> dict[Path, Any]:
+    """
+    Parse the given files using a pool of worker processes, returning the
+    contents of those which were parsed successfully.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    chunksize = max(1, len(paths) // (workers * 4))
+    try:
+        with ProcessPoolExecutor(workers) as executor:
+            results = list(executor.map(_parse, paths, chunksize=chunksize))
+    except (OSError, BrokenProcessPool):
+        # Fall back to parsing each file as it's needed
+        return {}
+
+    return {
+        path: data
+        for path, (parsed, data) in zip(paths, results)
+        if parsed
+    }
+
+
+class ParallelPreloader:
+    """
+    Serves a known set of YAML files, which are all parsed in parallel the
+    first time any of them is requested; that request waits until they've all
+    been parsed. Other files are passed through to the given ``load`` function.
+
+    Parsing is deferred until the first request so that, when this is used
+    beneath the on-disk cache, nothing is parsed if that cache serves all of the
+    files. Once any of them isn't served from there, all of them are parsed.
+    """
+
+    def __init__(
+        self,
+        paths: Collection[Path],
+        load: Callable[[Path], Any],
+        workers: int,
+    ) -> None:
+        self._paths = set(paths)
+        self._load = load
+        self._workers = workers
+        self._parsed: dict[Path, Any] | None = None
+
+    def load(self, path: Path) -> Any:
+        path = Path(path)
+        if path not in self._paths:
+            return self._load(path)
+
+        if self._parsed is None:
+            self._parsed = parse_all(sorted(self._paths), self._workers)
+
+        self._paths.discard(path)
+        try:
+            return self._parsed.pop(path)
+        except KeyError:
+            return self._load(path)
+
+
+@contextlib.contextmanager
+def preloading(paths: Collection[Path]) -> Iterator[None]:
+    """
+    Parse the given YAML files in parallel, within the enclosed code, if there
+    are enough of them (and enough cores) for that to be worthwhile.
+    """
+    from sr.comp import yaml_loader
+
+    from .compstate_loader import yaml_hook
+
+    workers = min(available_cpus(), len(paths))
+    if workers < 2 or len(paths) < PARALLEL_THRESHOLD:
+        yield
+        return
+
+    with yaml_hook(ParallelPreloader(paths, yaml_loader.load, workers).load):
+        yield
@@ -11,6 +11,8 @@ from __future__ import annotations
 import argparse
 import collections
 
+from .timings import phase
+
 
 class ScheduleGenerator:
     def __init__(self, target, arenas, state):
@@ -298,32 +300,35 @@ class ScheduleGenerator:
 def command(settings: argparse.Namespace) -> None:
     import os.path
 
-    from sr.comp.comp import SRComp
+    from sr.comp.cli.compstate_loader import load
     from sr.comp.raw_compstate import RawCompstate
 
-    comp = SRComp(os.path.realpath(settings.compstate))
-    raw_comp = RawCompstate(
-        os.path.realpath(settings.compstate),
-        local_only=True,
-    )
+    with phase('load'):
+        comp = load(settings.compstate)
+        raw_comp = RawCompstate(
+            os.path.realpath(settings.compstate),
+            local_only=True,
+        )
 
-    generator = ScheduleGenerator(
-        settings.output,
-        arenas=comp.arenas,
-        state=comp.state,
-    )
+    with phase('render'):
+        generator = ScheduleGenerator(
+            settings.output,
+            arenas=comp.arenas,
+            state=comp.state,
+        )
 
-    generator.generate(
-        comp,
-        raw_comp,
-        settings.periods,
-        settings.shepherds,
-        settings.locations,
-        settings.plain,
-        settings.shepherds_combined,
-    )
+        generator.generate(
+            comp,
+            raw_comp,
+            settings.periods,
+            settings.shepherds,
+            settings.locations,
+            settings.plain,
+            settings.shepherds_combined,
+        )
 
-    generator.write()
+    with phase('write'):
+        generator.write()
 
 
 def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
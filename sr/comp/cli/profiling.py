@@ -0,0 +1,76 @@
+"""Support for profiling the running of a command."""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import sys
+from collections.abc import Iterator
+from pathlib import Path
+
+DEFAULT_TOP = 20
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--profile',
+        type=Path,
+        metavar='PATH',
+        help=(
+            "Profile the command using cProfile, writing the stats to the given "
+            "path (for use with e.g. snakeviz) and a summary of the hottest "
+            "functions to stderr."
+        ),
+    )
+    parser.add_argument(
+        '--profile-memory',
+        action='store_true',
+        help=(
+            "When profiling, also trace memory allocations and summarise the "
+            "largest allocation sites."
+        ),
+    )
+    parser.add_argument(
+        '--profile-top',
+        type=int,
+        default=DEFAULT_TOP,
+        metavar='N',
+        help="Number of entries to show in the profiling summaries (default: %(default)s).",
+    )
+
+
+@contextlib.contextmanager
+def profiled(path: Path, memory: bool = False, top: int = DEFAULT_TOP) -> Iterator[None]:
+    """
+    Profile the enclosed code, writing the stats to the given path and
+    summaries to stderr.
+    """
+    import cProfile
+    import pstats
+    import tracemalloc
+
+    if memory:
+        tracemalloc.start()
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+
+        # Capture the memory usage before doing anything else which allocates
+        snapshot = tracemalloc.take_snapshot() if memory else None
+        tracemalloc.stop()
+
+        profile.dump_stats(path)
+        print(f"Profile written to {path}", file=sys.stderr)
+
+        stats = pstats.Stats(profile, stream=sys.stderr)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+
+        if snapshot is not None:
+            print(f"Top {top} allocation sites:", file=sys.stderr)
+            for stat in snapshot.statistics('lineno')[:top]:
+                print(f"  {stat}", file=sys.stderr)
@@ -2,6 +2,12 @@ from __future__ import annotations
 
 import argparse
 from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sr.comp.cli.import_schedule import teams_mapping
+    from sr.comp.cli.import_schedule.types import RawMatch
+    from sr.comp.types import MatchNumber
 
 
 def max_possible_match_periods(sched_db):
@@ -19,24 +25,70 @@ def max_possible_match_periods(sched_db):
     return int(total_league_time.total_seconds() // match_period_length)
 
 
+def order_teams(
+    compstate_path: Path,
+    matches: dict[MatchNumber, RawMatch],
+    strategy: teams_mapping.Strategy,
+) -> dict[MatchNumber, RawMatch]:
+    """
+    Re-map the teams in the generated matches using the same ordering logic as
+    ``import-schedule``, such that the order in which teams first appear in the
+    matches follows the ordering from the given strategy.
+    """
+    from sr.comp.cli.import_schedule import teams_mapping
+    from sr.comp.cli.import_schedule.types import ID
+    from sr.comp.types import TLA
+
+    # The generated teams in each match slot, which serve as the ids onto which
+    # the teams are mapped (as the optimising strategy needs)
+    schedule: list[list[ID]] = [
+        [ID(tla) for teams in match.values() for tla in teams if tla is not None]
+        for match in matches.values()
+    ]
+
+    first_appearances: list[TLA] = []
+    for match_ids in schedule:
+        for id_ in match_ids:
+            tla = TLA(id_)
+            if tla not in first_appearances:
+                first_appearances.append(tla)
+
+    ordered_teams = teams_mapping.order_teams(
+        compstate_path,
+        sorted(first_appearances),
+        strategy,
+        schedule,
+    )
+    mapping = dict(zip(first_appearances, ordered_teams))
+
+    return {
+        num: {
+            arena: [mapping[tla] if tla is not None else None for tla in teams]
+            for arena, teams in match.items()
+        }
+        for num, match in matches.items()
+    }
+
+
 def command(args: argparse.Namespace) -> None:
     import random
     import sys
     from multiprocessing import Pool
 
     from sr.comp.cli import yaml_round_trip as yaml
+    from sr.comp.cli.import_schedule import loading
     from sr.comp.cli.league_scheduler import Scheduler
 
     with open(args.compstate / 'arenas.yaml') as f:
-        arenas_db = yaml.load(f)
+        arenas_db = yaml.fast_load(f)
         arenas = arenas_db['arenas'].keys()
         num_corners = len(arenas_db['corners'])
 
     with open(args.compstate / 'teams.yaml') as f:
-        teams = yaml.load(f)['teams'].keys()
+        teams = yaml.fast_load(f)['teams'].keys()
 
     with open(args.compstate / 'schedule.yaml') as f:
-        sched_db = yaml.load(f)
+        sched_db = yaml.fast_load(f)
         max_periods = max_possible_match_periods(sched_db)
 
     base_matches = []
@@ -57,12 +109,25 @@ def command(args: argparse.Namespace) -> None:
         base_matches=base_matches,
         enable_lcg=args.lcg,
     )
+
+    def output(data):
+        if not args.write:
+            yaml.dump({'matches': data}, dest=sys.stdout)
+            return
+
+        if args.reschedule_from == 0:
+            data = order_teams(args.compstate, data, args.team_order_strategy)
+
+        league_yaml = loading.league_yaml_path(args.compstate)
+        loading.dump_league_yaml(data, league_yaml)
+        scheduler.lprint(f"Wrote {len(data)} matches to {league_yaml}")
+
     if args.parallel > 1:
         scheduler.lprint(f'Using {args.parallel} threads')
         pool = Pool(args.parallel)
 
         def get_output(data):
-            yaml.dump({'matches': data}, dest=sys.stdout)
+            output(data)
             pool.terminate()
 
         for n in range(args.parallel):
@@ -73,11 +138,12 @@ def command(args: argparse.Namespace) -> None:
         pool.close()
         pool.join()
     else:
-        output_data = scheduler.run()
-        yaml.dump({'matches': output_data}, dest=sys.stdout)
+        output(scheduler.run())
 
 
 def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
+    from sr.comp.cli.import_schedule import teams_mapping
+
     help_msg = "Generate a schedule for a league."
     parser = subparsers.add_parser(
         'schedule-league',
@@ -129,4 +195,23 @@ def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser
         default=0,
         help="first match to reschedule from",
     )
+    parser.add_argument(
+        '-w',
+        '--write',
+        action='store_true',
+        help=(
+            "write the generated matches directly to the compstate's league.yaml "
+            "rather than printing them"
+        ),
+    )
+    parser.add_argument(
+        '--team-order-strategy',
+        choices=teams_mapping.Strategy,
+        default=teams_mapping.Strategy.AUTO,
+        type=teams_mapping.Strategy,
+        help=(
+            "How to map the scheduled places to TLAs when writing the league "
+            "(only used with --write and when not rescheduling)"
+        ),
+    )
     parser.set_defaults(func=command)
@@ -0,0 +1,178 @@
+"""
+Run read-only commands interactively against a compstate which is kept loaded.
+
+Commands are entered as they would be on the command line but without the
+leading ``srcomp`` or the compstate path, for example ``show-schedule --all``.
+Tab completion is available for command names, their options, team TLAs, arena
+names and match numbers.
+
+The compstate is reloaded automatically when it changes, re-parsing only the
+files which changed.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cmd
+import shlex
+import sys
+import traceback
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sr.comp.comp import SRComp
+
+
+def completion_words(comp: SRComp) -> list[str]:
+    return [
+        *comp.teams.keys(),
+        *comp.arenas.keys(),
+        *(str(x) for x in range(len(comp.schedule.matches))),
+    ]
+
+
+def option_strings(command: str) -> list[str]:
+    from .command_line import argument_parser
+
+    parser = argument_parser([command])
+    (subparsers,) = parser._subparsers._group_actions  # type: ignore[union-attr]
+    subparser = subparsers.choices[command]  # type: ignore[index]
+    return [
+        option
+        for action in subparser._actions
+        for option in action.option_strings
+    ]
+
+
+class Shell(cmd.Cmd):
+    intro = "srcomp shell; type 'help' for a list of commands or 'quit' to exit."
+    prompt = 'srcomp> '
+
+    def __init__(self, compstate: Path) -> None:
+        super().__init__()
+        self.compstate = compstate
+        self._option_strings: dict[str, list[str]] = {}
+
+    def preloop(self) -> None:
+        try:
+            import readline
+        except ImportError:
+            return
+
+        # Command names and options contain hyphens
+        readline.set_completer_delims(readline.get_completer_delims().replace('-', ''))
+
+    def emptyline(self) -> bool:
+        # Don't repeat the last command
+        return False
+
+    def default(self, line: str) -> None:
+        from .command_line import run
+        from .in_process import (
+            exit_code_of,
+            SUPPORTED_COMMANDS,
+            with_compstate,
+        )
+
+        try:
+            args = shlex.split(line)
+        except ValueError as e:
+            print(f"Invalid command line: {e}", file=sys.stderr)
+            return
+
+        if args[0] not in SUPPORTED_COMMANDS:
+            print(f"Unknown command: {args[0]}", file=sys.stderr)
+            return
+
+        try:
+            run(with_compstate(args, self.compstate))
+        except SystemExit as e:
+            exit_code = exit_code_of(e)
+            if exit_code != 0:
+                print(f"Exited with status {exit_code}", file=sys.stderr)
+        except Exception:
+            traceback.print_exc()
+
+    def do_help(self, arg: str) -> None:
+        from .in_process import SUPPORTED_COMMANDS
+
+        if arg in SUPPORTED_COMMANDS:
+            self.default(f'{arg} --help')
+            return
+
+        print("Available commands (use 'help <command>' for details):")
+        self.columnize(sorted(SUPPORTED_COMMANDS))
+        print("Use 'quit' or Ctrl-D to exit.")
+
+    def do_quit(self, arg: str) -> bool:
+        return True
+
+    def do_EOF(self, arg: str) -> bool:
+        print()
+        return True
+
+    def completenames(self, text: str, *ignored: object) -> list[str]:
+        from .in_process import SUPPORTED_COMMANDS
+
+        return [
+            x
+            for x in sorted(SUPPORTED_COMMANDS | {'help', 'quit'})
+            if x.startswith(text)
+        ]
+
+    def _candidates(self, command: str, text: str) -> Iterable[str]:
+        from . import compstate_loader
+        from .in_process import SUPPORTED_COMMANDS
+
+        if command not in SUPPORTED_COMMANDS:
+            return []
+
+        if text.startswith('-'):
+            if command not in self._option_strings:
+                self._option_strings[command] = option_strings(command)
+            return self._option_strings[command]
+
+        try:
+            comp = compstate_loader.load(self.compstate)
+        except Exception:
+            return []
+
+        return completion_words(comp)
+
+    def completedefault(self, text: str, line: str, begidx: int, endidx: int) -> list[str]:
+        command, *_ = line.split()
+        return [x for x in self._candidates(command, text) if x.startswith(text)]
+
+    def complete_help(self, text: str, *ignored: object) -> list[str]:
+        return self.completenames(text)
+
+
+def command(settings: argparse.Namespace) -> None:
+    from . import compstate_loader
+
+    with compstate_loader.caching():
+        # Load up front, so that the first command is quick
+        compstate_loader.load(settings.compstate)
+
+        try:
+            Shell(settings.compstate).cmdloop()
+        except KeyboardInterrupt:
+            print()
+
+
+def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
+    help_msg = "Run commands interactively against a compstate which is kept loaded."
+    parser = subparsers.add_parser(
+        'shell',
+        help=help_msg,
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        'compstate',
+        type=Path,
+        help="competition state repository",
+    )
+    parser.set_defaults(func=command)
@@ -31,18 +31,10 @@ SORT_TYPES = {
 }
 
 
-def command(args: argparse.Namespace) -> None:
-    import os.path
-    from collections import Counter
-
-    from tabulate import tabulate
+def rows_from_compstate(compstate: str) -> list[Row]:
+    from sr.comp.cli.compstate_loader import load
 
-    from sr.comp.comp import SRComp
-
-    comp = SRComp(os.path.realpath(args.compstate))
-
-    tie_count = Counter(comp.scores.league.positions.values())
-    tied_positions = set(x for x, y in tie_count.items() if y > 1)
+    comp = load(compstate)
 
     league_table = []
     for team in comp.teams.values():
@@ -55,6 +47,59 @@ def command(args: argparse.Namespace) -> None:
             team.tla,
             team.name,
         ))
+    return league_table
+
+
+def rows_from_snapshot(path: str) -> list[Row]:
+    from sr.comp.cli.snapshot import Snapshot
+
+    with Snapshot(path) as snapshot:
+        return [
+            Row(
+                LeaguePosition(x.position),
+                LeaguePoints(x.league_points),
+                GamePoints(x.game_points),
+                TLA(x.tla),
+                x.name,
+            )
+            for x in snapshot.league_rows()
+        ]
+
+
+def rows_from_api(url: str) -> list[Row]:
+    from sr.comp.cli import comp_api
+
+    with comp_api.connect(url) as api:
+        teams = api.get('teams')['teams']
+
+    return [
+        Row(
+            LeaguePosition(x['league_pos']),
+            LeaguePoints(x['scores']['league']),
+            GamePoints(x['scores']['game']),
+            TLA(x['tla']),
+            x['name'],
+        )
+        for x in teams.values()
+    ]
+
+
+def command(args: argparse.Namespace) -> None:
+    from collections import Counter
+
+    from tabulate import tabulate
+
+    from sr.comp.cli.snapshot import is_snapshot
+
+    if args.from_api is not None:
+        league_table = rows_from_api(args.from_api)
+    elif is_snapshot(args.compstate):
+        league_table = rows_from_snapshot(args.compstate)
+    else:
+        league_table = rows_from_compstate(args.compstate)
+
+    tie_count = Counter(x.position for x in league_table)
+    tied_positions = set(x for x, y in tie_count.items() if y > 1)
 
     key, reverse = SORT_TYPES[args.sort]
     league_table.sort(key=key, reverse=reverse)
@@ -76,14 +121,16 @@ def command(args: argparse.Namespace) -> None:
 
 
 def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
+    from sr.comp.cli import comp_api, watching
+
     parser = subparsers.add_parser(
         'show-league-table',
         help=__doc__,
         description=__doc__,
     )
-    parser.add_argument(
-        'compstate',
-        help="competition state repo",
+    comp_api.add_source_arguments(
+        parser,
+        "competition state repo, or a snapshot written by 'srcomp snapshot'",
     )
     parser.add_argument(
         '--sort',
@@ -91,4 +138,5 @@ def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser
         default='rank',
         help="Sort table by a column",
     )
-    parser.set_defaults(func=command)
+    watching.add_arguments(parser)
+    parser.set_defaults(func=watching.watchable(command))
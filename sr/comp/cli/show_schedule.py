@@ -2,14 +2,22 @@ from __future__ import annotations
 
 import argparse
 import enum
-from datetime import timedelta
+from collections.abc import Mapping
+from datetime import datetime, timedelta
 from typing import TYPE_CHECKING
 
 DISPLAY_NAME_WIDTH = 18
 
+# How long after their start matches continue to be shown as upcoming
+RECENT_MATCHES = timedelta(minutes=10)
+
+# How often to refresh the output (in seconds) when watching
+REFRESH_INTERVAL = 10
+
 
 if TYPE_CHECKING:
-    from sr.comp.comp import SRComp
+    from sr.comp.match_period import Match, MatchSlot
+    from sr.comp.types import ArenaName
 
 
 class SecondsOption(enum.Enum):
@@ -28,11 +36,11 @@ class TimesOption(enum.Enum):
     def __str__(self) -> str:
         return self.value
 
-    def start_time_offset(self, comp: SRComp) -> timedelta:
+    def start_time_offset(self, match_slot_lengths: Mapping[str, timedelta]) -> timedelta:
         if self == self.SLOT:
             return timedelta(0)
         if self == self.GAME:
-            return comp.schedule.match_slot_lengths['pre']
+            return match_slot_lengths['pre']
         raise ValueError(f"Unexpected member {self!r}")
 
 
@@ -40,34 +48,16 @@ def first(iterable):
     return next(i for i in iterable)
 
 
-def command(settings: argparse.Namespace) -> None:
-    import os.path
-    from datetime import datetime, timedelta
-
-    from sr.comp.comp import SRComp
-    from sr.comp.match_period import Match
-
-    comp = SRComp(os.path.realpath(settings.compstate))
-
-    num_teams_per_arena = getattr(comp, 'num_teams_per_arena', len(comp.corners))
-
-    matches = comp.schedule.matches
-    now = datetime.now(comp.timezone)
-    current_matches = list(comp.schedule.matches_at(now))
-
+def print_matches(
+    settings: argparse.Namespace,
+    arena_display_names: Mapping[ArenaName, str],
+    num_teams_per_arena: int,
+    matches: list[MatchSlot],
+    current_matches: list[Match],
+    match_slot_lengths: Mapping[str, timedelta],
+) -> None:
     times_option: TimesOption = settings.times
-    start_time_offset: timedelta = times_option.start_time_offset(comp)
-
-    if not settings.all:
-        time = now - timedelta(minutes=10)
-
-        matches = [
-            slot
-            for slot in matches
-            if first(slot.values()).start_time >= time
-        ]
-
-        matches = matches[:int(settings.limit)]
+    start_time_offset: timedelta = times_option.start_time_offset(match_slot_lengths)
 
     def teams_str(teams):
         return ":".join(tla.center(5) if tla else "  -  " for tla in teams)
@@ -102,12 +92,12 @@ def command(settings: argparse.Namespace) -> None:
     teams_len = len(empty_teams)
 
     print_col(f" Num Time  {time_space}")
-    for a in comp.arenas.values():
-        print_col(a.display_name.center(teams_len))
+    for display_name in arena_display_names.values():
+        print_col(display_name.center(teams_len))
     print_col("Display Name".center(DISPLAY_NAME_WIDTH))
     print()
 
-    arena_ids = comp.arenas.keys()
+    arena_ids = arena_display_names.keys()
     for slot in matches:
         m = first(slot.values())
         print_col(f" {m.num:>3} {start_time(m):{time_format}} ")
@@ -126,16 +116,119 @@ def command(settings: argparse.Namespace) -> None:
             print()
 
 
+def upcoming(matches: list[MatchSlot], now: datetime, limit: int) -> list[MatchSlot]:
+    time = now - RECENT_MATCHES
+
+    matches = [
+        slot
+        for slot in matches
+        if first(slot.values()).start_time >= time
+    ]
+
+    return matches[:limit]
+
+
+def show_from_compstate(settings: argparse.Namespace) -> None:
+    from sr.comp.cli.compstate_loader import load_lazily
+
+    comp = load_lazily(settings.compstate)
+
+    # The knockout matches (which need the scores to be loaded) follow the
+    # league matches, so aren't needed if enough league matches are upcoming.
+    schedule = comp.league_schedule
+    now = datetime.now(schedule.timezone)
+
+    if settings.all:
+        schedule = comp.schedule
+        matches = schedule.matches
+    else:
+        matches = upcoming(schedule.matches, now, int(settings.limit))
+        if len(matches) < int(settings.limit):
+            schedule = comp.schedule
+            matches = upcoming(schedule.matches, now, int(settings.limit))
+
+    print_matches(
+        settings,
+        {x.name: x.display_name for x in comp.arenas.values()},
+        comp.num_teams_per_arena,
+        matches,
+        list(schedule.matches_at(now)),
+        schedule.match_slot_lengths,
+    )
+
+
+def show_from_snapshot(settings: argparse.Namespace) -> None:
+    from datetime import timezone
+
+    from sr.comp.cli.snapshot import Snapshot
+
+    with Snapshot(settings.compstate) as snapshot:
+        now = datetime.now(timezone.utc)
+
+        if settings.all:
+            matches = snapshot.matches()
+        else:
+            matches = snapshot.matches(now - RECENT_MATCHES, int(settings.limit))
+
+        print_matches(
+            settings,
+            snapshot.arena_display_names,
+            snapshot.num_teams_per_arena,
+            matches,
+            list(snapshot.matches_at(now)),
+            snapshot.match_slot_lengths,
+        )
+
+
+def show_from_api(settings: argparse.Namespace) -> None:
+    from sr.comp.cli import comp_api
+    from sr.comp.types import ArenaName
+
+    with comp_api.connect(settings.from_api) as api:
+        arenas, corners, config, matches, current = api.get_all(
+            ('arenas', 'corners', 'config', 'matches', 'current'),
+        )
+
+    # Use the API's idea of the current time, which it uses for the current matches
+    now = comp_api.parse_time(current['time'])
+
+    slots = comp_api.parse_matches(matches['matches'])
+    if not settings.all:
+        slots = upcoming(slots, now, int(settings.limit))
+
+    print_matches(
+        settings,
+        {ArenaName(x['name']): x['display_name'] for x in arenas['arenas'].values()},
+        len(corners['corners']),
+        slots,
+        [comp_api.parse_match(x) for x in current['matches']],
+        comp_api.parse_match_slot_lengths(config['config']),
+    )
+
+
+def command(settings: argparse.Namespace) -> None:
+    from sr.comp.cli.snapshot import is_snapshot
+
+    if settings.from_api is not None:
+        show_from_api(settings)
+    elif is_snapshot(settings.compstate):
+        show_from_snapshot(settings)
+    else:
+        show_from_compstate(settings)
+
+
 def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
+    from sr.comp.cli import comp_api, watching
+
     help_msg = "Show the match schedule."
     parser = subparsers.add_parser(
         'show-schedule',
         help=help_msg,
         description=help_msg,
     )
-    parser.add_argument(
-        'compstate',
-        help="competition state repo",
+    comp_api.add_source_arguments(
+        parser,
+        "competition state repo, or a snapshot written by 'srcomp snapshot'",
     )
     parser.add_argument(
         '--all',
@@ -167,4 +260,6 @@ def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser
         default=15,
         help="how many matches to show (default: %(default)s)",
     )
-    parser.set_defaults(func=command)
+    watching.add_arguments(parser)
+    # Which matches are upcoming (and current) changes over time
+    parser.set_defaults(func=watching.watchable(command, refresh_interval=REFRESH_INTERVAL))
@@ -0,0 +1,467 @@
+"""
+Write a compact binary snapshot of a compstate for fast read-only access.
+
+The snapshot contains the teams, arenas, match schedule and league standings,
+stored as columns of fixed-size values. The ``show-schedule`` and
+``show-league-table`` commands accept the path to a snapshot in place of a
+compstate, in which case they memory-map the snapshot rather than loading the
+compstate. This means they start quickly and that processes reading the same
+snapshot share its pages rather than each holding their own copy.
+
+Snapshots are not updated when the compstate changes; re-run this command (for
+example after each deploy) to refresh them. Snapshots are written atomically,
+so readers never see a partially written file.
+"""
+
+from __future__ import annotations
+
+import argparse
+import array
+import dataclasses
+import datetime
+import json
+import mmap
+import os
+import struct
+import sys
+from collections.abc import Iterator, Sequence
+from pathlib import Path
+from typing import Any, NamedTuple, overload, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from sr.comp.comp import SRComp
+    from sr.comp.match_period import Match, MatchSlot
+    from sr.comp.types import ArenaName
+
+MAGIC = b'SRCOMPSS'
+VERSION = 1
+
+# Magic, version, byte order (0 for little endian, 1 for big), section count
+HEADER = struct.Struct('<8sIII')
+# Name, typecode, offset, length in bytes
+SECTION = struct.Struct('<32s1s7xQQ')
+
+# Values which don't fit a column are stored in the JSON 'meta' section
+META = 'meta'
+
+# Sentinel in team columns for empty zones
+NO_TEAM = -1
+
+
+class LeagueRow(NamedTuple):
+    position: int
+    league_points: int
+    game_points: int
+    tla: str
+    name: str
+
+
+def is_snapshot(path: str | os.PathLike[str]) -> bool:
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except (IsADirectoryError, FileNotFoundError, NotADirectoryError):
+        return False
+
+
+def _byte_order() -> int:
+    return 0 if sys.byteorder == 'little' else 1
+
+
+def _timestamp(value: datetime.datetime) -> int:
+    # Microseconds since the epoch
+    delta = value - datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+    return delta // datetime.timedelta(microseconds=1)
+
+
+def _utc_offset(value: datetime.datetime) -> int:
+    offset = value.utcoffset()
+    assert offset is not None, "Match times should be timezone aware"
+    return int(offset.total_seconds())
+
+
+def _numeric_column(values: Sequence[int]) -> array.array[Any]:
+    if all(isinstance(x, int) for x in values):
+        return array.array('q', values)
+    return array.array('d', values)
+
+
+class _Writer:
+    def __init__(self) -> None:
+        self.sections: dict[str, tuple[str, bytes]] = {}
+
+    def add_column(self, name: str, values: array.array[Any]) -> None:
+        self.sections[name] = (values.typecode, values.tobytes())
+
+    def add_strings(self, name: str, values: Sequence[str]) -> None:
+        encoded = [x.encode('utf-8') for x in values]
+        offsets = array.array('q', [0])
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+
+        self.add_column(f'{name}.offsets', offsets)
+        self.sections[f'{name}.data'] = ('B', b''.join(encoded))
+
+    def add_meta(self, meta: dict[str, Any]) -> None:
+        self.sections[META] = ('B', json.dumps(meta).encode('utf-8'))
+
+    def tobytes(self) -> bytes:
+        def aligned(offset: int) -> int:
+            # Columns are aligned so that they can be cast in place
+            return (offset + 7) // 8 * 8
+
+        offset = aligned(HEADER.size + SECTION.size * len(self.sections))
+        table = [HEADER.pack(MAGIC, VERSION, _byte_order(), len(self.sections))]
+        body = []
+        for name, (typecode, data) in self.sections.items():
+            encoded_name = name.encode('ascii')
+            # Longer names would be silently truncated
+            assert len(encoded_name) <= 32, f"Section name {name!r} is too long"
+            table.append(SECTION.pack(
+                encoded_name,
+                typecode.encode('ascii'),
+                offset,
+                len(data),
+            ))
+            padding = aligned(len(data)) - len(data)
+            body.append(data + b'\0' * padding)
+            offset += len(data) + padding
+
+        header = b''.join(table)
+        header += b'\0' * (aligned(len(header)) - len(header))
+        return header + b''.join(body)
+
+
+def snapshot_bytes(comp: SRComp) -> bytes:
+    writer = _Writer()
+
+    arena_names = list(comp.arenas.keys())
+    match_types = []
+    team_names: dict[str, int] = {}
+
+    nums, arenas, types, display_names, brackets = [], [], [], [], []
+    starts, ends, offsets, resolved = [], [], [], []
+    team_offsets, teams = [0], []
+    for slot in comp.schedule.matches:
+        for arena, match in slot.items():
+            if match.type.value not in match_types:
+                match_types.append(match.type.value)
+
+            nums.append(match.num)
+            arenas.append(arena_names.index(arena))
+            types.append(match_types.index(match.type.value))
+            display_names.append(match.display_name)
+            brackets.append(getattr(match, 'knockout_bracket', ''))
+            starts.append(_timestamp(match.start_time))
+            ends.append(_timestamp(match.end_time))
+            offsets.append(_utc_offset(match.start_time))
+            resolved.append(int(match.use_resolved_ranking))
+
+            for tla in match.teams:
+                if tla is None:
+                    teams.append(NO_TEAM)
+                else:
+                    teams.append(team_names.setdefault(tla, len(team_names)))
+            team_offsets.append(len(teams))
+
+    writer.add_column('match.num', array.array('q', nums))
+    writer.add_column('match.arena', array.array('q', arenas))
+    writer.add_column('match.type', array.array('q', types))
+    writer.add_strings('match.display_name', display_names)
+    writer.add_strings('match.knockout_bracket', brackets)
+    writer.add_column('match.start', array.array('q', starts))
+    writer.add_column('match.end', array.array('q', ends))
+    writer.add_column('match.utc_offset', array.array('q', offsets))
+    writer.add_column('match.resolved', array.array('q', resolved))
+    writer.add_column('match.team_offsets', array.array('q', team_offsets))
+    writer.add_column('match.teams', array.array('q', teams))
+    writer.add_strings('match.team_names', list(team_names))
+
+    league = comp.scores.league
+    tlas = list(comp.teams.keys())
+    writer.add_strings('team.tla', tlas)
+    writer.add_strings('team.name', [comp.teams[x].name for x in tlas])
+    writer.add_column('team.position', array.array('q', [league.positions[x] for x in tlas]))
+    writer.add_column('team.league_points', _numeric_column([
+        league.teams[x].league_points
+        for x in tlas
+    ]))
+    writer.add_column('team.game_points', _numeric_column([
+        league.teams[x].game_points
+        for x in tlas
+    ]))
+
+    writer.add_meta({
+        'state': comp.state,
+        'num_teams_per_arena': comp.num_teams_per_arena,
+        'arenas': [[x.name, x.display_name] for x in comp.arenas.values()],
+        'match_types': match_types,
+        'match_slot_lengths': {
+            name: value.total_seconds()
+            for name, value in comp.schedule.match_slot_lengths.items()
+        },
+    })
+
+    return writer.tobytes()
+
+
+class StringColumn(Sequence[str]):
+    """A column of strings, which are only decoded as they are accessed."""
+
+    def __init__(self, offsets: memoryview, data: memoryview) -> None:
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> str:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[str]:
+        ...
+
+    def __getitem__(self, index: int | slice) -> str | list[str]:
+        if isinstance(index, slice):
+            return [self[x] for x in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+
+        start, end = self._offsets[index], self._offsets[index + 1]
+        return str(self._data[start:end], 'utf-8')
+
+
+class Snapshot:
+    """
+    Read-only access to a snapshot, which is memory-mapped rather than read.
+    """
+
+    def __init__(self, path: str | os.PathLike[str]) -> None:
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        buffer = memoryview(self._mmap)
+        # All views of the map must be released before it can be closed
+        self._views = [buffer]
+        if len(buffer) < HEADER.size:
+            raise ValueError(f"{path} is not a compstate snapshot")
+
+        magic, version, byte_order, count = HEADER.unpack_from(buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a compstate snapshot")
+        if version != VERSION:
+            raise ValueError(f"Unsupported snapshot version {version} in {path}")
+        if byte_order != _byte_order():
+            raise ValueError(f"Snapshot {path} was written on an incompatible machine")
+
+        self._sections: dict[str, memoryview] = {}
+        for index in range(count):
+            name, typecode, offset, length = SECTION.unpack_from(
+                buffer,
+                HEADER.size + SECTION.size * index,
+            )
+            section = buffer[offset:offset + length]
+            self._views.append(section)
+            if typecode != b'B':
+                section = section.cast(typecode.decode('ascii'))
+                self._views.append(section)
+            self._sections[name.rstrip(b'\0').decode('ascii')] = section
+
+        self.meta: dict[str, Any] = json.loads(bytes(self._sections[META]))
+
+    def close(self) -> None:
+        self._sections.clear()
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._mmap.close()
+
+    def __enter__(self) -> Snapshot:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def column(self, name: str) -> memoryview:
+        return self._sections[name]
+
+    def strings(self, name: str) -> StringColumn:
+        return StringColumn(
+            self._sections[f'{name}.offsets'],
+            self._sections[f'{name}.data'],
+        )
+
+    @property
+    def state(self) -> str:
+        return self.meta['state']  # type: ignore[no-any-return]
+
+    @property
+    def num_teams_per_arena(self) -> int:
+        return self.meta['num_teams_per_arena']  # type: ignore[no-any-return]
+
+    @property
+    def arena_display_names(self) -> dict[ArenaName, str]:
+        return dict(self.meta['arenas'])
+
+    @property
+    def match_slot_lengths(self) -> dict[str, datetime.timedelta]:
+        return {
+            name: datetime.timedelta(seconds=value)
+            for name, value in self.meta['match_slot_lengths'].items()
+        }
+
+    def league_rows(self) -> Iterator[LeagueRow]:
+        tlas = self.strings('team.tla')
+        names = self.strings('team.name')
+        positions = self.column('team.position')
+        league_points = self.column('team.league_points')
+        game_points = self.column('team.game_points')
+        for index in range(len(tlas)):
+            yield LeagueRow(
+                positions[index],
+                league_points[index],
+                game_points[index],
+                tlas[index],
+                names[index],
+            )
+
+    def _datetime(self, timestamp: int, utc_offset: int) -> datetime.datetime:
+        timezone = datetime.timezone(datetime.timedelta(seconds=utc_offset))
+        epoch = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+        return (epoch + datetime.timedelta(microseconds=timestamp)).astimezone(timezone)
+
+    def _match(self, row: int) -> Match:
+        from sr.comp.match_period import KnockoutMatch, Match, MatchType
+        from sr.comp.types import ArenaName, MatchNumber, TLA
+
+        arena_names = [name for name, _ in self.meta['arenas']]
+        team_names = self.strings('match.team_names')
+        team_offsets = self.column('match.team_offsets')
+        teams = self.column('match.teams')
+        utc_offset = self.column('match.utc_offset')[row]
+
+        match = Match(
+            num=MatchNumber(self.column('match.num')[row]),
+            display_name=self.strings('match.display_name')[row],
+            arena=ArenaName(arena_names[self.column('match.arena')[row]]),
+            teams=[
+                None if x == NO_TEAM else TLA(team_names[x])
+                for x in teams[team_offsets[row]:team_offsets[row + 1]]
+            ],
+            start_time=self._datetime(self.column('match.start')[row], utc_offset),
+            end_time=self._datetime(self.column('match.end')[row], utc_offset),
+            type=MatchType(self.meta['match_types'][self.column('match.type')[row]]),
+            use_resolved_ranking=bool(self.column('match.resolved')[row]),
+        )
+
+        if match.type == MatchType.knockout:
+            return KnockoutMatch(
+                **dataclasses.asdict(match),
+                knockout_bracket=self.strings('match.knockout_bracket')[row],
+            )
+        return match
+
+    def matches(
+        self,
+        starting_from: datetime.datetime | None = None,
+        limit: int | None = None,
+    ) -> list[MatchSlot]:
+        """
+        Get the match slots, optionally only those which start at or after the
+        given time, up to the given number of slots.
+
+        Only the matches which are returned are decoded.
+        """
+        from sr.comp.match_period import MatchSlot
+
+        nums = self.column('match.num')
+        starts = self.column('match.start')
+        threshold = None if starting_from is None else _timestamp(starting_from)
+
+        # Rows are grouped by match number, the first row of each slot being
+        # for its first arena
+        slots: list[range] = []
+        first_row = 0
+        for row in range(1, len(nums) + 1):
+            if row < len(nums) and nums[row] == nums[first_row]:
+                continue
+
+            if threshold is None or starts[first_row] >= threshold:
+                slots.append(range(first_row, row))
+                if len(slots) == limit:
+                    break
+
+            first_row = row
+
+        return [
+            MatchSlot({
+                match.arena: match
+                for match in (self._match(row) for row in rows)
+            })
+            for rows in slots
+        ]
+
+    def matches_at(self, date: datetime.datetime) -> Iterator[Match]:
+        timestamp = _timestamp(date)
+        starts = self.column('match.start')
+        ends = self.column('match.end')
+        for row in range(len(starts)):
+            if starts[row] <= timestamp < ends[row]:
+                yield self._match(row)
+
+
+def write_snapshot(comp: SRComp, path: Path) -> None:
+    import stat
+    import tempfile
+
+    # Temporary files are only readable by their owner, while snapshots are
+    # typically read by other users (such as that of the API)
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    data = snapshot_bytes(comp)
+    with tempfile.NamedTemporaryFile('wb', dir=path.parent, delete=False) as f:
+        try:
+            f.write(data)
+            os.chmod(f.name, mode)
+        except BaseException:
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, path)
+
+
+def command(settings: argparse.Namespace) -> None:
+    from .compstate_loader import load
+
+    comp = load(settings.compstate)
+    write_snapshot(comp, settings.output)
+    print(f"Wrote snapshot of {comp.state} to {settings.output}")
+
+
+def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
+    help_msg, *_ = __doc__.strip().splitlines()
+    parser = subparsers.add_parser(
+        'snapshot',
+        help=help_msg,
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        'compstate',
+        help="competition state repository",
+    )
+    parser.add_argument(
+        'output',
+        type=Path,
+        help="file to write the snapshot to",
+    )
+    parser.set_defaults(func=command)
@@ -3,10 +3,10 @@ from __future__ import annotations
 import argparse
 import datetime
 from collections import Counter
-from collections.abc import Iterable, Mapping
+from collections.abc import Collection, Iterable, Mapping
 from typing import TypeVar
 
-from sr.comp.match_period import MatchPeriod
+from sr.comp.match_period import MatchPeriod, MatchSlot
 
 T = TypeVar('T')
 
@@ -45,39 +45,40 @@ def format_period(period: MatchPeriod, match_duration: datetime.timedelta) -> st
     return f"{date} {desc} ({timings})"
 
 
-def command(args: argparse.Namespace) -> None:
-    from collections import Counter
-
-    from sr.comp.comp import SRComp
-
-    comp = SRComp(args.compstate)
-
+def print_summary(
+    arena_names: Collection[str],
+    rookies: Collection[bool],
+    matches: list[MatchSlot],
+    durations: Mapping[str, datetime.timedelta],
+    match_periods: Iterable[MatchPeriod],
+    last_scored_match: int | None,
+) -> None:
     print("Number of arenas: {} ({})".format(
-        len(comp.arenas),
-        ", ".join(comp.arenas.keys()),
+        len(arena_names),
+        ", ".join(arena_names),
     ))
 
     print("Number of teams: {} ({} rookies)".format(
-        len(comp.teams),
-        sum(1 for t in comp.teams.values() if t.rookie),
+        len(rookies),
+        sum(1 for rookie in rookies if rookie),
     ))
 
     slots_by_type = Counter(
         first(slot.values()).type.value
-        for slot in comp.schedule.matches
+        for slot in matches
     )
     slots_by_type_str = counter_to_string(slots_by_type)
 
-    assert sum(slots_by_type.values()) == len(comp.schedule.matches)
+    assert sum(slots_by_type.values()) == len(matches)
 
     print("Number of match slots: {} ({})".format(
-        len(comp.schedule.matches),
+        len(matches),
         slots_by_type_str,
     ))
 
     games_by_type = Counter(
         game.type.value
-        for slot in comp.schedule.matches
+        for slot in matches
         for game in slot.values()
     )
     games_by_type_str = counter_to_string(games_by_type)
@@ -87,7 +88,6 @@ def command(args: argparse.Namespace) -> None:
         games_by_type_str,
     ))
 
-    durations: Mapping[str, datetime.timedelta] = comp.schedule.match_slot_lengths
     match_duration = durations['total']
 
     print("Match duration: {} (pre: {}, match: {}, post: {})".format(
@@ -98,15 +98,59 @@ def command(args: argparse.Namespace) -> None:
     ))
 
     print("Match periods:")
-    for period in comp.schedule.match_periods:
+    for period in match_periods:
         print(f' · {format_period(period, match_duration)}')
 
-    print("Last scored match: {}".format(comp.scores.last_scored_match))
+    print("Last scored match: {}".format(last_scored_match))
+
+
+def summary_from_compstate(compstate: str) -> None:
+    from sr.comp.cli.compstate_loader import load
+
+    comp = load(compstate)
+
+    print_summary(
+        comp.arenas.keys(),
+        [t.rookie for t in comp.teams.values()],
+        comp.schedule.matches,
+        comp.schedule.match_slot_lengths,
+        comp.schedule.match_periods,
+        comp.scores.last_scored_match,
+    )
+
+
+def summary_from_api(url: str) -> None:
+    from sr.comp.cli import comp_api
+
+    with comp_api.connect(url) as api:
+        arenas, teams, config, matches, periods = api.get_all(
+            ('arenas', 'teams', 'config', 'matches', 'periods'),
+        )
+
+    slots = comp_api.parse_matches(matches['matches'])
+
+    print_summary(
+        arenas['arenas'].keys(),
+        [t['rookie'] for t in teams['teams'].values()],
+        slots,
+        comp_api.parse_match_slot_lengths(config['config']),
+        comp_api.parse_periods(periods['periods'], slots),
+        matches['last_scored'],
+    )
+
+
+def command(args: argparse.Namespace) -> None:
+    if args.from_api is not None:
+        summary_from_api(args.from_api)
+    else:
+        summary_from_compstate(args.compstate)
 
 
 def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
+    from sr.comp.cli import comp_api
+
     help_msg = "Show summary data about a compstate."
 
     parser = subparsers.add_parser('summary', help=help_msg, description=help_msg)
-    parser.add_argument('compstate', help="competition state repository")
+    comp_api.add_source_arguments(parser, "competition state repository")
     parser.set_defaults(func=command)
@@ -0,0 +1,125 @@
+"""
+Lightweight instrumentation of where commands spend their time.
+
+Commands mark the phases of their work using ``phase``, which is a no-op unless
+timings are being recorded (via the global ``--timings`` option). Phases with
+the same name are aggregated (including across threads) and phases may be
+nested, in which case the time is counted towards both phases.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import sys
+import threading
+import time
+from collections.abc import Iterator
+from typing import IO
+
+FORMATS = ('json',)
+
+
+class PhaseTiming:
+    # A plain class rather than a dataclass, as this module is imported on
+    # every run and dataclasses is slow to import.
+    __slots__ = ('wall_seconds', 'cpu_seconds', 'count')
+
+    def __init__(self) -> None:
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.count = 0
+
+    def as_json(self) -> dict[str, object]:
+        return {
+            'wall_seconds': self.wall_seconds,
+            'cpu_seconds': self.cpu_seconds,
+            'count': self.count,
+        }
+
+
+class Recorder:
+    def __init__(self) -> None:
+        # Dicts retain insertion order, so phases are reported in the order
+        # they were first started.
+        self.phases: dict[str, PhaseTiming] = {}
+        # Phases may be run from worker threads
+        self._lock = threading.Lock()
+        self.start_wall = time.perf_counter()
+        self.start_cpu = time.process_time()
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        with self._lock:
+            timing = self.phases.setdefault(name, PhaseTiming())
+        start_wall = time.perf_counter()
+        start_cpu = time.process_time()
+        try:
+            yield
+        finally:
+            wall_seconds = time.perf_counter() - start_wall
+            cpu_seconds = time.process_time() - start_cpu
+            with self._lock:
+                timing.wall_seconds += wall_seconds
+                timing.cpu_seconds += cpu_seconds
+                timing.count += 1
+
+    def as_json(self) -> dict[str, object]:
+        with self._lock:
+            phases = [
+                {'name': name, **timing.as_json()}
+                for name, timing in self.phases.items()
+            ]
+        return {
+            'total': {
+                'wall_seconds': time.perf_counter() - self.start_wall,
+                'cpu_seconds': time.process_time() - self.start_cpu,
+            },
+            'phases': phases,
+        }
+
+
+_recorder: Recorder | None = None
+
+
+@contextlib.contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Mark the enclosed code as being part of the named phase."""
+    if _recorder is None:
+        yield
+        return
+
+    with _recorder.phase(name):
+        yield
+
+
+@contextlib.contextmanager
+def recording(stream: IO[str] | None = None) -> Iterator[Recorder]:
+    """
+    Record the timings of phases within the enclosed code, writing them as
+    JSON to the given stream (stderr by default) once complete.
+
+    The timings are written even if the enclosed code exits early.
+    """
+    global _recorder
+
+    recorder = Recorder()
+    previous, _recorder = _recorder, recorder
+    try:
+        yield recorder
+    finally:
+        _recorder = previous
+        json.dump(recorder.as_json(), stream or sys.stderr, indent=2)
+        print(file=stream or sys.stderr)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--timings',
+        choices=FORMATS,
+        help=(
+            "Record how long each phase of the command takes, writing the "
+            "timings to stderr in the given format once complete."
+        ),
+    )
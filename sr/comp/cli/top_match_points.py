@@ -13,9 +13,9 @@ def command(settings: argparse.Namespace) -> None:
     from collections import defaultdict
     from itertools import chain
 
-    from sr.comp.comp import SRComp
+    from sr.comp.cli.compstate_loader import load
 
-    comp = SRComp(settings.compstate)
+    comp = load(settings.compstate)
 
     all_scores = (comp.scores.tiebreaker, comp.scores.knockout, comp.scores.league)
     all_points = dict(chain.from_iterable(s.game_points.items() for s in all_scores))
@@ -11,7 +11,7 @@ from __future__ import annotations
 
 import argparse
 from pathlib import Path
-from typing import Generic, Sequence, TypeVar
+from typing import Any, Generic, Sequence, TypeVar
 
 T = TypeVar('T')
 
@@ -37,29 +37,37 @@ class Takeable(Generic[T]):
 
 def command(settings: argparse.Namespace) -> None:
     from sr.comp.cli import yaml_round_trip as yaml
+    from sr.comp.cli.compstate_loader import InvalidCompstateError
 
-    with yaml.edit(settings.compstate / 'layout.yaml') as layout:
-        layout_teams = layout['teams']
+    try:
+        with yaml.validated_edit(settings.compstate, 'layout.yaml') as layout:
+            update_layout(layout, settings.teams_list)
+    except InvalidCompstateError as e:
+        exit(f"{e}; the layout has not been updated.")
 
-        with open(settings.teams_list) as tlf:
-            teams_list = []
-            for line in tlf.readlines():
-                tla = line.split('#', 1)[0].strip()
-                if tla:
-                    teams_list.append(tla)
+    print("Layout updated. You should consider re-importing the schedule now.")
 
-        teams = Takeable(teams_list)
 
-        for place in layout_teams:
-            # Ensure we replace the content of the list, but not the list
-            # itself so that the file's own layout is preserved
-            loc_teams = place['teams']
-            loc_teams[:] = teams.take(len(loc_teams))
+def update_layout(layout: dict[str, Any], teams_list_path: Path) -> None:
+    layout_teams = layout['teams']
 
-        if teams.has_more:
-            layout_teams[-1]['teams'] += teams.remainder
+    with open(teams_list_path) as tlf:
+        teams_list = []
+        for line in tlf.readlines():
+            tla = line.split('#', 1)[0].strip()
+            if tla:
+                teams_list.append(tla)
 
-    print("Layout updated. You should consider re-importing the schedule now.")
+    teams = Takeable(teams_list)
+
+    for place in layout_teams:
+        # Ensure we replace the content of the list, but not the list
+        # itself so that the file's own layout is preserved
+        loc_teams = place['teams']
+        loc_teams[:] = teams.take(len(loc_teams))
+
+    if teams.has_more:
+        layout_teams[-1]['teams'] += teams.remainder
 
 
 def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
@@ -2,17 +2,21 @@ from __future__ import annotations
 
 import argparse
 
+from .timings import phase
+
 
 def command(settings: argparse.Namespace) -> None:
-    from sr.comp.comp import SRComp
+    from sr.comp.cli.compstate_loader import load
     from sr.comp.validation import validate
 
-    comp = SRComp(settings.compstate)
+    with phase('load'):
+        comp = load(settings.compstate)
 
     if settings.lax:
         error_count = 0
     else:
-        error_count = validate(comp)
+        with phase('validate'):
+            error_count = validate(comp)
 
     exit(error_count)
 
@@ -0,0 +1,211 @@
+"""
+Support for commands which re-display their output whenever the compstate
+changes (via their ``--watch`` option).
+
+Changes are detected using inotify where available, falling back to polling.
+The compstate is kept loaded between updates, so that only the files which
+changed are re-parsed and only the parts of the compstate which depend on them
+are reloaded.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import functools
+import os
+import select
+import sys
+import time
+import traceback
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+# How often to check for changes when inotify isn't available
+POLL_INTERVAL = 1.0
+
+# How long to wait for further changes before updating, so that changes which
+# touch several files (such as pulling a commit) result in a single update
+SETTLE_TIME = 0.1
+
+# From <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0)
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+    IN_CREATE | IN_DELETE | IN_ONLYDIR
+)
+
+
+class Inotify:
+    """A minimal wrapper around the Linux inotify API, via ctypes."""
+
+    def __init__(self) -> None:
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def add_watch(self, path: Path, mask: int = WATCH_MASK) -> None:
+        import ctypes
+
+        if self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask) < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), str(path))
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """
+        Wait for events, returning whether there were any. The events
+        themselves are discarded.
+        """
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return False
+
+        with contextlib.suppress(BlockingIOError):
+            while os.read(self.fd, 65536):
+                pass
+        return True
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def watch_directories(inotify: Inotify, root: Path) -> None:
+    # Directories are watched individually, so this is repeated after each
+    # change to pick up any new directories.
+    for dirpath, dirnames, _ in os.walk(root):
+        if '.git' in dirnames:
+            dirnames.remove('.git')
+        with contextlib.suppress(FileNotFoundError):
+            inotify.add_watch(Path(dirpath))
+
+
+@contextlib.contextmanager
+def change_waiter(root: Path) -> Iterator[Callable[[float | None], None]]:
+    """
+    Provide a function which waits until the given compstate has changed since
+    it was last loaded, or until the given timeout (if any) has passed.
+    """
+    from . import compstate_loader
+
+    def is_stale() -> bool:
+        return compstate_loader.is_stale(root)
+
+    def remaining(deadline: float | None) -> float | None:
+        if deadline is None:
+            return None
+        return max(0, deadline - time.monotonic())
+
+    def poll(timeout: float | None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not is_stale():
+            left = remaining(deadline)
+            if left == 0:
+                return
+            time.sleep(POLL_INTERVAL if left is None else min(left, POLL_INTERVAL))
+
+    try:
+        inotify = Inotify()
+        watch_directories(inotify, root)
+    except (OSError, AttributeError) as e:
+        # Not on Linux, or the limit on the number of watches has been reached
+        print(f"Unable to use inotify ({e}), polling for changes instead", file=sys.stderr)
+        yield poll
+        return
+
+    def wait(timeout: float | None) -> None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not is_stale():
+            if not inotify.wait(remaining(deadline)):
+                return
+
+            while inotify.wait(SETTLE_TIME):
+                pass
+            watch_directories(inotify, root)
+
+    try:
+        yield wait
+    finally:
+        inotify.close()
+
+
+def clear_screen() -> None:
+    if sys.stdout.isatty():
+        print('\033[H\033[2J', end='')
+
+
+def watch(
+    compstate: Path,
+    render: Callable[[], None],
+    refresh_interval: float | None = None,
+) -> None:
+    """
+    Render the output for the given compstate and then re-render it each time
+    the compstate changes, until interrupted. Output which depends on the
+    current time can also be re-rendered at the given interval.
+    """
+    from . import compstate_loader
+
+    with contextlib.suppress(KeyboardInterrupt):
+        with compstate_loader.caching(), change_waiter(compstate.resolve()) as wait:
+            while True:
+                clear_screen()
+                try:
+                    render()
+                except Exception:
+                    # The compstate may be part way through being changed;
+                    # keep going so that the next change is picked up.
+                    traceback.print_exc()
+                sys.stdout.flush()
+
+                wait(refresh_interval)
+
+
+def watchable(
+    command: Callable[[argparse.Namespace], None],
+    refresh_interval: float | None = None,
+) -> Callable[[argparse.Namespace], None]:
+    """
+    Wrap a command so that it supports the ``--watch`` option (which must be
+    added to its parser using ``add_arguments``). Commands whose output depends
+    on the current time should pass a ``refresh_interval``.
+    """
+    @functools.wraps(command)
+    def wrapper(settings: argparse.Namespace) -> None:
+        from . import compstate_loader
+
+        if not settings.watch:
+            command(settings)
+            return
+
+        if compstate_loader.caching_enabled():
+            exit("--watch cannot be used when running in the daemon, batch or shell")
+
+        if settings.compstate is None or not Path(settings.compstate).is_dir():
+            exit("--watch can only be used with a compstate repository")
+
+        watch(Path(settings.compstate), lambda: command(settings), refresh_interval)
+
+    return wrapper
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help="re-display the output whenever the compstate changes",
+    )
@@ -2,14 +2,145 @@ from __future__ import annotations
 
 import argparse
 import contextlib
-from collections.abc import Iterator
+import io
+import math
+import os
+import re
+import stat
+import sys
+import tempfile
+from collections.abc import Callable, Iterator, Mapping, Sequence
 from pathlib import Path
 from typing import Any, IO, TYPE_CHECKING
 
+from .timings import phase
+
 if TYPE_CHECKING:
     import ruamel.yaml
 
 _ryaml = None
+_fast_loader: type[Any] | None = None
+
+
+@contextlib.contextmanager
+def locked(path: Path) -> Iterator[None]:
+    """
+    Hold an advisory lock against other edits to the files in the directory
+    containing the given path, within the enclosed code.
+
+    Locks are not re-entrant: a process already holding one for a directory
+    must not attempt to take another.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        # Not available on Windows
+        yield
+        return
+
+    fd = os.open(path.parent, os.O_RDONLY)
+    try:
+        with phase('lock'):
+            fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Also releases the lock
+        os.close(fd)
+
+
+def _stage(path: Path, text: str) -> str:
+    # Write the new contents alongside the file, returning the temporary name
+    try:
+        mode = stat.S_IMODE(path.stat().st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        mode = 0o666 & ~umask
+
+    with tempfile.NamedTemporaryFile(
+        'w',
+        dir=path.parent,
+        prefix=f'.{path.name}.',
+        delete=False,
+    ) as f:
+        try:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+            os.chmod(f.name, mode)
+        except BaseException:
+            os.unlink(f.name)
+            raise
+    return f.name
+
+
+def write_all_atomically(contents: Mapping[Path, str]) -> None:
+    """
+    Replace the contents of the given files. Each is replaced such that readers
+    only ever see either its old or its new contents, and none are replaced
+    until the new contents of all of them have been written out.
+    """
+    staged: list[tuple[str, Path]] = []
+    try:
+        for path, text in contents.items():
+            staged.append((_stage(path, text), path))
+    except BaseException:
+        for temp_name, _ in staged:
+            os.unlink(temp_name)
+        raise
+
+    for temp_name, path in staged:
+        os.replace(temp_name, path)
+
+
+def write_atomically(path: Path, text: str) -> None:
+    """
+    Replace the contents of the given file such that readers only ever see
+    either the old or the new contents, even if this is interrupted.
+    """
+    write_all_atomically({path: text})
+
+
+@contextlib.contextmanager
+def edit_all(
+    paths: Sequence[Path],
+    check: Callable[[Mapping[Path, str]], None] | None = None,
+) -> Iterator[list[Any]]:
+    """
+    Edit several yaml files together, as a context manager.
+
+    Changes are saved only if the context exits cleanly and the given ``check``
+    (if any), which is passed the new contents of the changed files, doesn't
+    raise. Nothing is written until all the files have been serialised, and
+    then they're all written using `write_all_atomically`, so a failure part
+    way through leaves every file unchanged. Only files whose contents have
+    changed are rewritten. Concurrent edits are prevented using `locked`.
+    """
+    # Lock each directory once, always in the same order, so that concurrent
+    # edits of overlapping sets of files can't deadlock.
+    directories = {path.parent: path for path in paths}
+
+    with contextlib.ExitStack() as stack:
+        for directory in sorted(directories):
+            stack.enter_context(locked(directories[directory]))
+
+        originals = [path.read_text() for path in paths]
+        raw_yamls = [load(io.StringIO(original)) for original in originals]
+        yield raw_yamls
+
+        changes = {}
+        for path, original, raw_yaml in zip(paths, originals, raw_yamls):
+            updated = serialise(raw_yaml)
+            if updated != original:
+                changes[path] = updated
+
+        if not changes:
+            return
+
+        if check is not None:
+            check(changes)
+
+        write_all_atomically(changes)
 
 
 @contextlib.contextmanager
@@ -18,13 +149,67 @@ def edit(path: Path) -> Iterator[Any]:
     Edit a yaml file, as a context manager.
 
     Changes are saved only if the context exits cleanly (i.e: if no exceptions
-    are raised in the context).
+    are raised in the context). The file is only rewritten if its contents
+    have changed, and is replaced atomically. Concurrent edits are prevented
+    using `locked`.
 
     This is a convenience helper for other commands.
     """
-    raw_yaml = load(path)
-    yield raw_yaml
-    dump(raw_yaml, dest=path)
+    with edit_all([path]) as (raw_yaml,):
+        yield raw_yaml
+
+
+def _error_count(compstate: Path, changes: Mapping[Path, str]) -> float:
+    """
+    Validate the compstate as it would be after the given changes, counting a
+    failure to load it as infinitely many errors.
+    """
+    from .compstate_loader import validate_with_changes
+
+    try:
+        return validate_with_changes(compstate, changes)
+    except Exception as e:
+        print(f"The compstate would fail to load: {e!r}", file=sys.stderr)
+        return math.inf
+
+
+@contextlib.contextmanager
+def validated_edit(compstate: Path, name: str) -> Iterator[Any]:
+    """
+    Edit one of the yaml files within a compstate, as for `edit`, checking
+    that the change doesn't break the compstate.
+
+    The compstate is loaded and validated as it would be after the change, in
+    memory, before the file is written. If the change makes the compstate fail
+    to load, or adds to the validation errors it already has, then nothing is
+    written and `InvalidCompstateError` is raised.
+    """
+    from .compstate_loader import InvalidCompstateError
+
+    def check(changes: Mapping[Path, str]) -> None:
+        error_count = _error_count(compstate, changes)
+        if not error_count:
+            return
+
+        # Problems with the compstate as it is have already been reported above
+        with contextlib.redirect_stderr(io.StringIO()):
+            previous_error_count = _error_count(compstate, {})
+
+        if error_count <= previous_error_count:
+            return
+
+        if error_count == math.inf:
+            raise InvalidCompstateError(
+                "The compstate would fail to load after this change (see above)",
+            )
+
+        raise InvalidCompstateError(
+            f"The compstate would have {error_count} validation errors after "
+            f"this change, up from {previous_error_count} (see above)",
+        )
+
+    with edit_all([compstate / name], check) as (raw_yaml,):
+        yield raw_yaml
 
 
 def _load() -> ruamel.yaml.YAML:
@@ -43,29 +228,268 @@ def _load() -> ruamel.yaml.YAML:
 
 def load(source: Path | IO[str]) -> Any:
     ryaml = _load()
-    return ryaml.load(stream=source)
+    with phase('yaml-load'):
+        return ryaml.load(stream=source)
 
 
-def dump(data: dict[str, Any], dest: Path | IO[str]) -> None:
-    import io
+def _get_fast_loader() -> type[Any]:
+    global _fast_loader
+    if _fast_loader is None:
+        # PyYAML is what sr.comp itself loads compstates with
+        from sr.comp import yaml_loader
+
+        yaml = yaml_loader.yaml
+        base = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+        _fast_loader = type('FastLoader', (base,), {})
+        yaml_loader.add_time_constructor(_fast_loader)
+
+    return _fast_loader
+
+
+def fast_load(source: Path | IO[str]) -> Any:
+    """
+    Load a yaml file for reading only, which is much faster than `load`.
+
+    This uses PyYAML's safe loader (with libyaml where available) and so returns
+    plain data, without the comments and formatting which would be needed to
+    save it back. Times are parsed in the same way as by `load`.
+    """
+    from sr.comp import yaml_loader
+
+    loader = _get_fast_loader()
+    with phase('yaml-load'):
+        if isinstance(source, Path):
+            with source.open() as f:
+                return yaml_loader.yaml.load(f, Loader=loader)
+        return yaml_loader.yaml.load(source, Loader=loader)
+
+
+def serialise(data: dict[str, Any]) -> str:
     ryaml = _load()
 
-    with io.StringIO() as buffer:
+    with phase('yaml-dump'), io.StringIO() as buffer:
         ryaml.dump(data, stream=buffer)
         yaml = buffer.getvalue()
 
-        YAML_1_1_prefix = '%YAML 1.1\n---\n'
-        if yaml.startswith(YAML_1_1_prefix):
-            yaml = yaml[len(YAML_1_1_prefix):]
+    YAML_1_1_prefix = '%YAML 1.1\n---\n'
+    if yaml.startswith(YAML_1_1_prefix):
+        yaml = yaml[len(YAML_1_1_prefix):]
+
+    return "\n".join(x.rstrip() for x in yaml.splitlines()) + "\n"
 
-    yaml = "\n".join(x.rstrip() for x in yaml.splitlines()) + "\n"
+
+def dump(data: dict[str, Any], dest: Path | IO[str]) -> None:
+    yaml = serialise(data)
     if isinstance(dest, Path):
-        dest.write_text(yaml)
+        write_atomically(dest, yaml)
     else:
         dest.write(yaml)
 
 
+def _indent(line: str) -> int:
+    return len(line) - len(line.lstrip(' '))
+
+
+def _is_content(line: str) -> bool:
+    stripped = line.strip()
+    return bool(stripped) and not stripped.startswith('#')
+
+
+def _append_patch(text: str, key: str, new: list[Any] | dict[Any, Any]) -> str | None:
+    """
+    Patch the text of a yaml file to append the given items to the top-level
+    sequence or mapping ``key``, preserving everything else in the file exactly.
+    Returns ``None`` if the file can't safely be patched.
+    """
+    if '\r' in text or '\t' in text or '\n---' in text or text.startswith(('---', '%')):
+        return None
+
+    lines = text.splitlines(keepends=True)
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+
+    key_pattern = re.compile(
+        rf'^{re.escape(key)}:[ ]*(?P<empty>\[\]|\{{\}}|~|null)?[ ]*(?P<comment>#.*)?$',
+    )
+    starts = [n for n, line in enumerate(lines) if key_pattern.match(line)]
+    if len(starts) != 1:
+        return None
+    (start,) = starts
+    key_match = key_pattern.match(lines[start])
+    assert key_match is not None
+
+    # Render the new entries in the same way as a full round-trip would
+    rendered = serialise({key: new}).splitlines(keepends=True)
+
+    first = next((n for n in range(start + 1, len(lines)) if _is_content(lines[n])), None)
+    if (
+        key_match['empty'] is not None or
+        first is None or
+        (_indent(lines[first]) == 0 and not lines[first].startswith('-'))
+    ):
+        # No existing entries, so the whole of the key is replaced
+        if key_match['comment'] is not None:
+            return None
+        end = start + 1
+        fragment = rendered
+    else:
+        # The existing entries determine the indentation to match
+        entry_indent = _indent(lines[first])
+        is_sequence = lines[first].lstrip(' ').startswith('-')
+        if is_sequence != isinstance(new, list) or (entry_indent == 0 and not is_sequence):
+            return None
+
+        block_end = first + 1
+        for line in lines[first + 1:]:
+            if _is_content(line) and _indent(line) < entry_indent:
+                break
+            if _is_content(line) and _indent(line) == 0 and not line.startswith('-'):
+                break
+            block_end += 1
+        end = max(n for n in range(first, block_end) if _is_content(lines[n])) + 1
+
+        fragment = rendered[1:]
+        shift = entry_indent - _indent(fragment[0])
+        if shift < 0:
+            return None
+        fragment = lines[start:end] + [(' ' * shift + x) if x.strip() else x for x in fragment]
+
+    # Check that only the given entries were added, by comparing just this part
+    # of the file, which is cheap even for large files.
+    try:
+        before = fast_load(io.StringIO(''.join(lines[start:end])))[key]
+        after = fast_load(io.StringIO(''.join(fragment)))[key]
+        expected = fast_load(io.StringIO(''.join(rendered)))[key]
+    except Exception:
+        return None
+
+    if not before:
+        before = expected
+    elif isinstance(before, list) and isinstance(expected, list):
+        before.extend(expected)
+    elif isinstance(before, dict) and not before.keys() & expected.keys():
+        before.update(expected)
+    else:
+        return None
+
+    if before != after:
+        return None
+
+    return ''.join(lines[:start] + fragment + lines[end:])
+
+
+def append(path: Path, key: str, new: list[Any] | dict[Any, Any]) -> None:
+    """
+    Append the given items to the top-level sequence (or mapping) ``key`` in a
+    yaml file, creating it if needed.
+
+    Where the edit is a pure append the file's text is patched directly, which
+    is much faster than a full round-trip via `edit` (which is otherwise used).
+    Either way the file is replaced atomically and comments are preserved.
+    """
+    if not new:
+        return
+
+    with locked(path):
+        patched = _append_patch(path.read_text(), key, new)
+        if patched is not None:
+            write_atomically(path, patched)
+            return
+
+    with edit(path) as raw_yaml:
+        existing = raw_yaml.get(key)
+        if not existing:
+            raw_yaml[key] = new
+        elif isinstance(existing, list):
+            existing.extend(new)
+        else:
+            existing.update(new)
+
+
+def yaml_files(path: Path) -> list[Path]:
+    """The yaml files at the given path, which may be a file or a directory."""
+    if not path.is_dir():
+        return [path]
+
+    paths: list[Path] = []
+    for dirpath, dirnames, filenames in os.walk(path):
+        # Skip .git and the like
+        dirnames[:] = sorted(x for x in dirnames if not x.startswith('.'))
+        paths.extend(Path(dirpath) / x for x in sorted(filenames) if x.endswith('.yaml'))
+    return paths
+
+
+def check_file(path: Path, name: str) -> str | None:
+    """
+    Round-trip the given file in memory, returning a diff against its current
+    contents if it isn't in canonical form (or ``None`` if it is).
+    """
+    import difflib
+
+    original = path.read_text()
+    try:
+        updated = serialise(load(io.StringIO(original)))
+    except Exception as e:
+        return f"{name}: failed to load: {e}\n"
+
+    if updated == original:
+        return None
+
+    return ''.join(difflib.unified_diff(
+        original.splitlines(keepends=True),
+        updated.splitlines(keepends=True),
+        f'a/{name}',
+        f'b/{name}',
+    ))
+
+
+def check_all(paths: Sequence[Path], names: Sequence[str]) -> list[str | None]:
+    """
+    `check_file` each of the given files, using a pool of worker processes if there
+    are enough files for that to be worthwhile.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from concurrent.futures.process import BrokenProcessPool
+
+    from .parallel_yaml import available_cpus, PARALLEL_THRESHOLD
+
+    workers = min(available_cpus(), len(paths))
+    if workers >= 2 and len(paths) >= PARALLEL_THRESHOLD:
+        chunksize = max(1, len(paths) // (workers * 4))
+        try:
+            with ProcessPoolExecutor(workers) as executor:
+                return list(executor.map(check_file, paths, names, chunksize=chunksize))
+        except (OSError, BrokenProcessPool):
+            pass
+
+    return [check_file(path, name) for path, name in zip(paths, names)]
+
+
+def command_check(path: Path) -> None:
+    paths = yaml_files(path)
+    root = path if path.is_dir() else path.parent
+    names = [x.relative_to(root).as_posix() for x in paths]
+
+    results = check_all(paths, names)
+
+    failures = [(name, diff) for name, diff in zip(names, results) if diff is not None]
+    for _, diff in failures:
+        print(diff, end='')
+
+    if failures:
+        exit(
+            f"{len(failures)} of {len(paths)} files are not in canonical form:\n" +
+            ''.join(f"  {name}\n" for name, _ in failures),
+        )
+
+    print(f"All {len(paths)} files are in canonical form.")
+
+
 def command(settings: argparse.Namespace) -> None:
+    if settings.check:
+        command_check(settings.file_path)
+        return
+
     with edit(settings.file_path):
         pass
 
@@ -79,7 +503,15 @@ def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser
     )
     parser.add_argument(
         'file_path',
-        help="target file to round trip",
+        help="target file to round trip (or, with --check, a compstate to check)",
         type=Path,
     )
+    parser.add_argument(
+        '--check',
+        action='store_true',
+        help=(
+            "report (with a diff) any yaml files which are not in canonical form, "
+            "rather than rewriting them"
+        ),
+    )
     parser.set_defaults(func=command)
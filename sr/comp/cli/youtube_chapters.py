@@ -24,11 +24,11 @@ def _start_time(slot: MatchSlot) -> datetime.datetime:
 
 
 def command(settings: argparse.Namespace) -> None:
-    from sr.comp.comp import SRComp
+    from sr.comp.cli.compstate_loader import load
 
     match_number: int = settings.match_number
 
-    comp = SRComp(settings.compstate)
+    comp = load(settings.compstate)
 
     slots = comp.schedule.matches[match_number:]
     # Yes, this doesn't account for the game not aligning within the slot.
@@ -75,9 +75,14 @@ def command(settings: argparse.Namespace) -> None:
     print("Note: also add the outtro/wrapup!", file=sys.stderr)
 
 
-def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
-    from dateutil.parser import parse as parse_date
+def parse_date(text: str) -> datetime.datetime:
+    # Wrapper to defer the (relatively slow) import until arguments are parsed
+    from dateutil.parser import parse
+
+    return parse(text)
 
+
+def add_subparser(subparsers: argparse._SubParsersAction[argparse.ArgumentParser]) -> None:
     help_msg = (
         "Determine the \"chapter\" timings for a Youtube livestream based "
         "on the match timings."
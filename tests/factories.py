@@ -4,12 +4,16 @@ import contextlib
 import datetime
 import subprocess
 import tempfile
+import textwrap
+import unittest
 from collections.abc import Iterator
 from pathlib import Path
 from typing import Literal, overload, Sequence
+from unittest import mock
 
 from dateutil.tz import UTC
 
+from sr.comp.cli.compstate_loader import CACHE_DIR_ENV
 from sr.comp.knockout_scheduler.base_scheduler import (
     DEFAULT_KNOCKOUT_BRACKET_NAME,
 )
@@ -103,3 +107,126 @@ def dummy_compstate(revision: str | None = None) -> Iterator[Path]:
             _git('checkout', '--quiet', revision)
 
         yield Path(tempdir)
+
+
+def use_temporary_cache_dir(test_case: unittest.TestCase) -> Path:
+    """
+    Point the on-disk caches (including those of any subprocesses) at a
+    temporary directory for the duration of the given test, rather than at
+    the user's real cache.
+    """
+    cache_dir = tempfile.TemporaryDirectory()
+    test_case.addCleanup(cache_dir.cleanup)
+
+    patcher = mock.patch.dict('os.environ', {CACHE_DIR_ENV: cache_dir.name})
+    patcher.start()
+    test_case.addCleanup(patcher.stop)
+
+    return Path(cache_dir.name)
+
+
+MINIMAL_COMPSTATE = {
+    'arenas.yaml': """
+        arenas:
+          A: {display_name: Arena A, colour: '#ff0000'}
+        corners:
+          0: {colour: '#00ff00'}
+          1: {colour: '#0000ff'}
+          2: {colour: '#ff00ff'}
+          3: {colour: '#ffff00'}
+    """,
+    'teams.yaml': """
+        teams:
+          AAA: {name: Team A, rookie: false}
+          BBB: {name: Team B, rookie: false}
+          CCC: {name: Team C, rookie: true}
+          DDD: {name: Team D, rookie: false}
+    """,
+    'schedule.yaml': """
+        match_slot_lengths: {pre: 60, match: 180, post: 60, total: 300}
+        staging:
+          opens: 300
+          closes: 120
+          duration: 180
+          signal_shepherds: {Blue: 241}
+          signal_teams: 240
+        timezone: Europe/London
+        delays: []
+        match_periods:
+          league:
+          - start_time: 2014-04-26 13:00:00+01:00
+            end_time: 2014-04-26 17:30:00+01:00
+            description: A league
+          knockout:
+          - start_time: 2014-04-27 14:30:00+01:00
+            end_time: 2014-04-27 17:20:00+01:00
+            description: A knockout
+        league:
+          extra_spacing: []
+        knockout:
+          round_spacing: 300
+          final_delay: 300
+          single_arena: {rounds: 2, arenas: [A]}
+    """,
+    'league.yaml': """
+        matches:
+          0:
+            A: [AAA, BBB, CCC, DDD]
+    """,
+    'layout.yaml': """
+        teams:
+        - name: all
+          display_name: Everyone
+          teams: [AAA, BBB, CCC, DDD]
+    """,
+    'shepherding.yaml': """
+        shepherds:
+        - name: Blue
+          colour: blue
+          regions: [all]
+    """,
+    'scoring/score.py': """
+        class Scorer:
+            def __init__(self, teams_data, arena_data):
+                self.teams_data = teams_data
+
+            def calculate_scores(self):
+                return {tla: 0 for tla in self.teams_data}
+    """,
+}
+
+
+@contextlib.contextmanager
+def minimal_compstate(*omit: str) -> Iterator[Path]:
+    """
+    A small but valid compstate (one league match and a final), optionally
+    without some of its files, as a git repository.
+    """
+    with tempfile.TemporaryDirectory() as tempdir:
+        root = Path(tempdir)
+        for name, content in MINIMAL_COMPSTATE.items():
+            if name in omit:
+                continue
+            path = root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(textwrap.dedent(content).lstrip())
+
+        for name in ('league', 'knockout', 'tiebreaker'):
+            (root / name).mkdir()
+
+        def _git(*args: str) -> None:
+            subprocess.check_call(['git', *args], cwd=root)
+
+        _git('init', '--quiet')
+        _git('add', '.')
+        _git(
+            '-c',
+            'user.name=Test',
+            '-c',
+            'user.email=test@example.com',
+            'commit',
+            '--quiet',
+            '--message=Initial',
+        )
+
+        yield root
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import unittest
+
+from sr.comp.cli.batch import Invocation, output_filename, parse_script
+
+
+class BatchScriptTests(unittest.TestCase):
+    def test_parse_script(self) -> None:
+        invocations = parse_script([
+            '# A comment\n',
+            'show-league-table\n',
+            '\n',
+            "show-schedule --all  # trailing comment\n",
+            "youtube-chapters --start-time '2014-04-26 12:45'\n",
+        ])
+
+        self.assertEqual(
+            [
+                Invocation(2, ['show-league-table']),
+                Invocation(4, ['show-schedule', '--all']),
+                Invocation(5, ['youtube-chapters', '--start-time', '2014-04-26 12:45']),
+            ],
+            invocations,
+        )
+
+    def test_parse_script_unsupported_command(self) -> None:
+        with self.assertRaisesRegex(ValueError, r"Line 2: 'deploy'"):
+            parse_script(['summary', 'deploy'])
+
+    def test_output_filename(self) -> None:
+        filename = output_filename(Invocation(7, ['show-schedule', '--times=game']))
+
+        self.assertEqual('007-show-schedule-times-game.txt', filename)
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import tempfile
+import unittest
+from pathlib import Path
+
+from sr.comp.cli.command_line import (
+    argument_parser,
+    COMMANDS,
+    find_command,
+    main,
+)
+
+
+class CommandLineTests(unittest.TestCase):
+    def get_command_names(self, commands: list[str] | None = None) -> list[str]:
+        parser = argument_parser(commands)
+        (subparsers,) = parser._subparsers._group_actions  # type: ignore[union-attr]
+        return list(subparsers.choices.keys())  # type: ignore[union-attr]
+
+    def test_registry_matches_parsers(self) -> None:
+        self.assertEqual(
+            ['list-commands', *COMMANDS.keys()],
+            self.get_command_names(),
+            "Command registry doesn't match the names the modules register",
+        )
+
+    def test_limited_parser(self) -> None:
+        self.assertEqual(
+            ['list-commands', 'validate'],
+            self.get_command_names(['validate']),
+        )
+
+    def test_find_command(self) -> None:
+        self.assertEqual('validate', find_command(['validate', 'summary']))
+        self.assertEqual('list-commands', find_command(['list-commands']))
+        self.assertIsNone(find_command(['--help']))
+
+    def test_profile(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            profile = Path(tempdir) / 'list-commands.prof'
+            stdout = io.StringIO()
+            stderr = io.StringIO()
+
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                main(['--profile', str(profile), '--profile-memory', 'list-commands'])
+
+            self.assertTrue(profile.exists(), "Should have written profile stats")
+
+        self.assertIn('list-commands', stdout.getvalue())
+        self.assertIn('function calls', stderr.getvalue())
+        self.assertIn('allocation sites', stderr.getvalue())
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import datetime
+import http.server
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from typing import Any
+
+from sr.comp.cli import comp_api
+from sr.comp.match_period import MatchType
+
+MATCH = {
+    'num': 0,
+    'display_name': "Match 0",
+    'arena': 'A',
+    'teams': ['ABC', None],
+    'type': 'league',
+    'times': {
+        'slot': {
+            'start': '2026-10-18T13:00:00+01:00',
+            'end': '2026-10-18T13:05:00+01:00',
+        },
+    },
+}
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    server: StandInServer
+
+    def do_GET(self) -> None:
+        self.server.requests.append((self.path, self.headers.get('If-None-Match')))
+
+        try:
+            body, etag = self.server.responses[self.path]
+        except KeyError:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if etag is not None and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        if etag is not None:
+            self.send_header('ETag', etag)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+class StandInServer(http.server.ThreadingHTTPServer):
+    """A stand-in for srcomp-http, serving fixed responses."""
+
+    def __init__(self) -> None:
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.responses: dict[str, tuple[Any, str | None]] = {}
+        self.requests: list[tuple[str, str | None]] = []
+
+
+class CompAPITests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.server = StandInServer()
+        thread = threading.Thread(
+            target=self.server.serve_forever,
+            kwargs={'poll_interval': 0.01},
+            daemon=True,
+        )
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.cache_path = Path(tempdir.name)
+
+        host, port = self.server.server_address[:2]
+        self.url = f'http://{host!s}:{port}/comp-api'
+
+    def get(self, path: str) -> Any:
+        with comp_api.CompAPI(self.url, self.cache_path) as api:
+            return api.get(path)
+
+    def test_get(self) -> None:
+        self.server.responses['/comp-api/state'] = ({'state': 'abc'}, None)
+
+        self.assertEqual({'state': 'abc'}, self.get('state'))
+
+    def test_trailing_slash(self) -> None:
+        self.server.responses['/comp-api/state'] = ({'state': 'abc'}, None)
+        self.url += '/'
+
+        self.assertEqual({'state': 'abc'}, self.get('state'))
+
+    def test_revalidates_cached_response(self) -> None:
+        self.server.responses['/comp-api/arenas'] = ({'arenas': {}}, '"1"')
+        self.get('arenas')
+
+        # The stand-in only sends the (changed) body when the ETag differs
+        self.server.responses['/comp-api/arenas'] = ({'arenas': {'A': {}}}, '"1"')
+
+        self.assertEqual({'arenas': {}}, self.get('arenas'))
+        self.assertEqual(
+            [('/comp-api/arenas', None), ('/comp-api/arenas', '"1"')],
+            self.server.requests,
+        )
+
+    def test_changed_response(self) -> None:
+        self.server.responses['/comp-api/arenas'] = ({'arenas': {}}, '"1"')
+        self.get('arenas')
+
+        self.server.responses['/comp-api/arenas'] = ({'arenas': {'A': {}}}, '"2"')
+
+        self.assertEqual({'arenas': {'A': {}}}, self.get('arenas'))
+        self.assertEqual({'arenas': {'A': {}}}, self.get('arenas'))
+        self.assertEqual('"2"', self.server.requests[-1][1])
+
+    def test_without_etag(self) -> None:
+        self.server.responses['/comp-api/current'] = ({'matches': []}, None)
+
+        self.get('current')
+        self.get('current')
+
+        self.assertEqual([None, None], [x for _, x in self.server.requests])
+        self.assertEqual([], list(self.cache_path.iterdir()))
+
+    def test_without_cache(self) -> None:
+        self.server.responses['/comp-api/arenas'] = ({'arenas': {}}, '"1"')
+
+        with comp_api.CompAPI(self.url, cache_path=None) as api:
+            api.get('arenas')
+            self.assertEqual({'arenas': {}}, api.get('arenas'))
+
+        self.assertEqual([None, None], [x for _, x in self.server.requests])
+
+    def test_get_all(self) -> None:
+        self.server.responses['/comp-api/state'] = ({'state': 'abc'}, None)
+        self.server.responses['/comp-api/arenas'] = ({'arenas': {}}, '"1"')
+
+        with comp_api.CompAPI(self.url, self.cache_path) as api:
+            self.assertEqual(
+                [{'arenas': {}}, {'state': 'abc'}],
+                api.get_all(('arenas', 'state')),
+            )
+
+    def test_session_per_thread(self) -> None:
+        with comp_api.CompAPI(self.url, self.cache_path) as api:
+            sessions = [api._session()]
+            thread = threading.Thread(target=lambda: sessions.append(api._session()))
+            thread.start()
+            thread.join()
+
+            self.assertIs(sessions[0], api._session())
+            self.assertIsNot(sessions[0], sessions[1])
+            self.assertIs(
+                sessions[0].get_adapter(self.url),
+                sessions[1].get_adapter(self.url),
+                "Connections should be pooled across threads",
+            )
+
+    def test_error(self) -> None:
+        with self.assertRaises(comp_api.CompAPIError):
+            self.get('bacon')
+
+
+class ParseTests(unittest.TestCase):
+    def test_parse_match(self) -> None:
+        match = comp_api.parse_match(MATCH)
+
+        self.assertEqual(0, match.num)
+        self.assertEqual(['ABC', None], match.teams)
+        self.assertEqual(MatchType.league, match.type)
+        self.assertEqual(
+            datetime.datetime(2026, 10, 18, 12, 5, tzinfo=datetime.timezone.utc),
+            match.end_time,
+        )
+
+    def test_parse_matches(self) -> None:
+        slots = comp_api.parse_matches([
+            MATCH,
+            {**MATCH, 'arena': 'B'},
+            {**MATCH, 'num': 1},
+        ])
+
+        self.assertEqual([['A', 'B'], ['A']], [list(x.keys()) for x in slots])
+
+    def test_parse_periods(self) -> None:
+        slots = comp_api.parse_matches([MATCH, {**MATCH, 'num': 1}, {**MATCH, 'num': 2}])
+
+        (period,) = comp_api.parse_periods(
+            [{
+                'type': 'league',
+                'description': "Friday",
+                'start_time': '2026-10-18T13:00:00+01:00',
+                'end_time': '2026-10-18T17:00:00+01:00',
+                'max_end_time': '2026-10-18T17:30:00+01:00',
+                'matches': {'first_num': 1, 'last_num': 2},
+            }],
+            slots,
+        )
+
+        self.assertEqual("Friday", period.description)
+        self.assertEqual(slots[1:], period.matches)
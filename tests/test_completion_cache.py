@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import unittest
+
+from sr.comp.cli.completion_cache import generate
+
+
+class GenerateTests(unittest.TestCase):
+    def test_without_compstate(self) -> None:
+        output = generate({})
+
+        self.assertIn("_SRCOMP_POSITIONAL_VALUES=''", output)
+        self.assertIn(
+            "\t[show-schedule]='-h --help --from-api --all --seconds --times --limit --watch'",
+            output,
+        )
+        self.assertIn("\t['show-schedule --seconds']='always never auto'", output)
+        self.assertIn("\t[--timings]=json", output)
+
+    def test_with_compstate_values(self) -> None:
+        output = generate({
+            'tlas': ['ABC', 'DEF'],
+            'arenas': ['A', 'B'],
+            'matches': ['0', '1'],
+            'locations': ['a-side', 'b-side'],
+        })
+
+        self.assertIn("_SRCOMP_POSITIONAL_VALUES='ABC DEF A B 0 1'", output)
+        self.assertIn("\t['for-each-match --arena']='A B'", output)
+        self.assertIn("\t['print-schedule --locations']='a-side b-side'", output)
+        self.assertIn("\t['print-schedule --locations']=1", output)
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import pickle
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+from sr.comp.cli import compstate_loader
+
+from .factories import use_temporary_cache_dir
+
+
+class ParsedYamlCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.path = Path(tempdir.name) / 'teams.yaml'
+        self.path.write_text('teams: {}\n')
+
+        self.parsed: list[Path] = []
+
+    def parse(self, path: Path) -> Any:
+        self.parsed.append(path)
+        return {'content': path.read_text()}
+
+    def test_only_reparses_changed_files(self) -> None:
+        cache = compstate_loader.ParsedYamlCache(self.parse)
+
+        first = cache.load(self.path)
+        second = cache.load(self.path)
+
+        self.assertEqual([self.path], self.parsed)
+        self.assertEqual(first, second)
+        self.assertIsNot(first, second, "Callers should get their own copies")
+
+        self.path.write_text('teams: {ABC: {}}\n')
+
+        self.assertEqual({'content': 'teams: {ABC: {}}\n'}, cache.load(self.path))
+        self.assertEqual([self.path, self.path], self.parsed)
+
+    def test_yaml_hook(self) -> None:
+        from sr.comp import yaml_loader
+
+        with compstate_loader.yaml_hook(self.parse):
+            data = yaml_loader.load(self.path)
+
+        self.assertEqual({'content': 'teams: {}\n'}, data)
+        self.assertEqual({'teams': {}}, yaml_loader.load(self.path))
+
+    def test_unhooked_yaml_load(self) -> None:
+        with compstate_loader.yaml_hook(self.parse):
+            with compstate_loader.yaml_hook(self.parse):
+                data = compstate_loader.unhooked_yaml_load(self.path)
+
+        self.assertEqual({'teams': {}}, data)
+        self.assertEqual([], self.parsed)
+
+
+class GitCompstateTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.root = Path(tempdir.name)
+
+        self.git('init', '--quiet')
+        (self.root / 'teams.yaml').write_text('teams: {}\n')
+        self.commit()
+
+    def git(self, *args: str) -> None:
+        subprocess.check_call(['git', *args], cwd=self.root)
+
+    def commit(self) -> None:
+        self.git('add', '.')
+        self.git(
+            '-c',
+            'user.name=Test',
+            '-c',
+            'user.email=test@example.com',
+            'commit',
+            '--quiet',
+            '--allow-empty',
+            '--message=Commit',
+        )
+
+
+class CompstateSignatureTests(GitCompstateTestCase):
+    def test_unchanged(self) -> None:
+        self.assertEqual(
+            compstate_loader.signature(self.root),
+            compstate_loader.signature(self.root),
+        )
+
+    def test_file_changed(self) -> None:
+        before = compstate_loader.signature(self.root)
+
+        (self.root / 'teams.yaml').write_text('teams: {ABC: {}}\n')
+
+        self.assertNotEqual(before, compstate_loader.signature(self.root))
+
+    def test_revision_changed(self) -> None:
+        before = compstate_loader.signature(self.root)
+
+        self.commit()
+
+        self.assertNotEqual(before, compstate_loader.signature(self.root))
+
+    def test_stale_without_cache(self) -> None:
+        self.assertTrue(compstate_loader.is_stale(self.root))
+
+    def test_changed_paths(self) -> None:
+        (self.root / 'league').mkdir()
+        before = compstate_loader.signature(self.root)
+
+        (self.root / 'league' / 'A.yaml').write_text('{}\n')
+
+        self.assertEqual(
+            {'league/A.yaml'},
+            compstate_loader.changed_paths(
+                self.root,
+                before,
+                compstate_loader.signature(self.root),
+            ),
+        )
+
+
+class DiskCacheTests(GitCompstateTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        use_temporary_cache_dir(self)
+
+        self.parsed: list[Path] = []
+
+    def parse(self, path: Path) -> Any:
+        self.parsed.append(path)
+        return {'content': path.read_text()}
+
+    def load(self, name: str = 'teams.yaml') -> Any:
+        from sr.comp import yaml_loader
+
+        with compstate_loader.yaml_hook(self.parse):
+            disk_cache = compstate_loader.DiskCache.for_compstate(self.root)
+            if disk_cache is None:
+                return yaml_loader.load(self.root / name)
+
+            with disk_cache.serving():
+                data = yaml_loader.load(self.root / name)
+
+        compstate_loader.save_disk_caches()
+        return data
+
+    def test_key_unchanged(self) -> None:
+        self.assertEqual(
+            compstate_loader.disk_cache_key(self.root),
+            compstate_loader.disk_cache_key(self.root),
+        )
+
+    def test_key_file_changed(self) -> None:
+        before = compstate_loader.disk_cache_key(self.root)
+
+        (self.root / 'teams.yaml').write_text('teams: {ABC: {}}\n')
+
+        self.assertNotEqual(before, compstate_loader.disk_cache_key(self.root))
+
+    def test_key_untracked_file(self) -> None:
+        before = compstate_loader.disk_cache_key(self.root)
+
+        (self.root / 'new.yaml').write_text('{}\n')
+
+        self.assertNotEqual(before, compstate_loader.disk_cache_key(self.root))
+
+    def test_key_revision_changed(self) -> None:
+        before = compstate_loader.disk_cache_key(self.root)
+
+        self.commit()
+
+        self.assertNotEqual(before, compstate_loader.disk_cache_key(self.root))
+
+    def test_key_not_a_repository(self) -> None:
+        with tempfile.TemporaryDirectory() as root:
+            self.assertIsNone(compstate_loader.disk_cache_key(Path(root)))
+
+    def test_reuses_parsed_files(self) -> None:
+        first = self.load()
+        second = self.load()
+
+        self.assertEqual({'content': 'teams: {}\n'}, first)
+        self.assertEqual(first, second)
+        self.assertEqual([self.root / 'teams.yaml'], self.parsed)
+
+    def test_reparses_after_change(self) -> None:
+        self.load()
+
+        (self.root / 'teams.yaml').write_text('teams: {ABC: {}}\n')
+
+        self.assertEqual({'content': 'teams: {ABC: {}}\n'}, self.load())
+        self.assertEqual(2, len(self.parsed))
+
+    def test_extends_cache(self) -> None:
+        (self.root / 'arenas.yaml').write_text('arenas: {}\n')
+        self.commit()
+
+        self.load('teams.yaml')
+        self.load('arenas.yaml')
+        self.load('teams.yaml')
+        self.load('arenas.yaml')
+
+        self.assertEqual(
+            [self.root / 'teams.yaml', self.root / 'arenas.yaml'],
+            self.parsed,
+        )
+
+    def test_writes_once(self) -> None:
+        (self.root / 'arenas.yaml').write_text('arenas: {}\n')
+        self.commit()
+
+        from sr.comp import yaml_loader
+
+        disk_cache = compstate_loader.DiskCache.for_compstate(self.root)
+        assert disk_cache is not None
+
+        with compstate_loader.yaml_hook(self.parse), mock.patch(
+            'sr.comp.cli.compstate_loader._write_disk_cache',
+        ) as write:
+            for name in ('teams.yaml', 'arenas.yaml'):
+                with disk_cache.serving():
+                    yaml_loader.load(self.root / name)
+
+            write.assert_not_called()
+            compstate_loader.save_disk_caches()
+            compstate_loader.save_disk_caches()
+
+        write.assert_called_once_with(disk_cache.path, disk_cache.key, mock.ANY)
+        self.assertEqual({'teams.yaml', 'arenas.yaml'}, set(write.call_args.args[2]))
+
+    def test_unexpected_cache_contents(self) -> None:
+        disk_cache = compstate_loader.DiskCache.for_compstate(self.root)
+        assert disk_cache is not None
+        disk_cache.path.parent.mkdir(parents=True, exist_ok=True)
+        disk_cache.path.write_bytes(pickle.dumps(['not', 'a', 'dict']))
+
+        self.assertEqual({'content': 'teams: {}\n'}, self.load())
+        self.assertEqual([self.root / 'teams.yaml'], self.parsed)
+
+    def test_disabled(self) -> None:
+        with mock.patch.dict('os.environ', {compstate_loader.CACHE_DIR_ENV: ''}):
+            self.load()
+            self.load()
+
+        self.assertEqual(2, len(self.parsed))
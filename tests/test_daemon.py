@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import contextlib
+import json
+import os
+import signal
+import subprocess
+import unittest
+
+from sr.comp.cli.command_line import DAEMON_ENV
+from sr.comp.cli.daemon import handle
+
+from .factories import minimal_compstate, use_temporary_cache_dir
+
+
+class DaemonHandleTests(unittest.TestCase):
+    def test_invalid_request(self) -> None:
+        response = handle(b'not json\n')
+
+        self.assertEqual(2, response['exit_code'])
+        self.assertIn("Invalid request", response['stderr'])
+
+    def test_unsupported_command(self) -> None:
+        request = {'args': ['deploy', '.'], 'cwd': '.'}
+
+        response = handle(json.dumps(request).encode())
+
+        self.assertEqual(2, response['exit_code'])
+        self.assertIn("not supported", response['stderr'])
+
+    def test_argument_errors(self) -> None:
+        request = {'args': ['validate', '--bogus', 'compstate'], 'cwd': '.'}
+
+        response = handle(json.dumps(request).encode())
+
+        self.assertEqual(2, response['exit_code'])
+        self.assertEqual('', response['stdout'])
+        self.assertIn("unrecognized arguments: --bogus", response['stderr'])
+
+    def test_global_options(self) -> None:
+        request = {'args': ['--timings', 'json', 'validate', 'compstate'], 'cwd': '.'}
+
+        response = handle(json.dumps(request).encode())
+
+        self.assertEqual(2, response['exit_code'])
+        self.assertIn("Global options are not supported", response['stderr'])
+
+
+class DaemonTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        use_temporary_cache_dir(self)
+
+        stack = contextlib.ExitStack()
+        self.addCleanup(stack.close)
+        self.compstate = stack.enter_context(minimal_compstate())
+
+        self.socket_path = self.compstate.parent / 'srcomp.sock'
+
+    def start_daemon(self) -> None:
+        daemon = subprocess.Popen(
+            [
+                'srcomp',
+                'daemon',
+                str(self.compstate),
+                f'--socket={self.socket_path}',
+                '--poll-interval=0.1',
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+
+        def stop() -> None:
+            daemon.send_signal(signal.SIGINT)
+            daemon.wait(timeout=10)
+            assert daemon.stdout is not None
+            daemon.stdout.close()
+
+        self.addCleanup(stop)
+
+        assert daemon.stdout is not None
+        self.assertIn("Listening on", daemon.stdout.readline())
+
+    def srcomp(self, *args: str) -> subprocess.CompletedProcess[str]:
+        return subprocess.run(
+            ['srcomp', *args],
+            env={**os.environ, DAEMON_ENV: str(self.socket_path)},
+            capture_output=True,
+            text=True,
+        )
+
+    def test_runs_command(self) -> None:
+        self.start_daemon()
+
+        result = self.srcomp('show-schedule', str(self.compstate), '--all')
+
+        self.assertEqual('', result.stderr, "Should have used the daemon")
+        self.assertEqual(0, result.returncode)
+        self.assertEqual(
+            [
+                " Num Time  |        Arena A        |   Display Name   |",
+                "   0 13:00 | AAA : BBB : CCC : DDD |     Match 0      |",
+                "   1 14:30 | ??? : ??? : ??? : ??? |    Final (#1)    |",
+            ],
+            result.stdout.splitlines(),
+        )
+
+    def test_command_errors(self) -> None:
+        self.start_daemon()
+
+        result = self.srcomp('validate', str(self.compstate), '--bogus')
+
+        self.assertEqual(2, result.returncode)
+        self.assertIn("unrecognized arguments: --bogus", result.stderr)
+        self.assertNotIn("Warning", result.stderr, "Should have used the daemon")
+
+    def test_global_options_run_locally(self) -> None:
+        # No daemon is running, so using it would result in a warning
+        result = self.srcomp('--timings', 'json', 'validate', str(self.compstate))
+
+        self.assertEqual(0, result.returncode)
+        self.assertNotIn("Warning", result.stderr)
+        self.assertIn('"phases"', result.stderr, "Timings should come from this process")
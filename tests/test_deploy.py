@@ -0,0 +1,435 @@
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+import unittest
+from typing import Any
+from unittest import mock
+
+import requests
+
+from sr.comp.cli.deploy import (
+    adaptive_timeout,
+    API_LATENCY_FACTOR,
+    check_host_states,
+    get_current_states,
+    run_deployments,
+    UnableToGetStateError,
+)
+from sr.comp.cli.interaction_utils import (
+    CLIInteractions,
+    FatalCommandError,
+    UserInteractions,
+)
+
+
+class RecordingInteractions(CLIInteractions):
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+
+    def format_strong(self, message: str) -> str:
+        return message
+
+    def format_strong_ok(self, message: str) -> str:
+        return message
+
+    def format_error(self, message: str) -> str:
+        return message
+
+    def message(self, message: str) -> None:
+        self.messages.append(message)
+
+
+class RunDeploymentsTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.compstate = mock.Mock()
+        self.compstate.rev_parse.return_value = 'abc123'
+        self.interactions = RecordingInteractions()
+        self.retcodes = {'a': 0, 'b': 0, 'c': 0}
+
+    def deploy_to(
+        self,
+        compstate: Any,
+        host: str,
+        revision: str,
+        verbose: bool,
+        interactions: UserInteractions[str],
+    ) -> int:
+        interactions.show_strong(f"Deploying to {host}:")
+        interactions.show_info(f"{host} at {revision}")
+        return self.retcodes[host]
+
+    def run_deployments(self, jobs: int) -> mock.Mock:
+        args = argparse.Namespace(
+            skip_host_check=True,
+            verbose=False,
+            jobs=jobs,
+            host_check_timeout=None,
+        )
+        with mock.patch(
+            'sr.comp.cli.deploy.deploy_to',
+            side_effect=self.deploy_to,
+        ) as deploy_to:
+            run_deployments(args, self.compstate, ['a', 'b', 'c'], self.interactions)
+        return deploy_to
+
+    def test_serial(self) -> None:
+        self.run_deployments(jobs=1)
+
+        self.assertEqual(
+            [
+                "Deploying to a:",
+                "a at abc123",
+                "Deploying to b:",
+                "b at abc123",
+                "Deploying to c:",
+                "c at abc123",
+                "Done",
+            ],
+            self.interactions.messages,
+        )
+
+    def test_serial_checks_hosts_up_front(self) -> None:
+        args = argparse.Namespace(
+            skip_host_check=False,
+            verbose=False,
+            jobs=1,
+            host_check_timeout=None,
+        )
+
+        def check_host_states(compstate: Any, hosts: list[str], *args: Any) -> dict[str, bool]:
+            self.interactions.show_info(f"Checked {', '.join(hosts)}")
+            return {host: host == 'b' for host in hosts}
+
+        with mock.patch(
+            'sr.comp.cli.deploy.deploy_to',
+            side_effect=self.deploy_to,
+        ), mock.patch(
+            'sr.comp.cli.deploy.check_host_states',
+            side_effect=check_host_states,
+        ):
+            run_deployments(args, self.compstate, ['a', 'b', 'c'], self.interactions)
+
+        self.assertEqual(
+            [
+                "Checked a, b, c",
+                "Skipping b.",
+                "Deploying to a:",
+                "a at abc123",
+                "Deploying to c:",
+                "c at abc123",
+                "Done",
+            ],
+            self.interactions.messages,
+        )
+
+    def test_serial_failure(self) -> None:
+        self.retcodes['b'] = 3
+
+        with self.assertRaises(FatalCommandError) as cm:
+            self.run_deployments(jobs=1)
+
+        self.assertEqual(3, cm.exception.exit_code)
+        self.assertNotIn("Deploying to c:", self.interactions.messages)
+
+    def test_concurrent(self) -> None:
+        self.run_deployments(jobs=3)
+
+        messages = self.interactions.messages
+        self.assertEqual("Deploying to 3 hosts, up to 3 at once.", messages[0])
+        self.assertEqual("Done", messages[-1])
+
+        # Each host's output is kept together
+        for host in 'abc':
+            index = messages.index(f"Deploying to {host}:")
+            self.assertEqual(f"{host} at abc123", messages[index + 1])
+
+    def all_at_once(self) -> mock._patch[mock.Mock]:
+        barrier = threading.Barrier(3, timeout=5)
+        original = self.deploy_to
+
+        def deploy_to(*args: Any) -> int:
+            # Fails (raising BrokenBarrierError) unless all run at once
+            barrier.wait()
+            return original(*args)
+
+        return mock.patch.object(self, 'deploy_to', side_effect=deploy_to)
+
+    def test_concurrent_runs_at_once(self) -> None:
+        with self.all_at_once():
+            self.run_deployments(jobs=3)
+
+    def test_concurrent_failure(self) -> None:
+        self.retcodes['b'] = 3
+        self.retcodes['c'] = 4
+
+        with self.assertRaises(FatalCommandError) as cm, self.all_at_once():
+            self.run_deployments(jobs=3)
+
+        self.assertEqual(3, cm.exception.exit_code)
+        self.assertIn(
+            "Failed to deploy to 'b' (exit status: 3).",
+            self.interactions.messages,
+        )
+        self.assertIn(
+            "Failed to deploy to 'c' (exit status: 4).",
+            self.interactions.messages,
+        )
+        self.assertNotIn("Done", self.interactions.messages)
+
+    def test_concurrent_failure_skips_pending(self) -> None:
+        # Whichever of these finishes first, 'c' is only started after a failure
+        self.retcodes['a'] = 3
+        self.retcodes['b'] = 3
+
+        with self.assertRaises(FatalCommandError):
+            self.run_deployments(jobs=2)
+
+        self.assertNotIn("Deploying to c:", self.interactions.messages)
+        self.assertIn("Skipped c due to failures.", self.interactions.messages)
+
+    def test_concurrent_fatal_error(self) -> None:
+        def deploy_to(
+            compstate: Any,
+            host: str,
+            revision: str,
+            verbose: bool,
+            interactions: UserInteractions[str],
+        ) -> int:
+            with interactions.make_fatal(f"Failed to push to {host}."):
+                raise RuntimeError
+
+        with mock.patch.object(self, 'deploy_to', side_effect=deploy_to):
+            with self.assertRaises(FatalCommandError) as cm:
+                self.run_deployments(jobs=3)
+
+        self.assertEqual(1, cm.exception.exit_code)
+        self.assertIn("Failed to push to a.", self.interactions.messages)
+
+    def test_concurrent_unexpected_error(self) -> None:
+        barrier = threading.Barrier(2, timeout=5)
+        original = self.deploy_to
+
+        def deploy_to(*args: Any) -> int:
+            host = args[1]
+            if host == 'c':
+                return original(*args)
+
+            barrier.wait()
+            if host == 'a':
+                raise OSError("Connection refused")
+
+            # Finish only once the failure of 'a' has been reported
+            for _ in range(50):
+                if "Failed to deploy to 'a' (exit status: 1)." in self.interactions.messages:
+                    break
+                time.sleep(0.1)
+            return original(*args)
+
+        with mock.patch.object(self, 'deploy_to', side_effect=deploy_to):
+            with self.assertRaises(FatalCommandError) as cm:
+                self.run_deployments(jobs=2)
+
+        messages = self.interactions.messages
+        self.assertEqual(1, cm.exception.exit_code)
+        self.assertIn(
+            "Error deploying to a: OSError('Connection refused')",
+            messages,
+        )
+        self.assertIn("Failed to deploy to 'a' (exit status: 1).", messages)
+        # The output of the host which was already deploying is kept
+        self.assertIn("b at abc123", messages)
+        self.assertNotIn("Deploying to c:", messages)
+        self.assertIn("Skipped c due to failures.", messages)
+
+
+class GetCurrentStatesTests(unittest.TestCase):
+    def test_adaptive_timeout(self) -> None:
+        self.assertIsNone(adaptive_timeout([], 1))
+        self.assertEqual(1, adaptive_timeout([0.01], 1))
+
+        timeout = adaptive_timeout([0.1, 0.2], 0.5)
+        assert timeout is not None
+        self.assertAlmostEqual(2 * API_LATENCY_FACTOR / 10, timeout)
+        self.assertEqual(2 * API_LATENCY_FACTOR, adaptive_timeout([2], 1))
+
+    def test_gives_up_on_slow_hosts(self) -> None:
+        interactions = RecordingInteractions()
+        released = threading.Event()
+        self.addCleanup(released.set)
+
+        def get_current_state(host: str, *args: Any) -> str:
+            if host == 'slow':
+                released.wait(5)
+            return f'{host}-state'
+
+        with mock.patch(
+            'sr.comp.cli.deploy.get_current_state',
+            side_effect=get_current_state,
+        ):
+            start = time.perf_counter()
+            states = get_current_states(['a', 'slow', 'b'], interactions, min_timeout=0.05)
+            elapsed = time.perf_counter() - start
+
+        self.assertEqual({'a': 'a-state', 'slow': None, 'b': 'b-state'}, states)
+        self.assertLess(elapsed, 1)
+        self.assertEqual(
+            ["Timed out getting state for slow after 0.1 seconds."],
+            interactions.messages,
+        )
+
+    def test_waits_for_slow_hosts_by_default(self) -> None:
+        interactions = RecordingInteractions()
+
+        def get_current_state(host: str, *args: Any) -> str:
+            if host == 'slow':
+                time.sleep(0.2)
+            return f'{host}-state'
+
+        with mock.patch(
+            'sr.comp.cli.deploy.get_current_state',
+            side_effect=get_current_state,
+        ):
+            states = get_current_states(['a', 'slow'], interactions)
+
+        self.assertEqual({'a': 'a-state', 'slow': 'slow-state'}, states)
+        self.assertEqual([], interactions.messages)
+
+    def test_errors(self) -> None:
+        interactions = RecordingInteractions()
+
+        def get_current_state(
+            host: str,
+            interactions: UserInteractions[str],
+            *args: Any,
+        ) -> str:
+            interactions.show_info(f"{host} is down")
+            raise UnableToGetStateError
+
+        with mock.patch(
+            'sr.comp.cli.deploy.get_current_state',
+            side_effect=get_current_state,
+        ):
+            states = get_current_states(['a', 'b'], interactions)
+
+        self.assertEqual({'a': None, 'b': None}, states)
+        self.assertEqual(["a is down", "b is down"], interactions.messages)
+
+    def test_shares_session(self) -> None:
+        sessions = []
+
+        def get_current_state(host: str, interactions: Any, session: Any) -> str:
+            sessions.append(session)
+            return f'{host}-state'
+
+        with mock.patch(
+            'sr.comp.cli.deploy.get_current_state',
+            side_effect=get_current_state,
+        ):
+            get_current_states(['a', 'b', 'c'], RecordingInteractions())
+
+        self.assertEqual(3, len(sessions))
+        self.assertIsInstance(sessions[0], requests.Session)
+        self.assertEqual(1, len(set(map(id, sessions))))
+
+
+class CheckHostStatesTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        history = ['old', 'current', 'new']
+        self.compstate = mock.Mock()
+        self.compstate.has_ancestor.side_effect = lambda x: x == 'old'
+        self.compstate.has_descendant.side_effect = lambda x: x == 'new'
+        self.compstate.has_commit.side_effect = lambda x: x in history or x == 'sibling'
+        self.interactions = RecordingInteractions()
+
+    def check_host_states(self, states: dict[str, str | None], answer: str) -> dict[str, bool]:
+        with mock.patch(
+            'sr.comp.cli.deploy.get_current_states',
+            return_value=states,
+        ), mock.patch.object(
+            self.interactions,
+            'get_input',
+            return_value=answer,
+        ) as get_input:
+            skips = check_host_states(
+                self.compstate,
+                list(states),
+                'current',
+                False,
+                self.interactions,
+            )
+        self.questions = [x.args[0] for x in get_input.mock_calls]
+        return skips
+
+    def test_classification(self) -> None:
+        self.assertEqual(
+            {
+                'a': False,
+                'b': True,
+                'c': True,
+                'd': True,
+                'e': True,
+                'f': True,
+            },
+            self.check_host_states(
+                {
+                    'a': 'old',
+                    'b': 'current',
+                    'c': 'new',
+                    'd': 'sibling',
+                    'e': None,
+                    'f': 'unknown',
+                },
+                answer='n',
+            ),
+        )
+
+        # The summary is shown before any questions are asked
+        self.assertEqual(
+            [
+                "Host states:",
+                "  a: old (older state, will be updated)",
+                "  b: current (already has the requested revision)",
+                "  c: new (more recent state)",
+                "  d: sibling (sibling state)",
+                "  e: - (state unavailable)",
+                "  f: unknown (unknown state)",
+                "Host b already has requested revision (current)",
+            ],
+            self.interactions.messages,
+        )
+        self.assertEqual(5, len(self.questions))
+        self.assertIn("Try to fetch it?", self.questions[0])
+        self.assertIn("Host c has more recent state 'new'", self.questions[1])
+        self.assertIn("Failed to get state for e", self.questions[3])
+        self.compstate.fetch.assert_not_called()
+
+    def test_fetches_unknown_states(self) -> None:
+        skips = self.check_host_states({'a': 'unknown', 'b': 'other'}, answer='y')
+
+        self.assertEqual({'a': False, 'b': False}, skips)
+        self.assertEqual(
+            [
+                mock.call('origin', quiet=True),
+                mock.call('ssh://srcomp@a/~/compstate.git', ('HEAD', 'unknown'), quiet=True),
+                mock.call('ssh://srcomp@b/~/compstate.git', ('HEAD', 'other'), quiet=True),
+            ],
+            self.compstate.fetch.mock_calls,
+        )
+
+    def test_verbose_shows_timeout(self) -> None:
+        with mock.patch(
+            'sr.comp.cli.deploy.get_current_states',
+            return_value={'a': 'old'},
+        ) as get_current_states:
+            check_host_states(self.compstate, ['a'], 'current', True, self.interactions, 0.5)
+
+        get_current_states.assert_called_once_with(['a'], self.interactions, 0.5)
+        self.assertEqual(
+            "Checking host states for a (timeout 3 seconds, or at least 0.5 seconds "
+            "once others have responded).",
+            self.interactions.messages[0],
+        )
@@ -12,13 +12,17 @@ from sr.comp.cli.for_each_match import (
 )
 from sr.comp.types import TLA
 
-from .factories import build_match
+from .factories import build_match, use_temporary_cache_dir
 
 
 class ForEachMatchTests(unittest.TestCase):
     longMessage = True
     maxDiff = None
 
+    def setUp(self) -> None:
+        super().setUp()
+        use_temporary_cache_dir(self)
+
     def test_smoke(self) -> None:
         compstate_path = str(Path(__file__).parent / 'dummy')
 
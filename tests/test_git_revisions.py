@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import subprocess
+from pathlib import Path
+from unittest import mock
+
+from sr.comp import yaml_loader
+from sr.comp.cli.git_revisions import parse_tree, RevisionLoader
+
+from .test_compstate_loader import GitCompstateTestCase
+
+
+class ParseTreeTests(GitCompstateTestCase):
+    def test_parse_tree(self) -> None:
+        (self.root / 'scoring').mkdir()
+        (self.root / 'scoring' / 'score.py').write_text('')
+        self.commit()
+
+        def rev_parse(name: str) -> str:
+            return subprocess.check_output(
+                ('git', 'rev-parse', name),
+                text=True,
+                cwd=self.root,
+            ).strip()
+
+        contents = subprocess.check_output(
+            ('git', 'cat-file', 'tree', 'HEAD^{tree}'),
+            cwd=self.root,
+        )
+
+        self.assertEqual(
+            [
+                ('40000', 'scoring', rev_parse('HEAD:scoring')),
+                ('100644', 'teams.yaml', rev_parse('HEAD:teams.yaml')),
+            ],
+            list(parse_tree(contents, len(rev_parse('HEAD')) // 2)),
+        )
+
+
+class RevisionLoaderTests(GitCompstateTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.first = self.head()
+
+        (self.root / 'league').mkdir()
+        (self.root / 'league' / '001.yaml').write_text('match_number: 1\n')
+        (self.root / 'teams.yaml').write_text('teams: {ABC: {}}\n')
+        self.commit()
+
+        self.loader = RevisionLoader(self.root)
+        self.addCleanup(self.loader.close)
+
+    def head(self) -> str:
+        return subprocess.check_output(
+            ('git', 'rev-parse', 'HEAD'),
+            text=True,
+            cwd=self.root,
+        ).strip()
+
+    def test_checkout(self) -> None:
+        first = self.loader.checkout(self.first)
+        second = self.loader.checkout('HEAD')
+
+        self.assertEqual('teams: {}\n', (first / 'teams.yaml').read_text())
+        self.assertFalse((first / 'league').exists())
+        self.assertEqual('teams: {ABC: {}}\n', (second / 'teams.yaml').read_text())
+        self.assertEqual('match_number: 1\n', (second / 'league' / '001.yaml').read_text())
+
+    def test_checkout_reports_revision(self) -> None:
+        path = self.loader.checkout(self.first)
+
+        self.assertEqual(self.first, subprocess.check_output(
+            ('git', 'rev-parse', 'HEAD'),
+            text=True,
+            cwd=path,
+        ).strip())
+
+    def test_doesnt_touch_working_tree(self) -> None:
+        (self.root / 'teams.yaml').write_text('teams: {DEF: {}}\n')
+
+        self.loader.checkout(self.first)
+        self.loader.checkout('HEAD')
+
+        self.assertEqual('teams: {DEF: {}}\n', (self.root / 'teams.yaml').read_text())
+        self.assertEqual(self.head(), self.loader.resolve('HEAD'))
+
+    def test_unknown_revision(self) -> None:
+        with self.assertRaises(KeyError):
+            self.loader.checkout('no-such-branch')
+
+    def test_parses_shared_blobs_once(self) -> None:
+        (self.root / 'teams.yaml').write_text('teams: {}\n')
+        self.commit()
+
+        with mock.patch(
+            'sr.comp.cli.compstate_loader.unhooked_yaml_load',
+            return_value={'teams': {}},
+        ) as load:
+            for revision in (self.first, 'HEAD'):
+                comp = self.loader.load_lazily(revision)
+                with comp._loading():
+                    yaml_loader.load(comp.root / 'teams.yaml')
+
+        load.assert_called_once_with(self.loader.checkout(self.first) / 'teams.yaml')
+
+    def test_state(self) -> None:
+        comp = self.loader.load_lazily(self.first)
+
+        self.assertEqual(self.first, comp.state)
+
+    def test_raw_compstate(self) -> None:
+        raw = self.loader.raw_compstate(self.first)
+
+        self.assertEqual(
+            self.first,
+            raw.git(['rev-parse', 'HEAD'], return_output=True).strip(),
+        )
+
+    def test_discard(self) -> None:
+        path = self.loader.checkout(self.first)
+
+        self.loader.discard(self.first)
+
+        self.assertFalse(path.exists())
+        self.assertEqual(path, self.loader.checkout(self.first))
+        self.assertTrue(path.exists())
+
+    def test_close(self) -> None:
+        path = self.loader.checkout(self.first)
+
+        self.loader.close()
+
+        self.assertFalse(path.exists())
+        self.assertFalse(Path(path).parent.exists())
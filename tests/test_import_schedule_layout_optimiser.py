@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import unittest
+
+from sr.comp.cli.import_schedule.layout_optimiser import (
+    Cost,
+    LayoutCostModel,
+    optimise,
+)
+from sr.comp.cli.import_schedule.types import ID
+from sr.comp.types import TLA
+
+
+def tlas(*names: str) -> list[TLA]:
+    return [TLA(x) for x in names]
+
+
+class LayoutOptimiserTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+
+        self.groups = [
+            tlas('AAA', 'BBB'),
+            tlas('CCC', 'DDD'),
+            tlas('EEE', 'FFF'),
+            tlas('GGG', 'HHH'),
+        ]
+        # The first two groups are collected by one shepherd, the last two by
+        # another.
+        self.shepherds = {
+            tla: 0 if idx < 4 else 1
+            for idx, tla in enumerate(x for group in self.groups for x in group)
+        }
+        ids = [ID(str(x)) for x in range(8)]
+        self.schedule = [ids[:4], ids[4:]]
+
+        self.model = LayoutCostModel(self.groups, self.shepherds, self.schedule, ids)
+
+    def test_cost_layout_order(self) -> None:
+        cost = self.model.cost([x for group in self.groups for x in group])
+
+        # Each match slot has four teams from a single shepherd, two more than
+        # their fair share.
+        self.assertEqual(Cost(walking=3, shepherding=4), cost)
+
+    def test_cost_interleaved_groups(self) -> None:
+        ordered_teams = tlas('AAA', 'BBB', 'EEE', 'FFF', 'CCC', 'DDD', 'GGG', 'HHH')
+
+        cost = self.model.cost(ordered_teams)
+
+        self.assertEqual(Cost(walking=5, shepherding=0), cost)
+
+    def test_optimise_improves_on_layout_order(self) -> None:
+        ordered_teams, cost = optimise(
+            self.groups,
+            self.model,
+            time_budget=1,
+            seed='test',
+        )
+
+        self.assertEqual(
+            sorted(x for group in self.groups for x in group),
+            sorted(ordered_teams),
+            "Should have ordered exactly the given teams",
+        )
+        self.assertEqual(cost, self.model.cost(ordered_teams))
+        self.assertLessEqual(cost.total, Cost(walking=5, shepherding=0).total)
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from sr.comp.cli.import_schedule.library import (
+    best_fit,
+    compute_metrics,
+    ScheduleLibrary,
+    ScheduleMetrics,
+)
+from sr.comp.cli.import_schedule.types import ID
+
+
+def ids(line: str) -> list[ID]:
+    return [ID(x) for x in line.split('|')]
+
+
+class ComputeMetricsTests(unittest.TestCase):
+    def test_metrics(self) -> None:
+        schedule = [
+            ids('0|1|2|3'),
+            ids('4|5|6|7'),
+            ids('0|1|4|5'),
+            ids('2|3|6|7'),
+            ids('0|1|6|7'),
+        ]
+
+        metrics = compute_metrics(schedule, teams_per_game=4)
+
+        self.assertEqual(
+            ScheduleMetrics(
+                min_gap=0,
+                max_repeated_matchups=3,
+                appearances_spread=1,
+            ),
+            metrics,
+        )
+
+    def test_metrics_multiple_games_per_match(self) -> None:
+        schedule = [
+            ids('0|1|2|3'),
+            ids('0|2|1|3'),
+        ]
+
+        metrics = compute_metrics(schedule, teams_per_game=2)
+
+        self.assertEqual(
+            ScheduleMetrics(
+                min_gap=0,
+                max_repeated_matchups=1,
+                appearances_spread=0,
+            ),
+            metrics,
+        )
+
+
+class ScheduleLibraryTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.directory = Path(tempdir.name) / 'schedules'
+        self.directory.mkdir()
+        self.cache_path = Path(tempdir.name) / 'cache'
+
+    def library(self) -> ScheduleLibrary:
+        return ScheduleLibrary(self.directory, self.cache_path)
+
+    def write(self, name: str, *lines: str) -> None:
+        (self.directory / name).write_text('\n'.join(lines) + '\n')
+
+    def test_best_fit(self) -> None:
+        # Too few ids
+        self.write('small.txt', '0|1|2|3')
+        # Right number of ids, but teams have back-to-back matches
+        self.write('tight.txt', '0|1|2|3', '0|1|4|5', '2|3|6|7', '4|5|6|7')
+        # Right number of ids with breaks between matches
+        self.write('spaced.txt', '0|1|2|3', '4|5|6|7', '0|1|4|5', '2|3|6|7')
+        # Too many ids per match for a single arena
+        self.write('big.txt', '0|1|2|3|4|5|6|7')
+
+        schedules = self.library().schedules(teams_per_game=4)
+
+        best = best_fit(schedules, num_teams=8, num_arenas=1, teams_per_game=4)
+
+        assert best is not None
+        self.assertEqual('spaced.txt', best.path.name)
+
+    def test_best_fit_ignored_ids(self) -> None:
+        # Exactly enough ids, but not once one is ignored
+        self.write('exact.txt', '0|1|2|3', '4|5|6|7')
+        # One spare id, which is the one to be ignored
+        self.write('spare.txt', '0|1|2|3', '4|5|6|7', '0|1|2|8', '3|5|6|7')
+        # One spare id, but not the one to be ignored
+        self.write('other.txt', '0|1|2|3', '4|5|6|7', '0|1|2|9', '3|5|6|7')
+
+        schedules = self.library().schedules(teams_per_game=4)
+
+        best = best_fit(
+            schedules,
+            num_teams=8,
+            num_arenas=1,
+            teams_per_game=4,
+            ignore_ids=[ID('8')],
+        )
+
+        assert best is not None
+        self.assertEqual('spare.txt', best.path.name)
+
+    def test_no_fit(self) -> None:
+        self.write('small.txt', '0|1|2|3')
+
+        schedules = self.library().schedules(teams_per_game=4)
+
+        best = best_fit(schedules, num_teams=12, num_arenas=1, teams_per_game=4)
+
+        self.assertIsNone(best)
+
+    def test_index_persisted(self) -> None:
+        self.write('a.txt', '0|1|2|3', '# comment', '4|5|6|7')
+        self.write('bad.txt', '0|0|1|2')
+
+        self.library().schedules(teams_per_game=4)
+
+        (index_path,) = self.cache_path.iterdir()
+        index = json.loads(index_path.read_text())
+        entry = index['schedules']['a.txt']
+        self.assertEqual([str(x) for x in range(8)], entry['ids'])
+        self.assertEqual(2, entry['num_matches'])
+        self.assertEqual([4], entry['ids_per_match'])
+        self.assertIn('4', entry['metrics'])
+        self.assertIn('error', index['schedules']['bad.txt'])
+
+        (self.directory / 'a.txt').unlink()
+        schedules = self.library().schedules(teams_per_game=4)
+
+        self.assertEqual([], schedules)
+        index = json.loads(index_path.read_text())
+        self.assertEqual(['bad.txt'], list(index['schedules'].keys()))
+        self.assertEqual(
+            ['bad.txt'],
+            [x.name for x in self.directory.iterdir()],
+            "The index should not be written into the schedules directory",
+        )
+
+    def test_without_cache(self) -> None:
+        self.write('a.txt', '0|1|2|3', '4|5|6|7')
+
+        library = ScheduleLibrary(self.directory, cache_path=None)
+
+        (info,) = library.schedules(teams_per_game=4)
+        self.assertEqual(8, info.num_ids)
+        self.assertEqual(['a.txt'], [x.name for x in self.directory.iterdir()])
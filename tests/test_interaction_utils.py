@@ -4,7 +4,7 @@ import unittest
 from typing import Any
 from unittest import mock
 
-from sr.comp.cli.interaction_utils import CLIInteractions
+from sr.comp.cli.interaction_utils import BufferedInteractions, CLIInteractions
 
 
 def mock_get_input(autospec: bool = True, **kwargs: Any) -> mock._patch[mock.Mock]:
@@ -88,3 +88,28 @@ class DeployQueryHelpersTests(unittest.TestCase):
         self.assertTrue(res)
 
         self.assertEqual(2, mocked_get_input.call_count)
+
+
+class BufferedInteractionsTests(unittest.TestCase):
+    def test_flush(self) -> None:
+        target = CLIInteractions()
+        buffered = BufferedInteractions(target)
+
+        with mock.patch.object(target, 'message') as message:
+            buffered.show_info("One")
+            buffered.show_error("Two")
+            message.assert_not_called()
+
+            buffered.flush()
+            buffered.flush()
+
+        self.assertEqual(
+            [mock.call("One"), mock.call(target.format_error("Two"))],
+            message.mock_calls,
+        )
+
+    def test_no_input(self) -> None:
+        buffered = BufferedInteractions(CLIInteractions())
+
+        with self.assertRaisesRegex(RuntimeError, "not available"):
+            buffered.query_bool("Question?", True)
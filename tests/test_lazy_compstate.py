@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from sr.comp.cli.lazy_compstate import affected_parts, LazySRComp, SOURCES
+
+
+class LazySRCompTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.comp = LazySRComp(Path('compstate'))
+
+    def test_loads_parts_on_first_access(self) -> None:
+        with mock.patch(
+            'sr.comp.cli.lazy_compstate.load_teams',
+            return_value={'ABC': mock.sentinel.team},
+        ) as load_teams:
+            self.assertEqual({'ABC': mock.sentinel.team}, self.comp.teams)
+            self.assertEqual({'ABC': mock.sentinel.team}, self.comp.teams)
+
+        load_teams.assert_called_once_with(Path('compstate/teams.yaml'))
+
+    def test_doesnt_load_other_parts(self) -> None:
+        with mock.patch(
+            'sr.comp.cli.lazy_compstate.load_corners',
+            return_value={0: mock.sentinel.corner, 1: mock.sentinel.corner},
+        ):
+            self.assertEqual(2, self.comp.num_teams_per_arena)
+
+        self.assertEqual(
+            {'corners', 'num_teams_per_arena'},
+            {x for x in vars(self.comp) if not x.startswith('_')} - {'root'},
+        )
+
+    def test_loading_context(self) -> None:
+        loading = mock.MagicMock()
+        comp = LazySRComp(Path('compstate'), loading)
+
+        with mock.patch('sr.comp.cli.lazy_compstate.load_arenas'):
+            comp.arenas
+
+        loading.assert_called_once_with()
+        loading.return_value.__enter__.assert_called_once_with()
+
+    def test_unknown_attribute(self) -> None:
+        with self.assertRaises(AttributeError):
+            self.comp.bacon
+
+
+class AffectedPartsTests(unittest.TestCase):
+    def test_nothing_changed(self) -> None:
+        self.assertEqual(set(), affected_parts([], revision_changed=False))
+
+    def test_revision_changed(self) -> None:
+        self.assertEqual({'state'}, affected_parts([], revision_changed=True))
+
+    def test_score_file_changed(self) -> None:
+        self.assertEqual(
+            {'scores', 'schedule', 'timezone', 'awards', 'venue'},
+            affected_parts(['league/A/001.yaml'], revision_changed=False),
+        )
+
+    def test_arenas_changed(self) -> None:
+        self.assertEqual(
+            set(SOURCES.keys()) - {'teams'},
+            affected_parts(['arenas.yaml'], revision_changed=False),
+        )
+
+    def test_similarly_named_file(self) -> None:
+        self.assertEqual(set(), affected_parts(['league-notes.txt'], revision_changed=False))
+
+
+class ReloadedTests(unittest.TestCase):
+    def test_reuses_unaffected_parts(self) -> None:
+        comp = LazySRComp(Path('compstate'))
+        comp.teams = mock.sentinel.teams
+        comp.scores = mock.sentinel.scores
+
+        reloaded = comp.reloaded(['league/A/001.yaml'], revision_changed=False)
+
+        self.assertEqual(Path('compstate'), reloaded.root)
+        self.assertEqual(mock.sentinel.teams, reloaded.teams)
+        self.assertNotIn('scores', vars(reloaded))
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+from sr.comp.cli import parallel_yaml
+
+
+class ParallelPreloaderTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.root = Path(tempdir.name)
+
+        self.paths = []
+        for num in range(5):
+            path = self.root / f'{num:03}.yaml'
+            path.write_text(f'match_number: {num}\n')
+            self.paths.append(path)
+
+        self.loaded: list[Path] = []
+
+    def load(self, path: Path) -> Any:
+        self.loaded.append(path)
+        return {'loaded': path.name}
+
+    def test_parses_in_parallel(self) -> None:
+        preloader = parallel_yaml.ParallelPreloader(self.paths, self.load, workers=2)
+
+        for num, path in enumerate(self.paths):
+            self.assertEqual({'match_number': num}, preloader.load(path))
+
+        self.assertEqual([], self.loaded)
+
+    def test_other_files_passed_through(self) -> None:
+        other = self.root / 'other.yaml'
+        preloader = parallel_yaml.ParallelPreloader(self.paths, self.load, workers=2)
+
+        self.assertEqual({'loaded': 'other.yaml'}, preloader.load(other))
+        self.assertEqual([other], self.loaded)
+
+    def test_failures_loaded_normally(self) -> None:
+        invalid = self.paths[2]
+        invalid.write_text('match_number: [\n')
+        preloader = parallel_yaml.ParallelPreloader(self.paths, self.load, workers=2)
+
+        self.assertEqual({'match_number': 0}, preloader.load(self.paths[0]))
+        self.assertEqual({'loaded': invalid.name}, preloader.load(invalid))
+        self.assertEqual([invalid], self.loaded)
+
+    def test_not_parallel_for_few_files(self) -> None:
+        from sr.comp import yaml_loader
+
+        with mock.patch.object(
+            parallel_yaml,
+            'ParallelPreloader',
+        ) as preloader, parallel_yaml.preloading(self.paths):
+            self.assertEqual({'match_number': 0}, yaml_loader.load(self.paths[0]))
+
+        preloader.assert_not_called()
+
+
+class ScoreFilesTests(unittest.TestCase):
+    def test_score_files(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            root = Path(tempdir)
+            for name in (
+                'league/A/001.yaml',
+                'knockout/B/020.yaml',
+                'external/001.yaml',
+                'league/notes.yaml',
+            ):
+                (root / name).parent.mkdir(parents=True, exist_ok=True)
+                (root / name).touch()
+
+            self.assertEqual(
+                {
+                    root / 'league/A/001.yaml',
+                    root / 'knockout/B/020.yaml',
+                    root / 'external/001.yaml',
+                },
+                set(parallel_yaml.score_files(root)),
+            )
@@ -1,13 +1,24 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
 import datetime
 import io
+import sys
+import tempfile
 import textwrap
+import threading
 import unittest
 from pathlib import Path
+from typing import Any
+from unittest import mock
 
+from sr.comp import yaml_loader
 from sr.comp.cli import yaml_round_trip as yaml
+from sr.comp.cli.compstate_loader import (
+    InvalidCompstateError,
+    validate_with_changes,
+)
 from sr.comp.cli.yaml_round_trip import command
 
 from .factories import dummy_compstate
@@ -26,12 +37,12 @@ class RoundTripTests(unittest.TestCase):
 
             orig_mod, orig_content = self.get_info(dummy_schedule)
 
-            settings = argparse.Namespace(file_path=dummy_schedule)
+            settings = argparse.Namespace(file_path=dummy_schedule, check=False)
             command(settings)
 
             new_mod, new_content = self.get_info(dummy_schedule)
 
-            self.assertNotEqual(orig_mod, new_mod, "Should have rewritten the file")
+            self.assertEqual(orig_mod, new_mod, "Should not have rewritten the file")
             self.assertEqual(
                 orig_content,
                 new_content,
@@ -99,3 +110,423 @@ class RoundTripTests(unittest.TestCase):
             output.getvalue(),
             "Timestamps with timezones should be updated suitably",
         )
+
+
+class FastLoadTests(unittest.TestCase):
+    def test_matches_load(self) -> None:
+        content = textwrap.dedent('''
+            # A comment
+            matches:
+              0:
+                A: [ABC, ~, DEF]
+              1:
+                B:
+                - GHI
+            delays:
+            - delay: 15
+              time: 2022-04-01 12:04:12+01:00
+            yes_no: [yes, no, on, off]
+        ''').lstrip()
+
+        data = yaml.fast_load(io.StringIO(content))
+
+        self.assertEqual(yaml.load(io.StringIO(content)), data)
+        self.assertIs(type(data), dict, "Should have loaded plain data")
+
+    def test_timestamp_with_timezone(self) -> None:
+        data = yaml.fast_load(io.StringIO('start: 2022-04-01 12:04:12+01:00\n'))
+
+        tzinfo = datetime.timezone(offset=datetime.timedelta(hours=1))
+
+        self.assertEqual(
+            {'start': datetime.datetime(2022, 4, 1, 12, 4, 12, tzinfo=tzinfo)},
+            data,
+            "Should have parsed timezone aware times",
+        )
+
+    def test_path(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            path = Path(tempdir) / 'teams.yaml'
+            path.write_text('teams: {ABC: {name: Team ABC}}\n')
+
+            self.assertEqual(
+                {'teams': {'ABC': {'name': 'Team ABC'}}},
+                yaml.fast_load(path),
+            )
+
+    def test_safe(self) -> None:
+        with self.assertRaisesRegex(Exception, 'could not determine a constructor'):
+            yaml.fast_load(io.StringIO('!!python/object/apply:os.getcwd []\n'))
+
+
+class EditTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.path = Path(tempdir.name) / 'schedule.yaml'
+        self.path.write_text('# Comment\ndelays: []\n')
+        self.path.chmod(0o640)
+
+    def test_unchanged(self) -> None:
+        before = self.path.stat()
+
+        with yaml.edit(self.path):
+            pass
+
+        after = self.path.stat()
+        self.assertEqual(
+            (before.st_ino, before.st_mtime_ns),
+            (after.st_ino, after.st_mtime_ns),
+            "Should not have rewritten the file",
+        )
+
+    def test_changed(self) -> None:
+        before = self.path.stat()
+
+        with yaml.edit(self.path) as data:
+            data['delays'].append({'delay': 15})
+
+        after = self.path.stat()
+        self.assertEqual('# Comment\ndelays:\n- delay: 15\n', self.path.read_text())
+        self.assertNotEqual(before.st_ino, after.st_ino, "Should have replaced the file")
+        self.assertEqual(0o640, after.st_mode & 0o777, "Should have kept the file's mode")
+        self.assertEqual(
+            [self.path],
+            list(self.path.parent.iterdir()),
+            "Should not have left temporary files",
+        )
+
+    def test_error(self) -> None:
+        with self.assertRaises(ValueError), yaml.edit(self.path) as data:
+            data['delays'].append({'delay': 15})
+            raise ValueError
+
+        self.assertEqual('# Comment\ndelays: []\n', self.path.read_text())
+
+    @unittest.skipUnless(sys.platform != 'win32', "Locking is not supported on Windows")
+    def test_waits_for_lock(self) -> None:
+        edited = threading.Event()
+
+        def edit() -> None:
+            with yaml.edit(self.path) as data:
+                data['delays'].append({'delay': 15})
+            edited.set()
+
+        with yaml.locked(self.path):
+            thread = threading.Thread(target=edit)
+            thread.start()
+            self.assertFalse(edited.wait(0.1), "Should have waited for the lock")
+
+        thread.join()
+        self.assertIn('delay: 15', self.path.read_text())
+
+
+class EditAllTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.root = Path(tempdir.name)
+
+        (self.root / 'schedule.yaml').write_text('delays: []\n')
+        (self.root / 'layout.yaml').write_text('teams: []\n')
+        self.paths = [self.root / 'schedule.yaml', self.root / 'layout.yaml']
+
+    def test_edits_all(self) -> None:
+        with yaml.edit_all(self.paths) as (schedule, layout):
+            schedule['delays'].append({'delay': 15})
+            layout['teams'].append({'name': 'a-group'})
+
+        self.assertEqual('delays:\n- delay: 15\n', self.paths[0].read_text())
+        self.assertEqual('teams:\n- name: a-group\n', self.paths[1].read_text())
+
+    def test_check(self) -> None:
+        check = mock.Mock()
+
+        with yaml.edit_all(self.paths, check) as (schedule, _):
+            schedule['delays'].append({'delay': 15})
+
+        check.assert_called_once_with({self.paths[0]: 'delays:\n- delay: 15\n'})
+
+    def test_failed_check(self) -> None:
+        check = mock.Mock(side_effect=ValueError)
+
+        with self.assertRaises(ValueError):
+            with yaml.edit_all(self.paths, check) as (schedule, layout):
+                schedule['delays'].append({'delay': 15})
+                layout['teams'].append({'name': 'a-group'})
+
+        self.assertEqual('delays: []\n', self.paths[0].read_text())
+        self.assertEqual('teams: []\n', self.paths[1].read_text())
+
+    def test_failed_write(self) -> None:
+        with mock.patch(
+            'os.replace',
+            side_effect=AssertionError("Should not have replaced any files"),
+        ), mock.patch(
+            'os.fsync',
+            side_effect=[None, OSError],
+        ), self.assertRaises(OSError):
+            with yaml.edit_all(self.paths) as (schedule, layout):
+                schedule['delays'].append({'delay': 15})
+                layout['teams'].append({'name': 'a-group'})
+
+        self.assertEqual(
+            {'schedule.yaml', 'layout.yaml'},
+            {x.name for x in self.root.iterdir()},
+            "Should not have left temporary files",
+        )
+
+    def test_validated_edit(self) -> None:
+        with mock.patch(
+            'sr.comp.cli.compstate_loader.validate_with_changes',
+            side_effect=[2, 0],
+        ) as validate, self.assertRaises(InvalidCompstateError):
+            with yaml.validated_edit(self.root, 'schedule.yaml') as schedule:
+                schedule['delays'].append({'delay': 15})
+
+        self.assertEqual(
+            [
+                mock.call(self.root, {self.paths[0]: 'delays:\n- delay: 15\n'}),
+                mock.call(self.root, {}),
+            ],
+            validate.call_args_list,
+        )
+        self.assertEqual('delays: []\n', self.paths[0].read_text())
+
+    def test_validated_edit_allows_existing_errors(self) -> None:
+        with mock.patch(
+            'sr.comp.cli.compstate_loader.validate_with_changes',
+            side_effect=[2, 3],
+        ):
+            with yaml.validated_edit(self.root, 'schedule.yaml') as schedule:
+                schedule['delays'].append({'delay': 15})
+
+        self.assertEqual('delays:\n- delay: 15\n', self.paths[0].read_text())
+
+    def test_validated_edit_skips_baseline_when_valid(self) -> None:
+        with mock.patch(
+            'sr.comp.cli.compstate_loader.validate_with_changes',
+            return_value=0,
+        ) as validate:
+            with yaml.validated_edit(self.root, 'schedule.yaml') as schedule:
+                schedule['delays'].append({'delay': 15})
+
+        validate.assert_called_once_with(
+            self.root,
+            {self.paths[0]: 'delays:\n- delay: 15\n'},
+        )
+        self.assertEqual('delays:\n- delay: 15\n', self.paths[0].read_text())
+
+    def test_validated_edit_load_failure(self) -> None:
+        with mock.patch(
+            'sr.comp.cli.compstate_loader.validate_with_changes',
+            side_effect=[FileNotFoundError('league.yaml'), 0],
+        ), self.assertRaises(InvalidCompstateError), contextlib.redirect_stderr(io.StringIO()):
+            with yaml.validated_edit(self.root, 'schedule.yaml') as schedule:
+                schedule['delays'].append({'delay': 15})
+
+        self.assertEqual('delays: []\n', self.paths[0].read_text())
+
+    def test_validated_edit_existing_load_failure(self) -> None:
+        with mock.patch(
+            'sr.comp.cli.compstate_loader.validate_with_changes',
+            side_effect=FileNotFoundError('league.yaml'),
+        ), contextlib.redirect_stderr(io.StringIO()):
+            with yaml.validated_edit(self.root, 'schedule.yaml') as schedule:
+                schedule['delays'].append({'delay': 15})
+
+        self.assertEqual('delays:\n- delay: 15\n', self.paths[0].read_text())
+
+    def test_validate_with_changes(self) -> None:
+        def load_comp(root: Path) -> Any:
+            return {
+                name: yaml_loader.load(root / name)
+                for name in ('schedule.yaml', 'layout.yaml')
+            }
+
+        with mock.patch(
+            'sr.comp.comp.SRComp',
+            side_effect=load_comp,
+        ), mock.patch(
+            'sr.comp.validation.validate',
+            return_value=0,
+        ) as validate:
+            error_count = validate_with_changes(
+                self.root,
+                {self.paths[0]: 'delays: [{delay: 15}]\n'},
+            )
+
+        self.assertEqual(0, error_count)
+        validate.assert_called_once_with({
+            'schedule.yaml': {'delays': [{'delay': 15}]},
+            'layout.yaml': {'teams': []},
+        })
+        self.assertEqual('delays: []\n', self.paths[0].read_text())
+
+
+BST = datetime.timezone(datetime.timedelta(hours=1))
+
+
+class AppendTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.path = Path(tempdir.name) / 'schedule.yaml'
+
+    def assertAppends(self, expected: str, original: str, key: str, new: Any) -> None:
+        self.path.write_text(original)
+
+        with mock.patch.object(yaml, 'edit', wraps=yaml.edit) as edit:
+            yaml.append(self.path, key, new)
+
+        self.assertEqual(expected, self.path.read_text())
+        edit.assert_not_called()
+
+    def test_empty_sequence(self) -> None:
+        self.assertAppends(
+            '# Comment\ndelays:\n- delay: 15\nother: 1\n',
+            '# Comment\ndelays: []\nother: 1\n',
+            'delays',
+            [{'delay': 15}],
+        )
+
+    def test_sequence(self) -> None:
+        self.assertAppends(
+            textwrap.dedent('''
+                delays:
+                  # First
+                  - delay: 10   # spaced
+                  - delay: 15
+                    time: 2014-04-26 13:30:00+01:00
+
+                # Trailing
+                other: 1
+            '''),
+            textwrap.dedent('''
+                delays:
+                  # First
+                  - delay: 10   # spaced
+
+                # Trailing
+                other: 1
+            '''),
+            'delays',
+            [{
+                'delay': 15,
+                'time': datetime.datetime(2014, 4, 26, 13, 30, tzinfo=BST),
+            }],
+        )
+
+    def test_mapping(self) -> None:
+        self.assertAppends(
+            'matches:\n  0:\n    A: [ABC]\n  1:\n    A:\n    - DEF\n',
+            'matches:\n  0:\n    A: [ABC]\n',
+            'matches',
+            {1: {'A': ['DEF']}},
+        )
+
+    def test_nothing_to_append(self) -> None:
+        self.path.write_text('delays: []\n')
+        before = self.path.stat()
+
+        yaml.append(self.path, 'delays', [])
+
+        self.assertEqual(before.st_mtime_ns, self.path.stat().st_mtime_ns)
+
+    def test_falls_back_for_missing_key(self) -> None:
+        self.path.write_text('# Comment\nother: 1\n')
+
+        yaml.append(self.path, 'delays', [{'delay': 15}])
+
+        self.assertEqual('# Comment\nother: 1\ndelays:\n- delay: 15\n', self.path.read_text())
+
+    def test_falls_back_for_overlapping_keys(self) -> None:
+        self.path.write_text('matches:\n  0:\n    A: [ABC]\n')
+
+        yaml.append(self.path, 'matches', {0: {'A': ['DEF']}})
+
+        self.assertEqual({'matches': {0: {'A': ['DEF']}}}, yaml.fast_load(self.path))
+
+    def test_falls_back_for_flow_style(self) -> None:
+        self.path.write_text('delays: [{delay: 10}]\n')
+
+        yaml.append(self.path, 'delays', [{'delay': 15}])
+
+        self.assertEqual(
+            {'delays': [{'delay': 10}, {'delay': 15}]},
+            yaml.fast_load(self.path),
+        )
+
+
+class CheckTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.root = Path(tempdir.name)
+
+        (self.root / 'league' / 'A').mkdir(parents=True)
+        (self.root / '.git').mkdir()
+        (self.root / '.git' / 'ignored.yaml').write_text('a:   1\n')
+        (self.root / 'schedule.yaml').write_text('delays: []\n')
+        (self.root / 'league' / 'A' / '001.yaml').write_text('match_number:   1\n')
+        (self.root / 'league' / 'A' / 'notes.txt').write_text('a:   1\n')
+
+    def test_yaml_files(self) -> None:
+        self.assertEqual(
+            [self.root / 'schedule.yaml', self.root / 'league' / 'A' / '001.yaml'],
+            yaml.yaml_files(self.root),
+        )
+
+    def test_check_file(self) -> None:
+        self.assertIsNone(yaml.check_file(self.root / 'schedule.yaml', 'schedule.yaml'))
+        self.assertEqual(
+            textwrap.dedent('''\
+                --- a/001.yaml
+                +++ b/001.yaml
+                @@ -1 +1 @@
+                -match_number:   1
+                +match_number: 1
+            '''),
+            yaml.check_file(self.root / 'league' / 'A' / '001.yaml', '001.yaml'),
+        )
+
+    def test_check_all_in_parallel(self) -> None:
+        paths = [self.root / 'schedule.yaml', self.root / 'league' / 'A' / '001.yaml'] * 40
+        names = [str(x) for x in paths]
+
+        with mock.patch('sr.comp.cli.parallel_yaml.available_cpus', return_value=2):
+            results = yaml.check_all(paths, names)
+
+        self.assertEqual(
+            [yaml.check_file(path, name) for path, name in zip(paths, names)],
+            results,
+        )
+
+    def test_command(self) -> None:
+        settings = argparse.Namespace(file_path=self.root, check=True)
+
+        with self.assertRaisesRegex(
+            SystemExit,
+            r'1 of 2 files are not in canonical form:\n  league/A/001\.yaml',
+        ), mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            command(settings)
+
+        self.assertIn('+++ b/league/A/001.yaml\n', stdout.getvalue())
+        self.assertEqual(
+            'match_number:   1\n',
+            (self.root / 'league' / 'A' / '001.yaml').read_text(),
+            "Should not have changed the file",
+        )
+
+    def test_command_canonical(self) -> None:
+        (self.root / 'league' / 'A' / '001.yaml').write_text('match_number: 1\n')
+        settings = argparse.Namespace(file_path=self.root, check=True)
+
+        with mock.patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            command(settings)
+
+        self.assertEqual("All 2 files are in canonical form.\n", stdout.getvalue())
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import argparse
+import datetime
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+from typing import Any
+from unittest import mock
+
+from sr.comp.cli import schedule_league, yaml_round_trip as yaml
+from sr.comp.cli.import_schedule.teams_mapping import Strategy
+from sr.comp.types import ArenaName, MatchNumber, TLA
+
+MATCHES: dict[MatchNumber, dict[ArenaName, list[TLA | None]]] = {
+    MatchNumber(0): {
+        ArenaName('A'): [TLA('ABC'), None],
+        ArenaName('B'): [TLA('GHI'), TLA('DEF')],
+    },
+    MatchNumber(1): {
+        ArenaName('A'): [TLA('DEF'), TLA('ABC')],
+        ArenaName('B'): [None, TLA('GHI')],
+    },
+}
+
+
+class ScheduleLeagueTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.root = Path(tempdir.name)
+
+        (self.root / 'layout.yaml').write_text(textwrap.dedent('''
+            teams:
+            - name: first
+              teams: [DEF, ABC]
+            - name: second
+              teams: [GHI]
+        '''))
+
+    def test_order_teams_by_layout(self) -> None:
+        matches = schedule_league.order_teams(self.root, MATCHES, Strategy.LAYOUT)
+
+        # Teams first appear in the layout's order
+        self.assertEqual(
+            {
+                0: {'A': ['DEF', None], 'B': ['ABC', 'GHI']},
+                1: {'A': ['GHI', 'DEF'], 'B': [None, 'ABC']},
+            },
+            matches,
+        )
+
+    def test_order_teams_optimise_uses_matches(self) -> None:
+        with mock.patch(
+            'sr.comp.cli.import_schedule.teams_mapping.order_teams',
+            return_value=['ABC', 'DEF', 'GHI'],
+        ) as order_teams:
+            matches = schedule_league.order_teams(self.root, MATCHES, Strategy.OPTIMISE)
+
+        order_teams.assert_called_once_with(
+            self.root,
+            ['ABC', 'DEF', 'GHI'],
+            Strategy.OPTIMISE,
+            [['ABC', 'GHI', 'DEF'], ['DEF', 'ABC', 'GHI']],
+        )
+        self.assertEqual(
+            {
+                0: {'A': ['ABC', None], 'B': ['DEF', 'GHI']},
+                1: {'A': ['GHI', 'ABC'], 'B': [None, 'DEF']},
+            },
+            matches,
+        )
+
+    def run_command(self, **kwargs: Any) -> None:
+        (self.root / 'arenas.yaml').write_text(textwrap.dedent('''
+            arenas:
+              A: {display_name: A}
+            corners:
+              0: {}
+              1: {}
+        '''))
+        (self.root / 'teams.yaml').write_text(
+            'teams: {ABC: {}, DEF: {}, GHI: {}}\n',
+        )
+        start = datetime.datetime(2026, 10, 18, 12, tzinfo=datetime.timezone.utc)
+        yaml.dump(
+            {
+                'match_slot_lengths': {'total': 300},
+                'match_periods': {'league': [{
+                    'start_time': start,
+                    'end_time': start + datetime.timedelta(hours=1),
+                }]},
+            },
+            self.root / 'schedule.yaml',
+        )
+
+        args = argparse.Namespace(
+            compstate=self.root,
+            spacing=0,
+            max_repeated_matchups=10,
+            appearances_per_round=1,
+            lcg=False,
+            parallel=1,
+            reschedule_from=0,
+            write=True,
+            team_order_strategy=Strategy.LAYOUT,
+        )
+        vars(args).update(kwargs)
+
+        with mock.patch('sys.stderr'):
+            schedule_league.command(args)
+
+    def test_write(self) -> None:
+        self.run_command()
+
+        matches = yaml.fast_load(self.root / 'league.yaml')['matches']
+        self.assertTrue(matches)
+
+        first_appearances: list[str] = []
+        for match in matches.values():
+            for tla in match['A']:
+                if tla is not None and tla not in first_appearances:
+                    first_appearances.append(tla)
+        self.assertEqual(['DEF', 'ABC', 'GHI'], first_appearances)
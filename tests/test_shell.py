@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import contextlib
+import io
+import unittest
+from pathlib import Path
+
+from sr.comp.cli.shell import Shell
+
+
+class ShellTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.shell = Shell(Path('compstate'))
+
+    def test_complete_command_names(self) -> None:
+        self.assertEqual(
+            ['show-league-table', 'show-schedule'],
+            self.shell.completenames('show'),
+        )
+
+    def test_complete_options(self) -> None:
+        completions = self.shell.completedefault('--a', 'show-schedule --a', 14, 17)
+
+        self.assertEqual(['--all'], completions)
+
+    def test_unknown_command(self) -> None:
+        stderr = io.StringIO()
+
+        with contextlib.redirect_stderr(stderr):
+            self.shell.onecmd('deploy')
+
+        self.assertIn("Unknown command: deploy", stderr.getvalue())
+
+    def test_quit(self) -> None:
+        self.assertTrue(self.shell.onecmd('quit'))
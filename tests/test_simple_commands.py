@@ -5,6 +5,8 @@ import subprocess
 import unittest
 from pathlib import Path
 
+from .factories import use_temporary_cache_dir
+
 
 class SimpleCommandsTests(unittest.TestCase):
     maxDiff = None
@@ -28,6 +30,10 @@ class SimpleCommandsTests(unittest.TestCase):
         ('youtube-chapters', '--start-time=2014-04-26 12:45:00+01:00'),
     ]
 
+    def setUp(self) -> None:
+        super().setUp()
+        use_temporary_cache_dir(self)
+
     def test_command_snapshot(self) -> None:
         dummy_compstate = Path(__file__).parent / 'dummy'
         snapshots = Path(__file__).parent / 'snapshots'
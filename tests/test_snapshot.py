@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import datetime
+import os
+import stat
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from sr.comp.arenas import Arena
+from sr.comp.cli import snapshot
+from sr.comp.match_period import MatchSlot, MatchType
+from sr.comp.teams import Team
+from sr.comp.types import ArenaName, Colour, TLA
+
+from .factories import build_match
+
+ONE_HOUR = datetime.timezone(datetime.timedelta(hours=1))
+START = datetime.datetime(2020, 1, 25, 11, 0, tzinfo=ONE_HOUR)
+SLOT = datetime.timedelta(minutes=5)
+
+
+def build_comp() -> Any:
+    arenas = {
+        ArenaName(name): Arena(ArenaName(name), f"Arena {name}", Colour('#fff'))
+        for name in ('A', 'B')
+    }
+    teams = {
+        TLA(tla): Team(TLA(tla), f"Team {tla}", rookie=False, dropped_out_after=None)
+        for tla in ('ABC', 'DEF', 'GHI')
+    }
+
+    matches = []
+    for num in range(3):
+        slot = {}
+        for arena in ('A', 'B') if num < 2 else ('A',):
+            slot[ArenaName(arena)] = build_match(
+                num=num,
+                arena=arena,
+                teams=[TLA('ABC'), None] if num < 2 else [TLA('???'), TLA('???')],
+                start_time=START + SLOT * num,
+                end_time=START + SLOT * (num + 1),
+                type_=MatchType.league if num < 2 else MatchType.knockout,
+            )
+        matches.append(MatchSlot(slot))
+
+    league = SimpleNamespace(
+        positions={'ABC': 1, 'DEF': 2, 'GHI': 2},
+        teams={
+            'ABC': SimpleNamespace(league_points=8, game_points=12),
+            'DEF': SimpleNamespace(league_points=4, game_points=7),
+            'GHI': SimpleNamespace(league_points=4, game_points=0),
+        },
+    )
+
+    return SimpleNamespace(
+        state='0123abcd',
+        arenas=arenas,
+        teams=teams,
+        num_teams_per_arena=2,
+        scores=SimpleNamespace(league=league),
+        schedule=SimpleNamespace(
+            matches=matches,
+            match_slot_lengths={
+                'pre': datetime.timedelta(seconds=60),
+                'match': datetime.timedelta(seconds=180),
+                'post': datetime.timedelta(seconds=60),
+                'total': datetime.timedelta(seconds=300),
+            },
+        ),
+    )
+
+
+class SnapshotTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.path = Path(tempdir.name) / 'comp.snapshot'
+
+        self.comp = build_comp()
+        snapshot.write_snapshot(self.comp, self.path)
+
+        self.snapshot = snapshot.Snapshot(self.path)
+        self.addCleanup(self.snapshot.close)
+
+    def test_is_snapshot(self) -> None:
+        self.assertTrue(snapshot.is_snapshot(self.path))
+        self.assertFalse(snapshot.is_snapshot(self.path.parent))
+        self.assertFalse(snapshot.is_snapshot(self.path.parent / 'missing'))
+
+    def test_metadata(self) -> None:
+        self.assertEqual('0123abcd', self.snapshot.state)
+        self.assertEqual(2, self.snapshot.num_teams_per_arena)
+        self.assertEqual(
+            {'A': "Arena A", 'B': "Arena B"},
+            self.snapshot.arena_display_names,
+        )
+        self.assertEqual(
+            self.comp.schedule.match_slot_lengths,
+            self.snapshot.match_slot_lengths,
+        )
+
+    def test_league_rows(self) -> None:
+        self.assertEqual(
+            [
+                (1, 8, 12, 'ABC', "Team ABC"),
+                (2, 4, 7, 'DEF', "Team DEF"),
+                (2, 4, 0, 'GHI', "Team GHI"),
+            ],
+            list(self.snapshot.league_rows()),
+        )
+
+    def test_all_matches(self) -> None:
+        matches = self.snapshot.matches()
+
+        self.assertEqual(self.comp.schedule.matches, matches)
+        self.assertEqual(
+            ONE_HOUR.utcoffset(None),
+            matches[0][ArenaName('A')].start_time.utcoffset(),
+        )
+
+    def test_upcoming_matches(self) -> None:
+        self.assertEqual(
+            self.comp.schedule.matches[1:2],
+            self.snapshot.matches(START + SLOT, limit=1),
+        )
+        self.assertEqual(
+            self.comp.schedule.matches[2:],
+            self.snapshot.matches(START + SLOT * 2, limit=5),
+        )
+
+    def test_matches_at(self) -> None:
+        self.assertEqual(
+            list(self.comp.schedule.matches[1].values()),
+            list(self.snapshot.matches_at(START + SLOT * 1.5)),
+        )
+
+    def test_file_mode(self) -> None:
+        umask = os.umask(0o022)
+        self.addCleanup(os.umask, umask)
+        self.path.unlink()
+
+        snapshot.write_snapshot(self.comp, self.path)
+
+        self.assertEqual(0o644, stat.S_IMODE(self.path.stat().st_mode))
+
+    def test_keeps_existing_file_mode(self) -> None:
+        self.path.chmod(0o640)
+
+        snapshot.write_snapshot(self.comp, self.path)
+
+        self.assertEqual(0o640, stat.S_IMODE(self.path.stat().st_mode))
+
+    def test_not_a_snapshot(self) -> None:
+        self.path.write_bytes(b'teams: {}\n')
+
+        with self.assertRaises(ValueError):
+            snapshot.Snapshot(self.path)
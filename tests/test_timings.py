@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import io
+import json
+import threading
+import unittest
+
+from sr.comp.cli import timings
+
+
+class TimingsTests(unittest.TestCase):
+    def test_phase_without_recording(self) -> None:
+        with timings.phase('load'):
+            pass
+
+    def test_recording(self) -> None:
+        stream = io.StringIO()
+
+        with self.assertRaises(SystemExit):
+            with timings.recording(stream):
+                for _ in range(2):
+                    with timings.phase('load'):
+                        with timings.phase('yaml-load'):
+                            pass
+
+                with timings.phase('validate'):
+                    exit(1)
+
+        data = json.loads(stream.getvalue())
+
+        self.assertEqual(
+            [('load', 2), ('yaml-load', 2), ('validate', 1)],
+            [(x['name'], x['count']) for x in data['phases']],
+        )
+        load = data['phases'][0]
+        self.assertGreaterEqual(data['total']['wall_seconds'], load['wall_seconds'])
+
+        # Recording should have stopped
+        with timings.phase('other'):
+            pass
+        self.assertNotIn('other', stream.getvalue())
+
+    def test_recording_from_threads(self) -> None:
+        stream = io.StringIO()
+
+        def work() -> None:
+            for _ in range(100):
+                with timings.phase('network'):
+                    pass
+
+        with timings.recording(stream):
+            threads = [threading.Thread(target=work) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        (network,) = json.loads(stream.getvalue())['phases']
+        self.assertEqual(800, network['count'])
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import unittest
+
+from sr.comp.cli.update_layout import command
+
+from .factories import minimal_compstate, use_temporary_cache_dir
+
+
+class UpdateLayoutTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        use_temporary_cache_dir(self)
+
+    def test_without_league(self) -> None:
+        # As when setting up a compstate, before importing the schedule
+        with minimal_compstate('league.yaml') as compstate:
+            teams_list = compstate / 'teams.txt'
+            teams_list.write_text('DDD\nCCC\nBBB\nAAA\n')
+
+            settings = argparse.Namespace(compstate=compstate, teams_list=teams_list)
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(
+                io.StringIO(),
+            ):
+                command(settings)
+
+            self.assertEqual(
+                'teams:\n'
+                '- name: all\n'
+                '  display_name: Everyone\n'
+                '  teams: [DDD, CCC, BBB, AAA]\n',
+                (compstate / 'layout.yaml').read_text(),
+            )
+
+    def test_refuses_breaking_changes(self) -> None:
+        with minimal_compstate() as compstate:
+            teams_list = compstate / 'teams.txt'
+            teams_list.write_text('AAA\nBBB\nCCC\nXXX\n')
+            original = (compstate / 'layout.yaml').read_text()
+
+            settings = argparse.Namespace(compstate=compstate, teams_list=teams_list)
+            with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(
+                SystemExit,
+            ) as cm:
+                command(settings)
+
+            self.assertIn("the layout has not been updated", str(cm.exception.code))
+            self.assertEqual(original, (compstate / 'layout.yaml').read_text())
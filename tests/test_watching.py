@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import argparse
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from sr.comp.cli import watching
+
+
+class WatchableTests(unittest.TestCase):
+    def test_without_watch(self) -> None:
+        command = mock.Mock()
+        settings = argparse.Namespace(compstate='compstate', watch=False)
+
+        watching.watchable(command)(settings)
+
+        command.assert_called_once_with(settings)
+
+    def test_not_a_directory(self) -> None:
+        command = mock.Mock()
+        with tempfile.NamedTemporaryFile() as snapshot:
+            settings = argparse.Namespace(compstate=snapshot.name, watch=True)
+
+            with self.assertRaises(SystemExit):
+                watching.watchable(command)(settings)
+
+        command.assert_not_called()
+
+
+@unittest.skipUnless(sys.platform.startswith('linux'), "inotify is Linux only")
+class InotifyTests(unittest.TestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        tempdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tempdir.cleanup)
+        self.root = Path(tempdir.name)
+
+        self.inotify = watching.Inotify()
+        self.addCleanup(self.inotify.close)
+        watching.watch_directories(self.inotify, self.root)
+
+    def test_no_changes(self) -> None:
+        self.assertFalse(self.inotify.wait(0))
+
+    def test_file_written(self) -> None:
+        (self.root / 'teams.yaml').write_text('teams: {}\n')
+
+        self.assertTrue(self.inotify.wait(0))
+        self.assertFalse(self.inotify.wait(0), "Events should have been drained")